@@ -3,7 +3,10 @@ Django settings for DjangoProject project.
 Configuration flexible pour collaboration multi-base de données (MySQL/PostgreSQL).
 """
 import os
+from importlib.util import find_spec
 from pathlib import Path
+
+import django
 from dotenv import load_dotenv
 
 # Charger les variables d'environnement depuis .env
@@ -16,11 +19,17 @@ SECRET_KEY = os.getenv('SECRET_KEY', 'django-insecure-dev-key-change-in-producti
 DEBUG = os.getenv('DEBUG', 'True').lower() in ('true', '1', 'yes')
 ALLOWED_HOSTS = [h.strip() for h in os.getenv('ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',') if h.strip()]
 
-# Charger pymysql uniquement si MySQL est utilisé
+# Pilote MySQL : mysqlclient s'il est installé, sinon PyMySQL à sa place
+# (une seule fois, et seulement si MySQL est utilisé)
 DB_ENGINE = os.getenv('DB_ENGINE', 'mysql')
 if DB_ENGINE == 'mysql':
-    import pymysql
-    pymysql.install_as_MySQLdb()
+    try:
+        import MySQLdb  # noqa: F401
+    except ImportError:
+        import pymysql
+        # Django vérifie la version de mysqlclient : PyMySQL se déclare compatible
+        pymysql.version_info = (2, 2, 4, 'final', 0)
+        pymysql.install_as_MySQLdb()
 
 
 # Application definition
@@ -37,6 +46,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # En premier : la mesure inclut tous les autres middlewares
+    'dashboard.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -73,6 +84,8 @@ WSGI_APPLICATION = 'DjangoProject.wsgi.application'
 DB_ENGINES = {
     'mysql': 'django.db.backends.mysql',
     'postgresql': 'django.db.backends.postgresql',
+    # Développement et benchmarks (bench_dashboard) sans serveur de base de données
+    'sqlite': 'django.db.backends.sqlite3',
 }
 
 DATABASES = {
@@ -86,10 +99,127 @@ DATABASES = {
     }
 }
 
+if DB_ENGINE == 'sqlite':
+    DATABASES['default']['NAME'] = os.getenv('DB_NAME', str(BASE_DIR / 'db.sqlite3'))
+else:
+    # Réutilisation des connexions : CONN_MAX_AGE secondes par thread (0 = une
+    # connexion par requête), vérifiée avant réutilisation si CONN_HEALTH_CHECKS.
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', '0'))
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = (
+        os.getenv('DB_CONN_HEALTH_CHECKS', 'True').lower() in ('true', '1', 'yes'))
+
+# Pool de connexions partagé par les threads d'un processus (voir dashboard/pool.py)
+DB_POOL = os.getenv('DB_POOL', 'False').lower() in ('true', '1', 'yes') and DB_ENGINE != 'sqlite'
+if DB_POOL:
+    POOL = {
+        'TAILLE': int(os.getenv('DB_POOL_TAILLE', '10')),
+        'DELAI': float(os.getenv('DB_POOL_DELAI', '10')),
+        'DUREE_VIE': int(os.getenv('DB_POOL_DUREE_VIE', '1800')),
+    }
+    # Les connexions retournent au pool à la fin de chaque requête
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    if DB_ENGINE == 'postgresql' and django.VERSION >= (5, 1) and find_spec('psycopg_pool'):
+        # Pool natif de psycopg 3
+        DATABASES['default']['OPTIONS'] = {'pool': {
+            'min_size': 1, 'max_size': POOL['TAILLE'], 'timeout': POOL['DELAI'],
+            'max_lifetime': POOL['DUREE_VIE'],
+        }}
+    else:
+        DATABASES['default']['ENGINE'] = f"dashboard.backends.{'postgresql' if DB_ENGINE == 'postgresql' else 'mysql'}"
+        DATABASES['default']['POOL'] = POOL
+
 # Options spécifiques MySQL
 if DB_ENGINE == 'mysql':
     DATABASES['default']['OPTIONS'] = {'charset': 'utf8mb4'}
 
+# Réplique en lecture seule pour les vues de consultation (voir dashboard/routeurs.py).
+# Mêmes réglages que la base principale, sauf les DB_REPLICA_* renseignées ;
+# avec SQLite, DB_REPLICA_NAME est le fichier copié par synchroniser_replique.
+REPLIQUE = {cle: os.getenv(f'DB_REPLICA_{cle}') for cle in ('NAME', 'USER', 'PASSWORD', 'HOST', 'PORT')}
+if REPLIQUE['HOST'] or REPLIQUE['NAME']:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        **{cle: valeur for cle, valeur in REPLIQUE.items() if valeur},
+        # En test, la réplique désigne la base de test principale
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['dashboard.routeurs.RouteurLectureEcriture']
+# Délai (secondes) entre deux vérifications du retard de la réplique
+DB_REPLICA_VERIFICATION = float(os.getenv('DB_REPLICA_VERIFICATION', '5'))
+
+
+# Cache (graphiques des dashboards) - mémoire locale par défaut, ou fichiers
+# partagés entre les processus du serveur avec CACHE_BACKEND=file
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+}
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS.get(CACHE_BACKEND, CACHE_BACKENDS['locmem']),
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION',
+            str(BASE_DIR / 'cache') if CACHE_BACKEND == 'file' else 'dashboard',
+        ),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', '3600')),
+    }
+}
+
+
+# Sessions - base de données par défaut. Avec SESSION_BACKEND=cache, le cache
+# doit être partagé entre les processus (CACHE_BACKEND=file) ; signed_cookies
+# ne fait plus aucune écriture côté serveur.
+SESSION_BACKENDS = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_BACKENDS.get(os.getenv('SESSION_BACKEND', 'db'), SESSION_BACKENDS['db'])
+
+# UserSessionMiddleware ne réenregistre `last_activity` qu'après ce délai
+# (en secondes) : les pages consultées entre-temps n'écrivent pas la session.
+SESSION_ACTIVITE_INTERVALLE = int(os.getenv('SESSION_ACTIVITE_INTERVALLE', '300'))
+
+# Durée de vie (secondes) des groupes de chaque utilisateur dans le cache. Un
+# changement de groupes s'applique dès la requête suivante dans tous les
+# processus (version en base, voir dashboard/permissions.py) : cette durée ne
+# fait que libérer la mémoire des entrées obsolètes.
+DASHBOARD_DROITS_TIMEOUT = int(os.getenv('DASHBOARD_DROITS_TIMEOUT', '300'))
+
+
+# Vues async des dashboards (requêtes concurrentes) : à activer avec un serveur
+# ASGI (uvicorn, daphne...) ; sous WSGI les vues synchrones restent plus rapides.
+DASHBOARD_ASYNC = os.getenv('DASHBOARD_ASYNC', 'False').lower() in ('true', '1', 'yes')
+
+# Import de plotly/pandas au chargement de wsgi.py / asgi.py plutôt qu'au premier
+# graphique. Avec `gunicorn --preload`, il est fait une fois dans le maître et
+# partagé par les workers ; sans --preload, chaque worker démarre plus lentement.
+DASHBOARD_PRECHARGER = os.getenv('DASHBOARD_PRECHARGER', 'False').lower() in ('true', '1', 'yes')
+
+
+# En-tête Server-Timing (SQL, sections, total) sur les réponses ; actif par
+# défaut en développement seulement, car il révèle des détails internes.
+DASHBOARD_SERVER_TIMING = os.getenv('DASHBOARD_SERVER_TIMING', str(DEBUG)).lower() in ('true', '1', 'yes')
+
+# Mesures par requête (une ligne JSON) dans le journal dashboard.performances
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'dashboard.performances': {
+            'handlers': ['console'],
+            'level': os.getenv('DASHBOARD_PERFORMANCES_LOG', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -126,6 +256,12 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = os.getenv('STATIC_ROOT', str(BASE_DIR / 'staticfiles'))
+
+# CSS/JS du thème regroupés, minifiés et précompressés par `construire_assets`
+# (dashboard/static/assets/) ; sans manifeste, les fichiers sources sont inclus un
+# par un. Désactivé par défaut en développement pour voir les sources modifiées.
+DASHBOARD_BUNDLES = os.getenv('DASHBOARD_BUNDLES', str(not DEBUG)).lower() in ('true', '1', 'yes')
 
 # Redirection après connexion/déconnexion
 LOGIN_REDIRECT_URL = 'dashboard:dashboard_1'
@@ -9,8 +9,13 @@ https://docs.djangoproject.com/en/6.0/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'DjangoProject.settings')
 
 application = get_wsgi_application()
+
+if settings.DASHBOARD_PRECHARGER:
+    from dashboard.graphiques import precharger
+    precharger()
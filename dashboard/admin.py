@@ -1,26 +1,142 @@
 from django.contrib import admin
 from django.contrib.auth.models import User
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import Client, Localite, Produit, Commande, Ligne
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+from .models import (
+    Client, Localite, Produit, Commande, Ligne, PointReprise,
+    AgregatLocalite, AgregatSegment, AgregatProduit, AgregatLivraison, AgregatJour, Compteur,
+)
+
+# En dessous de cette estimation, le nombre de lignes est compté exactement
+SEUIL_COMPTE_ESTIME = 100_000
 
 
 class CustomUserAdmin(BaseUserAdmin):
     """Affichage personnalisé des utilisateurs avec les groupes visibles"""
     list_display = ('username', 'email', 'first_name', 'last_name', 'is_staff', 'get_groups')
     list_filter = ('is_staff', 'is_superuser', 'groups')
-    
+
+    def get_queryset(self, request):
+        # Groupes de toute la page en une requête (get_groups)
+        return super().get_queryset(request).prefetch_related('groups')
+
     def get_groups(self, obj):
         return ", ".join([g.name for g in obj.groups.all()])
     get_groups.short_description = 'Groupes'
 
 
+# ═══════════════════════════════════════════════════════════════
+# Tables de ventes (jusqu'à plusieurs millions de lignes)
+# ═══════════════════════════════════════════════════════════════
+
+def lignes_estimees(model, alias):
+    """
+    Nombre de lignes de la table de `model` d'après les statistiques de la base
+    (PostgreSQL : pg_class.reltuples, MySQL : information_schema.TABLES), ou None
+    si la base n'en tient pas (SQLite) ou si elles n'ont pas encore été calculées.
+    """
+    connexion = connections[alias]
+    if connexion.vendor == 'postgresql':
+        sql = "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass"
+    elif connexion.vendor == 'mysql':
+        sql = ("SELECT TABLE_ROWS FROM information_schema.TABLES "
+               "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s")
+    else:
+        return None
+    try:
+        with connexion.cursor() as curseur:
+            curseur.execute(sql, [model._meta.db_table])
+            ligne = curseur.fetchone()
+    except DatabaseError:
+        return None
+    # reltuples vaut -1 tant que la table n'a pas été analysée (PostgreSQL >= 14)
+    return ligne[0] if ligne and ligne[0] is not None and ligne[0] >= 0 else None
+
+
+class PaginateurEstime(Paginator):
+    """
+    Sans filtre ni recherche, le nombre de lignes de la liste est l'estimation de
+    la base au lieu d'un COUNT(*) qui parcourt toute la table. Avec un filtre, ou
+    pour une petite table, le compte reste exact.
+    """
+
+    @cached_property
+    def count(self):
+        requete = self.object_list
+        if not requete.query.where:
+            estimation = lignes_estimees(requete.model, requete.db)
+            if estimation is not None and estimation >= SEUIL_COMPTE_ESTIME:
+                return estimation
+        return super().count
+
+
+class GrandeTableAdmin(admin.ModelAdmin):
+    """
+    Liste sans COUNT(*) de la table entière : nombre de lignes estimé, et pas de
+    second comptage « sur N au total » quand un filtre est actif.
+    """
+    paginator = PaginateurEstime
+    show_full_result_count = False
+
+
+# Recherches : égalité sur les identifiants, début de chaîne sur les noms (colonnes
+# indexées). Elles servent aussi aux listes d'autocomplétion de LigneAdmin.
+
+class ClientAdmin(GrandeTableAdmin):
+    list_display = ('cltId', 'cltNom', 'cltSegment')
+    list_filter = ('cltSegment',)
+    search_fields = ('=cltId', '^cltNom')
+    ordering = ('cltId',)
+
+
+class LocaliteAdmin(GrandeTableAdmin):
+    list_display = ('locCodePostal', 'locVille', 'locEtat', 'locRegion')
+    list_filter = ('locRegion',)
+    search_fields = ('^locVille',)
+
+
+class ProduitAdmin(GrandeTableAdmin):
+    list_display = ('prodId', 'prodNom', 'prodCategorie', 'prodSousCategorie')
+    list_filter = ('prodCategorie',)
+    search_fields = ('=prodId', '^prodNom')
+    ordering = ('prodId',)
+
+
+class CommandeAdmin(GrandeTableAdmin):
+    list_display = ('comID', 'comDate', 'comDateLivraison', 'comModeLivraison')
+    search_fields = ('=comID',)
+    date_hierarchy = 'comDate'
+    ordering = ('-comDate',)
+
+
+class LigneAdmin(GrandeTableAdmin):
+    """Liste des lignes : les objets liés affichés sont chargés par jointure"""
+    list_display = ('commande', 'produit', 'client', 'ligQuantite', 'ligPrix')
+    list_select_related = ('commande', 'produit', 'client')
+    search_fields = ('=commande__comID',)
+    # Formulaire : pas de <select> avec toutes les commandes, produits, clients et localités
+    raw_id_fields = ('commande',)
+    autocomplete_fields = ('produit', 'client', 'localite')
+    # Clé primaire plutôt que Meta.ordering (produit) : pas de tri de la table entière
+    ordering = ('-id',)
+
+
 # Remplacement de l'admin User par défaut
 admin.site.unregister(User)
 admin.site.register(User, CustomUserAdmin)
 
 # Enregistrement des modèles métier
-admin.site.register(Client)
-admin.site.register(Localite)
-admin.site.register(Produit)
-admin.site.register(Commande)
-admin.site.register(Ligne)
\ No newline at end of file
+admin.site.register(Client, ClientAdmin)
+admin.site.register(Localite, LocaliteAdmin)
+admin.site.register(Produit, ProduitAdmin)
+admin.site.register(Commande, CommandeAdmin)
+admin.site.register(Ligne, LigneAdmin)
+admin.site.register(PointReprise)
+admin.site.register(AgregatLocalite)
+admin.site.register(AgregatSegment)
+admin.site.register(AgregatProduit)
+admin.site.register(AgregatLivraison)
+admin.site.register(AgregatJour)
+admin.site.register(Compteur)
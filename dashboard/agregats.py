@@ -0,0 +1,250 @@
+"""
+Table de faits et tables d'agrégats des ventes.
+
+Les dashboards ne parcourent pas la table Ligne : ils lisent des tables
+résumées (par ville, segment, sous-catégorie, mode de livraison et jour) dont
+la taille ne dépend pas du nombre de lignes de commande. Ces tables sont
+calculées sans jointure depuis FaitVente, copie dénormalisée de Ligne aux
+montants entiers.
+
+Après un import, `rafraichir_commandes` ne recalcule que les faits des
+commandes importées et reporte la différence sur les lignes d'agrégats
+concernées : le coût dépend du nombre de lignes modifiées, pas de la taille
+des tables. La commande `rafraichir_agregats` (et `remplirdb
+--agregats-complets`) reconstruit tout.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from .cache import invalider_graphiques
+from .models import (
+    ECHELLE_MONTANTS, Client, Produit, Commande, Ligne, FaitVente,
+    AgregatLocalite, AgregatSegment, AgregatProduit, AgregatLivraison, AgregatJour, Compteur,
+)
+
+TAILLE_LOT = 5000
+# Commandes recalculées ensemble par le recalcul ciblé (taille des clauses IN)
+TAILLE_LOT_COMMANDES = 500
+
+# Champ de FaitVente -> chemin dans Ligne
+CHAMPS_FAIT = {
+    'commande': 'commande_id',
+    'produit': 'produit_id',
+    'client': 'client_id',
+    'jour': 'commande__comDate',
+    'mode_livraison': 'commande__comModeLivraison',
+    'segment': 'client__cltSegment',
+    'region': 'localite__locRegion',
+    'etat': 'localite__locEtat',
+    'ville': 'localite__locVille',
+    'categorie': 'produit__prodCategorie',
+    'sous_categorie': 'produit__prodSousCategorie',
+    'quantite': 'ligQuantite',
+}
+
+# Modèle d'agrégat -> {champ de l'agrégat: champ de FaitVente}
+DIMENSIONS = {
+    AgregatLocalite: {'region': 'region', 'etat': 'etat', 'ville': 'ville'},
+    AgregatSegment: {'segment': 'segment'},
+    AgregatProduit: {'categorie': 'categorie', 'sous_categorie': 'sous_categorie'},
+    AgregatLivraison: {'mode': 'mode_livraison'},
+    AgregatJour: {'jour': 'jour', 'region': 'region', 'segment': 'segment', 'categorie': 'categorie'},
+}
+
+COMPTEURS = {
+    'clients': Client,
+    'produits': Produit,
+    'commandes': Commande,
+    'lignes': Ligne,
+}
+
+# Mesures calculées sur FaitVente ; ventes et benefice sont multipliés par ECHELLE_MONTANTS.
+# Les noms sont préfixés : `quantite` est déjà un champ de FaitVente.
+MESURES = {
+    'total_lignes': Count('id'),
+    'total_quantite': Sum('quantite'),
+    'total_ventes': Sum('prix_x10000'),
+    'total_benefice': Sum('benefice_x10000'),
+}
+
+
+def regrouper_faits(dimensions, **filtres):
+    """GROUP BY de FaitVente sur `dimensions` ({nom: champ}) avec les MESURES."""
+    identiques = [nom for nom, champ in dimensions.items() if nom == champ]
+    renommes = {nom: F(champ) for nom, champ in dimensions.items() if nom != champ}
+    return (FaitVente.objects.filter(**filtres).order_by()
+            .values(*identiques, **renommes).annotate(**MESURES))
+
+
+def _agregat(modele, ligne):
+    """Ligne d'agrégat ; les sommes entières redeviennent des montants exacts."""
+    return modele(
+        nb_lignes=ligne.pop('total_lignes'),
+        quantite=ligne.pop('total_quantite'),
+        ventes=Decimal(ligne.pop('total_ventes')) / ECHELLE_MONTANTS,
+        benefice=Decimal(ligne.pop('total_benefice')) / ECHELLE_MONTANTS,
+        **ligne,
+    )
+
+
+def montant_entier(montant):
+    """Montant (float ou texte) multiplié par ECHELLE_MONTANTS, arrondi à l'entier."""
+    return int((Decimal(str(montant)) * ECHELLE_MONTANTS).to_integral_value())
+
+
+def _fait(ligne):
+    return FaitVente(
+        id=ligne['id'],
+        annee=ligne['commande__comDate'].year,
+        prix_x10000=montant_entier(ligne['ligPrix']),
+        remise=Decimal(str(ligne['ligRemise'])),
+        benefice_x10000=montant_entier(ligne['ligBenefice']),
+        **{nom: ligne[chemin] for nom, chemin in CHAMPS_FAIT.items()},
+    )
+
+
+def rafraichir_faits(journal=None):
+    """Reconstruit FaitVente depuis Ligne (une lecture jointe, insertion par lots)."""
+    with transaction.atomic():
+        FaitVente.objects.all().delete()
+        lignes = (Ligne.objects.order_by()
+                  .values('id', 'ligPrix', 'ligRemise', 'ligBenefice', *CHAMPS_FAIT.values())
+                  .iterator(chunk_size=TAILLE_LOT))
+        lot, total = [], 0
+        for ligne in lignes:
+            lot.append(_fait(ligne))
+            if len(lot) >= TAILLE_LOT:
+                total += len(FaitVente.objects.bulk_create(lot))
+                lot = []
+        total += len(FaitVente.objects.bulk_create(lot))
+    if journal:
+        journal(f"{FaitVente._meta.verbose_name} : {total} lignes")
+
+
+def rafraichir_agregats(journal=None):
+    """Recalcule la table de faits puis chaque table d'agrégats (un GROUP BY sans jointure)."""
+    with transaction.atomic():
+        rafraichir_faits(journal)
+        for modele, dimensions in DIMENSIONS.items():
+            lignes = regrouper_faits(dimensions)
+            modele.objects.all().delete()
+            objets = modele.objects.bulk_create([_agregat(modele, ligne) for ligne in lignes],
+                                                batch_size=1000)
+            if journal:
+                journal(f"{modele._meta.verbose_name} : {len(objets)} lignes")
+
+        for nom, modele in COMPTEURS.items():
+            Compteur.objects.update_or_create(nom=nom, defaults={'valeur': modele.objects.count()})
+
+    # Les graphiques mis en cache avec les anciens agrégats ne sont plus valables.
+    invalider_graphiques()
+
+
+# ═══════════════════════════════════════════════════════════════
+# Recalcul ciblé
+# ═══════════════════════════════════════════════════════════════
+
+def _contributions(commandes):
+    """{modèle d'agrégat: {clé: (lignes, quantité, ventes, bénéfice)}} des faits des `commandes`."""
+    contributions = {}
+    for modele, dimensions in DIMENSIONS.items():
+        contributions[modele] = {
+            tuple(ligne[nom] for nom in dimensions): tuple(ligne[mesure] for mesure in MESURES)
+            for ligne in regrouper_faits(dimensions, commande__in=commandes)
+        }
+    return contributions
+
+
+def _appliquer(modele, avant, apres):
+    """Reporte sur les lignes de `modele` la différence entre deux contributions."""
+    noms = list(DIMENSIONS[modele])
+    deltas = {}
+    for cle in avant.keys() | apres.keys():
+        delta = tuple(b - a for a, b in zip(avant.get(cle, (0,) * 4), apres.get(cle, (0,) * 4)))
+        if any(delta):
+            deltas[cle] = delta
+    if not deltas:
+        return
+
+    # Filtre par dimension (pas de OR par clé) puis appariement exact en Python
+    filtres = {f'{nom}__in': {cle[i] for cle in deltas} for i, nom in enumerate(noms)}
+    existantes = {tuple(getattr(objet, nom) for nom in noms): objet
+                  for objet in modele.objects.filter(**filtres)}
+    a_creer, a_modifier, a_supprimer = [], [], []
+    for cle, (lignes, quantite, ventes, benefice) in deltas.items():
+        objet = existantes.get(cle)
+        if objet is None:
+            objet = modele(**dict(zip(noms, cle)), nb_lignes=0, quantite=0,
+                           ventes=Decimal(0), benefice=Decimal(0))
+        objet.nb_lignes += lignes
+        objet.quantite += quantite
+        objet.ventes += Decimal(ventes) / ECHELLE_MONTANTS
+        objet.benefice += Decimal(benefice) / ECHELLE_MONTANTS
+        if objet.pk is None:
+            if objet.nb_lignes > 0:
+                a_creer.append(objet)
+        elif objet.nb_lignes > 0:
+            a_modifier.append(objet)
+        else:
+            a_supprimer.append(objet.pk)
+    modele.objects.bulk_create(a_creer, batch_size=1000)
+    modele.objects.bulk_update(a_modifier, ['nb_lignes', 'quantite', 'ventes', 'benefice'], batch_size=1000)
+    modele.objects.filter(pk__in=a_supprimer).delete()
+
+
+def _ajouter_au_compteur(nom, delta, modele):
+    if not Compteur.objects.filter(nom=nom).update(valeur=F('valeur') + delta):
+        # Agrégats jamais calculés : le compteur part de la valeur exacte
+        Compteur.objects.create(nom=nom, valeur=modele.objects.count())
+
+
+def rafraichir_commandes(commandes=(), lignes=(), journal=None, recompter=True):
+    """
+    Met à jour FaitVente et les agrégats pour les commandes `commandes` et les
+    lignes d'id `lignes` (créées, modifiées ou supprimées depuis le dernier calcul).
+
+    Pour chaque lot de commandes, leurs faits sont recalculés depuis Ligne et la
+    différence de leurs contributions (avant / après) est reportée sur les seules
+    lignes d'agrégats concernées. Avec `recompter=False` (modification de lignes
+    seulement), les compteurs des clients, produits et commandes sont conservés.
+    """
+    commandes = set(commandes)
+    lignes = list(lignes)
+    with transaction.atomic():
+        for debut in range(0, len(lignes), TAILLE_LOT_COMMANDES):
+            ids = lignes[debut:debut + TAILLE_LOT_COMMANDES]
+            # Une ligne peut avoir changé de commande : l'ancienne et la nouvelle sont recalculées
+            commandes.update(FaitVente.objects.filter(id__in=ids).values_list('commande', flat=True))
+            commandes.update(Ligne.objects.filter(id__in=ids).values_list('commande_id', flat=True))
+
+        commandes = sorted(commandes)
+        delta_lignes = 0
+        for debut in range(0, len(commandes), TAILLE_LOT_COMMANDES):
+            lot = commandes[debut:debut + TAILLE_LOT_COMMANDES]
+            avant = _contributions(lot)
+            supprimes, _ = FaitVente.objects.filter(commande__in=lot).delete()
+            faits = [_fait(ligne) for ligne in
+                     Ligne.objects.filter(commande_id__in=lot).order_by()
+                     .values('id', 'ligPrix', 'ligRemise', 'ligBenefice', *CHAMPS_FAIT.values())]
+            FaitVente.objects.bulk_create(faits, batch_size=TAILLE_LOT)
+            apres = _contributions(lot)
+            for modele in DIMENSIONS:
+                _appliquer(modele, avant[modele], apres[modele])
+            delta_lignes += len(faits) - supprimes
+
+        # Un fait par ligne : pas de COUNT(*) de la plus grosse table
+        _ajouter_au_compteur('lignes', delta_lignes, Ligne)
+        # Commandes sans ligne comprises, comme dans rafraichir_agregats
+        for nom in ('clients', 'produits', 'commandes') if recompter else ():
+            Compteur.objects.update_or_create(nom=nom, defaults={'valeur': COMPTEURS[nom].objects.count()})
+    if journal:
+        journal(f"Agrégats mis à jour pour {len(commandes)} commande(s) ({delta_lignes:+d} lignes)")
+
+    invalider_graphiques()
+
+
+def compteur(nom):
+    """Valeur d'un compteur (0 si les agrégats n'ont jamais été calculés)."""
+    return Compteur.objects.filter(nom=nom).values_list('valeur', flat=True).first() or 0
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class VentesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'dashboard'
+
+    def ready(self):
+        from . import signals  # noqa: F401  (connexion des receveurs)
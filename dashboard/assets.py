@@ -0,0 +1,238 @@
+"""
+Regroupement des fichiers CSS et JavaScript du thème en quelques fichiers (bundles).
+
+Chaque bundle concatène, dans l'ordre, les fichiers de `BUNDLES` (chemins relatifs
+à dashboard/static/), puis est minifié, nommé avec l'empreinte de son contenu
+(`theme.3f9a0c1b2d4e.css`) et précompressé (.gz, et .br si brotli est installé).
+Le résultat est écrit dans dashboard/static/assets/ avec un manifeste ; la
+commande `construire_assets` le génère avant `collectstatic`.
+
+Le nom change quand le contenu change : le serveur web peut donc marquer ces
+fichiers comme immuables (voir DEPLOYMENT.md). La balise `{% bundle %}`
+(templatetags/assets.py) utilise les bundles si DASHBOARD_BUNDLES est vrai et
+que le manifeste existe, sinon elle inclut les fichiers sources un par un.
+
+La minification utilise rjsmin et rcssmin s'ils sont installés ; sans eux, les
+fichiers sont seulement concaténés. Les fichiers déjà minifiés (`*.min.js`,
+`*.min.css`) sont repris tels quels.
+"""
+import gzip
+import hashlib
+import json
+import posixpath
+import re
+from functools import lru_cache
+from pathlib import Path
+
+DOSSIER_STATIC = Path(__file__).resolve().parent / 'static'
+SOUS_DOSSIER = 'assets'
+MANIFESTE = 'manifest.json'
+
+BOOTSTRAP = 'bootstrap/dist'
+PLUGINS = 'plugins/bower_components'
+
+BUNDLES = {
+    # Toutes les pages (y compris connexion et inscription)
+    'theme.css': [
+        f'{BOOTSTRAP}/css/bootstrap.min.css',
+        f'{PLUGINS}/sidebar-nav/dist/sidebar-nav.min.css',
+        'css/animate.css',
+        'css/style.css',
+    ],
+    'theme.js': [
+        f'{PLUGINS}/jquery/dist/jquery.min.js',
+        f'{BOOTSTRAP}/js/bootstrap.min.js',
+        f'{PLUGINS}/sidebar-nav/dist/sidebar-nav.min.js',
+        'js/jquery.slimscroll.js',
+        'js/waves.js',
+        'js/custom.min.js',
+        f'{PLUGINS}/styleswitcher/jQuery.style.switcher.js',
+    ],
+    # Widgets de démonstration du thème (contenu par défaut de base.html, dashboard 2)
+    'widgets.css': [
+        f'{PLUGINS}/chartist-js/dist/chartist.min.css',
+        f'{PLUGINS}/chartist-plugin-tooltip-master/dist/chartist-plugin-tooltip.css',
+        f'{PLUGINS}/vectormap/jquery-jvectormap-2.0.2.css',
+    ],
+    'widgets.js': [
+        f'{PLUGINS}/waypoints/lib/jquery.waypoints.js',
+        f'{PLUGINS}/counterup/jquery.counterup.min.js',
+        f'{PLUGINS}/vectormap/jquery-jvectormap-2.0.2.min.js',
+        f'{PLUGINS}/vectormap/jquery-jvectormap-us-aea-en.js',
+        f'{PLUGINS}/chartist-js/dist/chartist.min.js',
+        f'{PLUGINS}/chartist-plugin-tooltip-master/dist/chartist-plugin-tooltip.min.js',
+        f'{PLUGINS}/jquery-sparkline/jquery.sparkline.min.js',
+        'js/dashboard3.js',
+    ],
+    # Listes paginées par le serveur (DataTables)
+    'listes.css': [
+        f'{PLUGINS}/datatables/jquery.dataTables.min.css',
+    ],
+    'listes.js': [
+        f'{PLUGINS}/datatables/jquery.dataTables.min.js',
+        'js/listes.js',
+    ],
+    # Graphiques plotly (dashboard 1, tendances)
+    'graphiques.js': [
+        'plotly/plotly-4.1.1.min.js',
+        'js/graphiques.js',
+    ],
+}
+
+# Précompression : seuls les fichiers qui y gagnent vraiment sont gardés
+TAILLE_MIN_COMPRESSION = 1024
+
+# Une seule passe : le contenu inséré pour un @import n'est pas réanalysé
+REFERENCE_CSS = re.compile(
+    r'''@import\s+(?:url\(\s*)?['"]?(?P<import>[^'")\s;]+)['"]?\s*\)?\s*(?P<media>[^;]*);'''
+    r'''|url\(\s*(?P<guillemet>['"]?)(?P<url>[^'")]+)(?P=guillemet)\s*\)'''
+)
+CHARSET_CSS = re.compile(r'@charset\s+[^;]+;\s*', re.IGNORECASE)
+
+
+def _externe(url):
+    return url.startswith(('http:', 'https:', '//', 'data:', '/', '#'))
+
+
+def _css(chemin, externes, deja_inclus):
+    """
+    Contenu d'un fichier CSS prêt à être placé dans dashboard/static/assets/ :
+    @import locaux remplacés par le fichier importé, url() relatives recalculées.
+    Les @import distants (polices Google...) sont retirés et ajoutés à `externes`.
+    """
+    if chemin in deja_inclus:
+        return ''
+    deja_inclus.add(chemin)
+    dossier = posixpath.dirname(chemin)
+
+    def remplacer(correspondance):
+        cible = correspondance.group('import')
+        if cible is not None:
+            if _externe(cible):
+                externes.append(cible)
+                return ''
+            contenu = _css(posixpath.normpath(posixpath.join(dossier, cible)), externes, deja_inclus)
+            media = correspondance.group('media').strip()
+            return f'@media {media} {{\n{contenu}\n}}' if media else contenu
+        cible, guillemet = correspondance.group('url'), correspondance.group('guillemet')
+        if _externe(cible):
+            return correspondance.group(0)
+        fichier, suffixe = re.match(r'([^?#]*)(.*)', cible).groups()
+        relatif = posixpath.relpath(posixpath.normpath(posixpath.join(dossier, fichier)), SOUS_DOSSIER)
+        return f'url({guillemet}{relatif}{suffixe}{guillemet})'
+
+    texte = CHARSET_CSS.sub('', (DOSSIER_STATIC / chemin).read_text(encoding='utf-8'))
+    return REFERENCE_CSS.sub(remplacer, texte)
+
+
+def _minifier(contenu, extension):
+    """Minifie avec rjsmin / rcssmin s'ils sont installés (None sinon)."""
+    try:
+        if extension == '.js':
+            from rjsmin import jsmin
+            return jsmin(contenu)
+        from rcssmin import cssmin
+        return cssmin(contenu)
+    except ImportError:
+        return None
+
+
+def contenu_bundle(nom, externes=None):
+    """
+    Texte du bundle `nom`. Renvoie (contenu, minifié ?). Les @import CSS distants
+    retirés sont ajoutés à la liste `externes`.
+    """
+    extension = posixpath.splitext(nom)[1]
+    externes = [] if externes is None else externes
+    morceaux, minifie = [], True
+    for chemin in BUNDLES[nom]:
+        if extension == '.css':
+            texte = _css(chemin, externes, set())
+        else:
+            texte = (DOSSIER_STATIC / chemin).read_text(encoding='utf-8')
+        if '.min.' not in posixpath.basename(chemin):
+            reduit = _minifier(texte, extension)
+            if reduit is None:
+                minifie = False
+            else:
+                texte = reduit
+        morceaux.append(texte.strip())
+    # « ; » entre deux scripts : un fichier sans point-virgule final ne doit pas
+    # se coller au suivant
+    separateur = '\n;\n' if extension == '.js' else '\n'
+    return separateur.join(morceaux) + '\n', minifie
+
+
+def sources_manquantes(noms=None):
+    """Fichiers sources des bundles `noms` (tous par défaut) absents de dashboard/static/."""
+    return sorted({chemin for nom in noms or BUNDLES for chemin in BUNDLES[nom]
+                   if not (DOSSIER_STATIC / chemin).exists()})
+
+
+def _precompresser(chemin, donnees):
+    """Écrit les variantes .gz (et .br si brotli est installé). Renvoie leurs extensions."""
+    if len(donnees) < TAILLE_MIN_COMPRESSION:
+        return []
+    variantes = []
+    # mtime=0 : même contenu, même fichier .gz d'une construction à l'autre
+    compresse = gzip.compress(donnees, compresslevel=9, mtime=0)
+    if len(compresse) < len(donnees):
+        Path(f'{chemin}.gz').write_bytes(compresse)
+        variantes.append('.gz')
+    try:
+        import brotli
+    except ImportError:
+        return variantes
+    compresse = brotli.compress(donnees, quality=11)
+    if len(compresse) < len(donnees):
+        Path(f'{chemin}.br').write_bytes(compresse)
+        variantes.append('.br')
+    return variantes
+
+
+def construire(noms=None, dossier=None):
+    """
+    Écrit les bundles (tous par défaut) et le manifeste dans `dossier`
+    (dashboard/static/assets/). Les anciennes versions des bundles reconstruits
+    sont supprimées. Renvoie {nom: détails} pour le compte rendu.
+    Les url() des CSS sont calculées pour dashboard/static/assets/ même si
+    `dossier` est différent.
+    """
+    dossier = Path(dossier) if dossier is not None else DOSSIER_STATIC / SOUS_DOSSIER
+    dossier.mkdir(parents=True, exist_ok=True)
+    chemin_manifeste = dossier / MANIFESTE
+    construits = json.loads(chemin_manifeste.read_text()) if chemin_manifeste.exists() else {}
+
+    details = {}
+    for nom in noms or BUNDLES:
+        externes = []
+        contenu, minifie = contenu_bundle(nom, externes)
+        donnees = contenu.encode('utf-8')
+        base, extension = posixpath.splitext(nom)
+        fichier = f'{base}.{hashlib.md5(donnees).hexdigest()[:12]}{extension}'
+
+        for ancien in dossier.glob(f'{base}.*{extension}*'):
+            if not ancien.name.startswith(fichier):
+                ancien.unlink()
+        (dossier / fichier).write_bytes(donnees)
+        variantes = _precompresser(dossier / fichier, donnees)
+
+        construits[nom] = f'{SOUS_DOSSIER}/{fichier}'
+        details[nom] = {
+            'fichier': fichier,
+            'sources': len(BUNDLES[nom]),
+            'taille_sources': sum((DOSSIER_STATIC / chemin).stat().st_size for chemin in BUNDLES[nom]),
+            'taille': len(donnees),
+            'variantes': {v: (dossier / f'{fichier}{v}').stat().st_size for v in variantes},
+            'minifie': minifie,
+            'externes': externes,
+        }
+    chemin_manifeste.write_text(json.dumps(construits, indent=2, sort_keys=True) + '\n')
+    return details
+
+
+@lru_cache(maxsize=None)
+def manifeste():
+    """Bundles construits : {nom: chemin dans les fichiers statiques}. Lu une fois par processus."""
+    chemin = DOSSIER_STATIC / SOUS_DOSSIER / MANIFESTE
+    return json.loads(chemin.read_text()) if chemin.exists() else {}
@@ -0,0 +1,28 @@
+"""
+Exécution concurrente de requêtes ORM depuis les vues async.
+
+Les méthodes async de l'ORM (aget, acount...) passent toutes par le même
+thread : elles s'exécutent les unes après les autres. `en_parallele` lance
+chaque fonction dans un thread du pool, avec sa propre connexion à la base,
+pour que des agrégats indépendants soient calculés en même temps.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+def _dans_un_thread(fonction):
+    def executer():
+        try:
+            return fonction()
+        finally:
+            # Les threads du pool ne reçoivent pas request_finished : la connexion
+            # est fermée ici, sauf si CONN_MAX_AGE autorise sa réutilisation.
+            close_old_connections()
+    return sync_to_async(executer, thread_sensitive=False)
+
+
+async def en_parallele(*fonctions):
+    """Exécute les fonctions (synchrones, sans argument) en même temps ; résultats dans l'ordre."""
+    return await asyncio.gather(*(_dans_un_thread(fonction)() for fonction in fonctions))
@@ -0,0 +1,20 @@
+"""Moteur MySQL (PyMySQL ou mysqlclient) avec pool de connexions : voir dashboard.pool."""
+from django.db.backends.mysql import base, creation
+
+from dashboard.pool import ConnexionsPooleesMixin, CreationPooleeMixin
+
+
+class DatabaseCreation(CreationPooleeMixin, creation.DatabaseCreation):
+    pass
+
+
+class DatabaseWrapper(ConnexionsPooleesMixin, base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def connexion_utilisable(self, connexion):
+        try:
+            # Sans reconnexion (défaut des anciennes versions de PyMySQL) : elle serait invisible pour Django
+            connexion.ping(False)
+        except base.Database.Error:
+            return False
+        return True
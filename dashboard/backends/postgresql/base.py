@@ -0,0 +1,16 @@
+"""Moteur PostgreSQL (psycopg2) avec pool de connexions : voir dashboard.pool."""
+from django.db.backends.postgresql import base, creation
+
+from dashboard.pool import ConnexionsPooleesMixin, CreationPooleeMixin
+
+
+class DatabaseCreation(CreationPooleeMixin, creation.DatabaseCreation):
+    pass
+
+
+class DatabaseWrapper(ConnexionsPooleesMixin, base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def connexion_utilisable(self, connexion):
+        # Connexion fermée par le serveur : inutile d'envoyer le SELECT 1
+        return not connexion.closed and super().connexion_utilisable(connexion)
@@ -0,0 +1,53 @@
+"""
+Cache des graphiques rendus (HTML ou JSON Plotly).
+
+Les clés contiennent l'identifiant du graphique, ses paramètres et la version
+des données. La version est un Compteur en base, incrémenté par chaque import,
+chaque recalcul des agrégats et chaque modification de Ligne dans l'admin :
+l'invalidation fonctionne donc aussi entre processus (remplirdb et serveur
+web), y compris avec un cache en mémoire locale propre à chaque processus.
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db.models import F
+
+from .models import Compteur
+
+VERSION_DONNEES = 'version_donnees'
+
+
+def version_donnees():
+    """Version courante des données de ventes (une requête sur une clé unique)."""
+    return Compteur.objects.filter(nom=VERSION_DONNEES).values_list('valeur', flat=True).first() or 0
+
+
+def invalider_graphiques():
+    """Rend obsolètes tous les graphiques en cache en changeant la version des données."""
+    if not Compteur.objects.filter(nom=VERSION_DONNEES).update(valeur=F('valeur') + 1):
+        Compteur.objects.get_or_create(nom=VERSION_DONNEES, defaults={'valeur': 1})
+
+
+def cle_graphique(nom, parametres=None, version=None):
+    """Clé de cache d'un graphique pour un jeu de paramètres (filtres, granularité...)."""
+    if version is None:
+        version = version_donnees()
+    empreinte = hashlib.md5(
+        json.dumps(parametres or {}, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    return f'dashboard:graphique:{nom}:v{version}:{empreinte}'
+
+
+def graphique_en_cache(nom, construire, parametres=None, timeout=None):
+    """
+    Renvoie le graphique `nom` depuis le cache, ou l'y place après l'avoir
+    construit avec `construire()`. Un appel en cache n'exécute ni l'agrégation
+    ni Plotly.
+    """
+    cle = cle_graphique(nom, parametres)
+    resultat = cache.get(cle)
+    if resultat is None:
+        resultat = construire()
+        cache.set(cle, resultat, timeout)
+    return resultat
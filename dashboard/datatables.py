@@ -0,0 +1,106 @@
+"""
+Protocole « server-side processing » de DataTables.
+
+Le navigateur n'envoie que la page demandée (start, length), le tri et les
+recherches ; la pagination, le tri et le filtrage sont faits en SQL
+(LIMIT/OFFSET), donc le coût d'une page ne dépend pas de la taille du segment.
+Référence : https://datatables.net/manual/server-side
+"""
+from collections import namedtuple
+from datetime import date
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+
+LONGUEUR_DEFAUT = 25
+LONGUEUR_MAX = 500
+
+# type : 'texte' (recherche icontains), 'nombre' ou 'date' (recherche exacte)
+Colonne = namedtuple('Colonne', 'champ titre type')
+
+
+def _entier(valeur, defaut):
+    try:
+        return int(valeur)
+    except (TypeError, ValueError):
+        return defaut
+
+
+def _filtre(colonne, recherche):
+    """Q de recherche d'une valeur sur une colonne, ou None si elle ne peut pas correspondre."""
+    if colonne.type == 'texte':
+        return Q(**{f'{colonne.champ}__icontains': recherche})
+    try:
+        if colonne.type == 'date':
+            return Q(**{colonne.champ: date.fromisoformat(recherche)})
+        return Q(**{colonne.champ: float(recherche.replace(',', '.'))})
+    except ValueError:
+        return None
+
+
+def _valeur(valeur):
+    if isinstance(valeur, date):
+        return valeur.isoformat()
+    if isinstance(valeur, float):
+        return round(valeur, 2)
+    return valeur
+
+
+def filtrer(parametres, queryset, colonnes):
+    """`queryset` restreint par les recherches de DataTables (lui-même s'il n'y en a pas)."""
+    filtre = queryset
+
+    # Recherche globale : sur toutes les colonnes texte
+    recherche = parametres.get('search[value]', '').strip()
+    if recherche:
+        conditions = [q for q in (_filtre(c, recherche) for c in colonnes) if q is not None]
+        filtre = filtre.filter(reduce(or_, conditions)) if conditions else filtre.none()
+
+    # Recherche par colonne
+    for i, colonne in enumerate(colonnes):
+        recherche_colonne = parametres.get(f'columns[{i}][search][value]', '').strip()
+        if recherche_colonne:
+            condition = _filtre(colonne, recherche_colonne)
+            filtre = filtre.filter(condition) if condition is not None else filtre.none()
+    return filtre
+
+
+def page(parametres, queryset, colonnes):
+    """Lignes de la page demandée (tri, start, length), en tuples de valeurs des colonnes."""
+    # Tri (plusieurs colonnes possibles), puis id pour une pagination stable
+    ordre = []
+    i = 0
+    while f'order[{i}][column]' in parametres:
+        index = _entier(parametres.get(f'order[{i}][column]'), -1)
+        if 0 <= index < len(colonnes):
+            sens = '-' if parametres.get(f'order[{i}][dir]') == 'desc' else ''
+            ordre.append(sens + colonnes[index].champ)
+        i += 1
+    ordre.append('id')
+
+    debut = max(_entier(parametres.get('start'), 0), 0)
+    longueur = _entier(parametres.get('length'), LONGUEUR_DEFAUT)
+    if not 0 < longueur <= LONGUEUR_MAX:
+        longueur = LONGUEUR_MAX
+
+    return queryset.order_by(*ordre).values_list(*(c.champ for c in colonnes))[debut:debut + longueur]
+
+
+def reponse_datatables(parametres, queryset, colonnes, total=None):
+    """
+    Construit la réponse JSON DataTables pour `queryset`.
+
+    `parametres` est request.GET ; `total` évite un COUNT(*) sur le queryset
+    complet quand le nombre de lignes est déjà connu (tables d'agrégats).
+    """
+    if total is None:
+        total = queryset.count()
+    filtre = filtrer(parametres, queryset, colonnes)
+    filtrees = filtre.count() if filtre is not queryset else total
+    return {
+        'draw': _entier(parametres.get('draw'), 0),
+        'recordsTotal': total,
+        'recordsFiltered': filtrees,
+        'data': [[_valeur(v) for v in ligne] for ligne in page(parametres, filtre, colonnes)],
+    }
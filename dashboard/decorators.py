@@ -1,27 +1,57 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
 from django.core.exceptions import PermissionDenied
 from django.contrib.auth.decorators import login_required
 from functools import wraps
 
+from .permissions import droits
+from .routeurs import lecture_replique
+
+
+def _controle_async(view_func, autorise, message):
+    """
+    Version asynchrone du contrôle d'accès (login_required ne gère pas les vues
+    async avant Django 5.1). L'utilisateur et ses droits sont chargés dans un
+    thread : l'ORM ne peut pas être appelé directement depuis la boucle async.
+    """
+    def verifier(request):
+        if not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        if not autorise(droits(request)):
+            raise PermissionDenied(message)
+        return None
+
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        refus = await sync_to_async(verifier)(request)
+        if refus is not None:
+            return refus
+        return await view_func(request, *args, **kwargs)
+
+    return wrapper
+
 
 def group_required(*group_names):
     """
     Décorateur vérifiant l'appartenance à un ou plusieurs groupes.
     L'utilisateur doit appartenir à AU MOINS UN des groupes listés.
+    Fonctionne aussi sur les vues async (connexion vérifiée par le décorateur).
     """
     def decorator(view_func):
+        message = "Vous n'avez pas les permissions nécessaires."
+        if asyncio.iscoroutinefunction(view_func):
+            return _controle_async(view_func, lambda d: d.appartient(*group_names), message)
+
         @wraps(view_func)
         @login_required
         def wrapper(request, *args, **kwargs):
-            user_groups = request.user.groups.values_list('name', flat=True)
-            
-            if request.user.is_superuser:
-                return view_func(request, *args, **kwargs)
-            
-            if any(group in user_groups for group in group_names):
+            if droits(request).appartient(*group_names):
                 return view_func(request, *args, **kwargs)
             else:
-                raise PermissionDenied("Vous n'avez pas les permissions nécessaires.")
-        
+                raise PermissionDenied(message)
+
         return wrapper
     return decorator
 
@@ -30,17 +60,54 @@ def admin_required(view_func):
     """
     Décorateur spécifique pour les administrateurs uniquement.
     """
+    message = "Accès réservé aux administrateurs."
+    if asyncio.iscoroutinefunction(view_func):
+        return _controle_async(view_func, lambda d: d.is_admin, message)
+
     @wraps(view_func)
     @login_required
     def wrapper(request, *args, **kwargs):
-        is_admin = (
-            request.user.is_superuser or 
-            request.user.groups.filter(name='Administrateurs').exists()
-        )
-        
-        if is_admin:
+        if droits(request).is_admin:
             return view_func(request, *args, **kwargs)
         else:
-            raise PermissionDenied("Accès réservé aux administrateurs.")
-    
+            raise PermissionDenied(message)
+
+    return wrapper
+
+
+def _flux_sur_replique(contenu):
+    """Itère sur une réponse en flux avec les lectures sur la réplique, morceau par morceau."""
+    iterateur = iter(contenu)
+    fin = object()
+    while True:
+        with lecture_replique():
+            morceau = next(iterateur, fin)
+        if morceau is fin:
+            return
+        yield morceau
+
+
+def sur_replique(view_func):
+    """
+    Décorateur des vues de consultation : leurs lectures des tables de ventes
+    peuvent être servies par la réplique (voir dashboard.routeurs). Les réponses
+    en flux (exports) sont générées après le retour de la vue : elles sont
+    enveloppées pour garder ce routage.
+    """
+    if asyncio.iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def wrapper_async(request, *args, **kwargs):
+            with lecture_replique():
+                return await view_func(request, *args, **kwargs)
+
+        return wrapper_async
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        with lecture_replique():
+            response = view_func(request, *args, **kwargs)
+        if response.streaming:
+            response.streaming_content = _flux_sur_replique(response.streaming_content)
+        return response
+
     return wrapper
@@ -0,0 +1,298 @@
+"""
+Export en flux des lignes de commande (CSV, XLSX, Parquet).
+
+Les lignes sont lues par lots (pagination sur l'id, mémoire constante sur
+MySQL comme sur PostgreSQL) et chaque lot est envoyé au client dès qu'il est
+converti : le téléchargement commence tout de suite, quelle que soit la taille
+de l'export. Les colonnes sont celles du fichier d'import (data_bd.csv), donc
+un export CSV peut être rechargé avec `remplirdb`.
+"""
+import csv
+import zipfile
+from collections import namedtuple
+from datetime import date
+from xml.sax.saxutils import escape
+
+from django.utils.text import slugify
+
+from .graphiques import FILTRES_SERIE
+from .models import Ligne
+
+TAILLE_LOT = 2000
+
+# Limite de lignes d'une feuille Excel (en-tête compris)
+LIGNES_MAX_XLSX = 1_048_576
+
+# Colonne exportée : titre (en-tête du fichier d'import), chemin dans Ligne, type
+ColonneExport = namedtuple('ColonneExport', 'titre chemin type')
+
+COLONNES_EXPORT = [
+    ColonneExport('ID_Commande', 'commande_id', 'texte'),
+    ColonneExport('Date_Commande', 'commande__comDate', 'date'),
+    ColonneExport('Date_Livraison', 'commande__comDateLivraison', 'date'),
+    ColonneExport('Mode_Livraison', 'commande__comModeLivraison', 'texte'),
+    ColonneExport('ID_Client', 'client_id', 'texte'),
+    ColonneExport('Nom_Client', 'client__cltNom', 'texte'),
+    ColonneExport('Segment', 'client__cltSegment', 'texte'),
+    ColonneExport('Ville', 'localite__locVille', 'texte'),
+    ColonneExport('Etat', 'localite__locEtat', 'texte'),
+    ColonneExport('Code_postal', 'localite__locCodePostal', 'entier'),
+    ColonneExport('Region', 'localite__locRegion', 'texte'),
+    ColonneExport('ID_Produit', 'produit_id', 'texte'),
+    ColonneExport('Categorie', 'produit__prodCategorie', 'texte'),
+    ColonneExport('Sous_Categorie', 'produit__prodSousCategorie', 'texte'),
+    ColonneExport('Nom_Produit', 'produit__prodNom', 'texte'),
+    ColonneExport('Ventes', 'ligPrix', 'decimal'),
+    ColonneExport('Quantite', 'ligQuantite', 'entier'),
+    ColonneExport('Remise', 'ligRemise', 'decimal'),
+    ColonneExport('Benefice', 'ligBenefice', 'decimal'),
+]
+
+# Filtre de l'export -> chemin dans Ligne
+FILTRES_EXPORT = {
+    'segment': 'client__cltSegment',
+    'region': 'localite__locRegion',
+    'categorie': 'produit__prodCategorie',
+}
+
+
+def filtres_export(donnees):
+    """
+    Valide les filtres (request.GET : segment, region, categorie, debut, fin)
+    et renvoie les arguments de Ligne.objects.filter. Lève ValueError.
+    """
+    filtres = {}
+    for nom, chemin in FILTRES_EXPORT.items():
+        if donnees.get(nom):
+            if donnees[nom] not in FILTRES_SERIE[nom]:
+                raise ValueError(f"Valeur inconnue pour {nom} : {donnees[nom]}")
+            filtres[chemin] = donnees[nom]
+    for borne, lookup in (('debut', 'gte'), ('fin', 'lte')):
+        if donnees.get(borne):
+            filtres[f'commande__comDate__{lookup}'] = date.fromisoformat(donnees[borne])
+    return filtres
+
+
+def nom_fichier(filtres, extension):
+    """Nom du fichier exporté, construit uniquement à partir des filtres validés."""
+    parties = ['lignes'] + [slugify(str(valeur)) for valeur in filtres.values()]
+    return f"{'_'.join(parties)}.{extension}"
+
+
+def lots_lignes(filtres, taille_lot=TAILLE_LOT):
+    """Tuples des lignes filtrées, par lots, en pagination sur l'id (pas d'OFFSET)."""
+    queryset = Ligne.objects.filter(**filtres).order_by('id')
+    chemins = ['id'] + [c.chemin for c in COLONNES_EXPORT]
+    dernier = 0
+    while True:
+        lot = list(queryset.filter(id__gt=dernier).values_list(*chemins)[:taille_lot])
+        if not lot:
+            return
+        dernier = lot[-1][0]
+        yield [ligne[1:] for ligne in lot]
+
+
+class _Tampon:
+    """
+    Fichier en écriture seule, non positionnable (zipfile, pyarrow) : les
+    octets écrits sont récupérés et envoyés au client par `vider()`.
+    """
+    closed = False
+
+    def __init__(self):
+        self.morceaux = []
+        self.position = 0
+
+    def write(self, octets):
+        self.morceaux.append(bytes(octets))
+        self.position += len(octets)
+        return len(octets)
+
+    def tell(self):
+        return self.position
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def vider(self):
+        octets = b''.join(self.morceaux)
+        self.morceaux = []
+        return octets
+
+
+# ═══════════════════════════════════════════════════════════════
+# CSV
+# ═══════════════════════════════════════════════════════════════
+
+class _Echo:
+    """Pseudo-fichier : csv.writer renvoie directement la ligne écrite."""
+
+    def write(self, valeur):
+        return valeur
+
+
+def _cellule_csv(valeur):
+    if isinstance(valeur, float):
+        # Virgule décimale, comme le fichier d'import
+        return repr(valeur).replace('.', ',')
+    if isinstance(valeur, date):
+        return valeur.isoformat()
+    return valeur
+
+
+def flux_csv(filtres):
+    writer = csv.writer(_Echo(), delimiter=';')
+    # BOM : Excel reconnaît l'UTF-8 à l'ouverture
+    yield '\ufeff' + writer.writerow([c.titre for c in COLONNES_EXPORT])
+    for lot in lots_lignes(filtres):
+        yield ''.join(writer.writerow([_cellule_csv(v) for v in ligne]) for ligne in lot)
+
+
+# ═══════════════════════════════════════════════════════════════
+# XLSX (archive zip écrite au fil de l'eau)
+# ═══════════════════════════════════════════════════════════════
+
+_XLSX_FICHIERS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" Type="http://schemas.openxmlformats.org/'
+        'officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Lignes" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" Type="http://schemas.openxmlformats.org/'
+        'officeDocument/2006/relationships/worksheet"/>'
+        '<Relationship Id="rId2" Target="styles.xml" Type="http://schemas.openxmlformats.org/'
+        'officeDocument/2006/relationships/styles"/>'
+        '</Relationships>'
+    ),
+    # Style 1 : format de date intégré n°14
+    'xl/styles.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'
+    ),
+}
+
+_EPOQUE_EXCEL = date(1899, 12, 30)
+
+
+def _cellule_xlsx(valeur):
+    if valeur is None:
+        return '<c/>'
+    if isinstance(valeur, date):
+        return f'<c s="1"><v>{(valeur - _EPOQUE_EXCEL).days}</v></c>'
+    if isinstance(valeur, (int, float)):
+        return f'<c><v>{valeur!r}</v></c>'
+    return f'<c t="inlineStr"><is><t>{escape(str(valeur))}</t></is></c>'
+
+
+def _ligne_xlsx(valeurs):
+    return '<row>' + ''.join(_cellule_xlsx(v) for v in valeurs) + '</row>'
+
+
+def flux_xlsx(filtres):
+    """
+    Classeur XLSX produit en flux : la feuille est écrite dans l'archive lot par
+    lot, et les octets compressés sont envoyés au fur et à mesure. Au-delà de
+    la limite d'Excel (LIGNES_MAX_XLSX), les lignes suivantes sont ignorées.
+    """
+    tampon = _Tampon()
+    with zipfile.ZipFile(tampon, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for nom, contenu in _XLSX_FICHIERS.items():
+            archive.writestr(nom, contenu)
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as feuille:
+            feuille.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                + _ligne_xlsx([c.titre for c in COLONNES_EXPORT])
+            ).encode())
+            restantes = LIGNES_MAX_XLSX - 1
+            for lot in lots_lignes(filtres):
+                lot = lot[:restantes]
+                restantes -= len(lot)
+                feuille.write(''.join(_ligne_xlsx(ligne) for ligne in lot).encode())
+                yield tampon.vider()
+                if not restantes:
+                    break
+            feuille.write(b'</sheetData></worksheet>')
+    yield tampon.vider()
+
+
+# ═══════════════════════════════════════════════════════════════
+# Parquet (pyarrow, optionnel)
+# ═══════════════════════════════════════════════════════════════
+
+def flux_parquet(filtres):
+    """Fichier Parquet avec un groupe de lignes par lot. Nécessite pyarrow."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {'texte': pa.string(), 'date': pa.date32(), 'entier': pa.int64(), 'decimal': pa.float64()}
+    schema = pa.schema([(c.titre, types[c.type]) for c in COLONNES_EXPORT])
+
+    tampon = _Tampon()
+    with pq.ParquetWriter(tampon, schema) as writer:
+        for lot in lots_lignes(filtres):
+            colonnes = list(zip(*lot))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(valeurs, type=champ.type) for valeurs, champ in zip(colonnes, schema)],
+                schema=schema,
+            ))
+            yield tampon.vider()
+    yield tampon.vider()
+
+
+def parquet_disponible():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+# Format -> (générateur, type MIME, extension)
+FORMATS = {
+    'csv': (flux_csv, 'text/csv; charset=utf-8', 'csv'),
+    'xlsx': (flux_xlsx, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'parquet': (flux_parquet, 'application/vnd.apache.parquet', 'parquet'),
+}
@@ -0,0 +1,195 @@
+"""
+Service de données des graphiques.
+
+Chaque graphique ne reçoit que les quelques lignes agrégées qu'il affiche :
+le regroupement (GROUP BY) est fait par la base, jamais en Python. La même
+fonction `agreger` sert pour les tables d'agrégats comme pour Ligne.
+
+Les figures sont envoyées au navigateur en JSON et dessinées par plotly.js,
+servi comme fichier statique (dashboard/static/plotly).
+
+plotly.express (et pandas, numpy qu'il entraîne : ~200 ms) n'est importé
+qu'à la construction de la première figure : les pages sans graphique, l'admin
+et les commandes comme remplirdb ne paient pas ce coût au démarrage.
+"""
+import threading
+from datetime import date
+
+from django.db.models import Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncQuarter, TruncWeek
+
+from .instrumentation import chrono
+from .models import CATEGORIE, REGION, SEGMENT, AgregatJour, AgregatLocalite
+
+
+def requete_agregee(source, dimensions, mesures, filtres=None, ordre=None):
+    """Queryset (non évalué) de `agreger` : utilisé aussi par `expliquer_requetes`."""
+    queryset = source.objects.all() if hasattr(source, 'objects') else source
+    if filtres:
+        queryset = queryset.filter(**filtres)
+    queryset = queryset.order_by().values(*dimensions).annotate(**mesures)
+    return queryset.order_by(*(ordre or dimensions))
+
+
+def agreger(source, dimensions, mesures, filtres=None, ordre=None):
+    """
+    Regroupe `source` (modèle ou queryset) par `dimensions` et calcule `mesures`.
+
+    Exemple : agreger(Ligne, ['localite__locRegion'], {'quantite': Sum('ligQuantite')})
+    renvoie [{'localite__locRegion': 'Central', 'quantite': 8780}, ...].
+    """
+    return list(requete_agregee(source, dimensions, mesures, filtres, ordre))
+
+
+# Graphiques déclarés : nom -> (source, dimension, mesure)
+GRAPHIQUES = {
+    'quantite_par_region': (AgregatLocalite, 'region', Sum('quantite')),
+}
+
+
+def donnees_graphique(nom, filtres=None):
+    """Renvoie (libellés, valeurs) d'un graphique déclaré dans GRAPHIQUES."""
+    source, dimension, mesure = GRAPHIQUES[nom]
+    with chrono('agregation'):
+        lignes = agreger(source, [dimension], {'valeur': mesure}, filtres)
+    return [ligne[dimension] for ligne in lignes], [ligne['valeur'] for ligne in lignes]
+
+
+# ═══════════════════════════════════════════════════════════════
+# Figures Plotly
+# ═══════════════════════════════════════════════════════════════
+
+_verrou_plotly = threading.Lock()
+_plotly_express = None
+
+
+def plotly_express():
+    """
+    Module plotly.express, importé au premier appel. Le verrou évite que deux
+    threads importent en même temps plotly et pandas (imports circulaires :
+    un thread verrait un module partiellement initialisé).
+    """
+    global _plotly_express
+    if _plotly_express is None:
+        with _verrou_plotly:
+            if _plotly_express is None:
+                import plotly.express
+                _plotly_express = plotly.express
+    return _plotly_express
+
+
+def precharger():
+    """Importe dès maintenant les bibliothèques des figures (processus maître avant fork)."""
+    plotly_express()
+
+
+def camembert_quantite_par_region():
+    """Graphique camembert avec Plotly (une valeur par région, agrégée par la base)"""
+    regions, quantites = donnees_graphique('quantite_par_region')
+    with chrono('figure'):
+        fig = plotly_express().pie(values=quantites, names=regions,
+                     color_discrete_sequence=['#FCC6BB', '#F87C63', '#C82909', '#701705'],
+                     labels={'value': 'Nombre de produits', 'label': 'Région'})
+        fig.update_traces(textposition='inside', textinfo='percent+label', hovertemplate=None,
+                          hoverinfo='skip', showlegend=False)
+    return fig
+
+
+# Figures servies par la vue `graphique` : nom -> fonction de construction
+FIGURES = {
+    'quantite_par_region': camembert_quantite_par_region,
+}
+
+
+def figure_json(nom):
+    """Spécification JSON (data + layout) de la figure `nom`."""
+    figure = FIGURES[nom]()
+    with chrono('serialisation'):
+        return figure.to_json()
+
+
+# ═══════════════════════════════════════════════════════════════
+# Séries temporelles (tendances)
+# ═══════════════════════════════════════════════════════════════
+
+GRANULARITES = {
+    'jour': TruncDay,
+    'semaine': TruncWeek,
+    'mois': TruncMonth,
+    'trimestre': TruncQuarter,
+}
+
+# Filtres acceptés : nom -> valeurs possibles (colonnes de AgregatJour)
+FILTRES_SERIE = {
+    'region': [valeur for valeur, _ in REGION],
+    'segment': [valeur for valeur, _ in SEGMENT],
+    'categorie': [valeur for valeur, _ in CATEGORIE],
+}
+
+
+def parametres_serie(donnees):
+    """
+    Valide les paramètres d'une série (request.GET) et renvoie un dict
+    normalisé, qui sert aussi de clé de cache. Lève ValueError si invalide.
+    """
+    parametres = {'granularite': donnees.get('granularite') or 'mois'}
+    if parametres['granularite'] not in GRANULARITES:
+        raise ValueError(f"Granularité inconnue : {parametres['granularite']}")
+    for borne in ('debut', 'fin'):
+        if donnees.get(borne):
+            parametres[borne] = date.fromisoformat(donnees[borne]).isoformat()
+    for nom, valeurs in FILTRES_SERIE.items():
+        if donnees.get(nom):
+            if donnees[nom] not in valeurs:
+                raise ValueError(f"Valeur inconnue pour {nom} : {donnees[nom]}")
+            parametres[nom] = donnees[nom]
+    return parametres
+
+
+def requete_serie(granularite='mois', debut=None, fin=None, **filtres):
+    """Queryset (non évalué) de `serie_temporelle`."""
+    queryset = AgregatJour.objects.filter(**filtres)
+    if debut:
+        queryset = queryset.filter(jour__gte=debut)
+    if fin:
+        queryset = queryset.filter(jour__lte=fin)
+    queryset = queryset.annotate(periode=GRANULARITES[granularite]('jour'))
+    return requete_agregee(queryset, ['periode'], {
+        'total_ventes': Sum('ventes'),
+        'total_quantite': Sum('quantite'),
+        'total_benefice': Sum('benefice'),
+    })
+
+
+def serie_temporelle(granularite='mois', debut=None, fin=None, **filtres):
+    """
+    Ventes, quantités et bénéfice par période. Le regroupement par période
+    (date_trunc / DATE_FORMAT selon la base) est fait sur AgregatJour, dont la
+    taille ne dépend que du nombre de jours, pas du nombre de lignes.
+    """
+    with chrono('agregation'):
+        return list(requete_serie(granularite, debut, fin, **filtres))
+
+
+def figure_serie(parametres):
+    """Spécification Plotly (JSON) de la série : une courbe par mesure."""
+    lignes = serie_temporelle(**parametres)
+    periodes = [ligne['periode'].isoformat() for ligne in lignes]
+    courbes = [
+        ('Ventes', 'total_ventes', 'y'),
+        ('Bénéfice', 'total_benefice', 'y'),
+        ('Quantité', 'total_quantite', 'y2'),
+    ]
+    return {
+        'data': [
+            {'type': 'scatter', 'mode': 'lines+markers', 'name': nom, 'x': periodes,
+             'y': [float(ligne[mesure] or 0) for ligne in lignes], 'yaxis': axe}
+            for nom, mesure, axe in courbes
+        ],
+        'layout': {
+            'margin': {'t': 30},
+            'legend': {'orientation': 'h'},
+            'yaxis': {'title': {'text': 'Montant'}},
+            'yaxis2': {'title': {'text': 'Quantité'}, 'overlaying': 'y', 'side': 'right'},
+        },
+    }
@@ -0,0 +1,564 @@
+"""
+Chargement en masse des données de ventes dans les tables du dashboard.
+
+Le fichier (CSV ou XLSX) est lu en flux par des générateurs et découpé en lots
+de taille fixe : la mémoire utilisée ne dépend que de la taille d'un lot, pas
+de la taille du fichier. Pour chaque lot, les entités uniques (Localite, Client,
+Produit, Commande) sont insérées avec bulk_create puis les lignes de commande,
+dont les clés étrangères sont résolues sans requête par ligne.
+
+En mode incrémental, les lignes sont rapprochées de la base par la clé
+(commande, produit) : seules les nouvelles lignes sont insérées et seules les
+lignes modifiées sont mises à jour. Un point de reprise (position et empreinte
+du fichier) évite de relire ce qui a déjà été importé.
+"""
+import codecs
+import csv
+import hashlib
+import logging
+import math
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from itertools import islice
+from pathlib import Path
+
+from django.db import connections, transaction
+
+from .models import Client, Localite, Produit, Commande, Ligne, PointReprise
+
+# Journal par défaut des chargeurs (remplirdb leur passe self.stdout.write)
+journal_import = logging.getLogger(__name__)
+
+TAILLE_LOT = 1000
+TAILLE_BLOC = 1 << 20   # 1 Mo, pour les lectures binaires par blocs
+TAILLE_TRANCHE = 64 << 20   # 64 Mo de CSV par tâche en import parallèle
+# Au-delà, les commandes touchées ne sont plus suivies : recalcul complet des agrégats
+COMMANDES_SUIVIES_MAX = 50_000
+
+
+# ═══════════════════════════════════════════════════════════════
+# Conversion des valeurs (CSV français ou cellules Excel)
+# ═══════════════════════════════════════════════════════════════
+
+def nombre(valeur):
+    """Convertit un nombre au format français ('261,96') ou une cellule Excel en float."""
+    if isinstance(valeur, str):
+        return float(valeur.replace(',', '.'))
+    return float(valeur)
+
+
+def jour(valeur):
+    """Convertit une date ISO ('2016-11-08') ou une cellule Excel en date."""
+    if isinstance(valeur, datetime):
+        return valeur.date()
+    if isinstance(valeur, date):
+        return valeur
+    return date.fromisoformat(valeur)
+
+
+# ═══════════════════════════════════════════════════════════════
+# Lecture en flux
+# ═══════════════════════════════════════════════════════════════
+
+def detecter_encodage(chemin):
+    """
+    Renvoie 'utf-8' si tout le fichier se décode en utf-8, sinon 'cp1252'.
+    Le fichier est parcouru par blocs : la mémoire reste constante.
+    """
+    decodeur = codecs.getincrementaldecoder('utf-8')()
+    try:
+        with open(chemin, 'rb') as f:
+            for bloc in iter(lambda: f.read(TAILLE_BLOC), b''):
+                decodeur.decode(bloc)
+            decodeur.decode(b'', final=True)
+    except UnicodeDecodeError:
+        return 'cp1252'
+    return 'utf-8'
+
+
+class LectureCSV:
+    """
+    Itère sur les lignes d'un CSV (dictionnaires) entre deux positions en octets.
+
+    L'en-tête est toujours relu en début de fichier ; `debut` et `fin` doivent
+    tomber sur des débuts de ligne. Pendant la lecture, `position` et
+    `empreinte` (SHA-256) suivent les octets des lignes complètes déjà lues
+    depuis le début du fichier : ils servent de point de reprise pour l'import
+    incrémental. Avec `empreinte=False`, les octets avant `debut` sont sautés
+    sans être relus (import parallèle par tranches).
+    """
+
+    def __init__(self, chemin, debut=0, fin=None, encodage=None, empreinte=True, delimiter=';'):
+        self.chemin = chemin
+        self.debut = debut
+        self.fin = fin
+        self.encodage = encodage
+        self.suivre_empreinte = empreinte
+        self.delimiter = delimiter
+        self.position = 0
+        self.empreinte = hashlib.sha256()
+
+    def __iter__(self):
+        encodage = self.encodage or detecter_encodage(self.chemin)
+        with open(self.chemin, 'rb') as f:
+            entete = f.readline()
+            self._avancer(entete)
+            champs = next(csv.reader(
+                [entete.decode('utf-8-sig' if encodage == 'utf-8' else encodage)],
+                delimiter=self.delimiter,
+            ))
+            if not self.suivre_empreinte and self.debut > self.position:
+                f.seek(self.debut)
+                self.position = self.debut
+            # Les octets déjà importés ne sont pas décodés, seulement ajoutés à l'empreinte.
+            while self.position < self.debut:
+                bloc = f.read(min(TAILLE_BLOC, self.debut - self.position))
+                if not bloc:
+                    break
+                self._avancer(bloc)
+            yield from csv.DictReader(self._lignes(f, encodage), fieldnames=champs,
+                                      delimiter=self.delimiter)
+
+    def _avancer(self, octets):
+        if self.suivre_empreinte:
+            self.empreinte.update(octets)
+        self.position += len(octets)
+
+    def _lignes(self, f, encodage):
+        for ligne in f:
+            if self.fin is not None and self.position >= self.fin:
+                return
+            # Une dernière ligne sans fin de ligne peut être en cours d'écriture :
+            # elle est importée mais ne fait pas avancer le point de reprise.
+            if ligne.endswith(b'\n'):
+                self._avancer(ligne)
+            yield ligne.decode(encodage)
+
+
+def lire_csv(chemin, delimiter=';'):
+    """Génère les lignes du CSV sous forme de dictionnaires."""
+    return iter(LectureCSV(chemin, delimiter=delimiter))
+
+
+def lire_xlsx(chemin):
+    """Génère les lignes de la première feuille du classeur sous forme de dictionnaires."""
+    from openpyxl import load_workbook   # dépendance optionnelle
+
+    classeur = load_workbook(chemin, read_only=True, data_only=True)
+    try:
+        lignes = classeur.worksheets[0].iter_rows(values_only=True)
+        entetes = next(lignes)
+        for valeurs in lignes:
+            if any(v is not None for v in valeurs):
+                yield dict(zip(entetes, valeurs))
+    finally:
+        classeur.close()
+
+
+def lire_fichier(chemin):
+    """Choisit le lecteur selon l'extension du fichier (.csv ou .xlsx)."""
+    extension = Path(chemin).suffix.lower()
+    if extension == '.csv':
+        return lire_csv(chemin)
+    if extension in ('.xlsx', '.xlsm'):
+        return lire_xlsx(chemin)
+    raise ValueError(f"Format non pris en charge : {extension}")
+
+
+Tranche = namedtuple('Tranche', 'chemin debut fin encodage')
+
+
+def partitionner(chemins, taille_tranche=TAILLE_TRANCHE):
+    """
+    Découpe les fichiers en tranches d'environ `taille_tranche` octets, alignées
+    sur les débuts de ligne. Un fichier XLSX forme une seule tranche.
+    """
+    for chemin in chemins:
+        if Path(chemin).suffix.lower() != '.csv':
+            yield Tranche(chemin, 0, None, None)
+            continue
+        encodage = detecter_encodage(chemin)
+        taille = Path(chemin).stat().st_size
+        with open(chemin, 'rb') as f:
+            f.readline()                      # en-tête
+            debut = f.tell()
+            while debut < taille:
+                f.seek(min(debut + taille_tranche, taille))
+                f.readline()                  # aller jusqu'à la fin de la ligne
+                fin = f.tell()
+                yield Tranche(chemin, debut, fin, encodage)
+                debut = fin
+
+
+def lire_tranche(tranche):
+    """Génère les lignes d'une tranche produite par `partitionner`."""
+    if tranche.fin is None:
+        return lire_fichier(tranche.chemin)
+    return iter(LectureCSV(tranche.chemin, tranche.debut, tranche.fin,
+                           encodage=tranche.encodage, empreinte=False))
+
+
+def par_lots(lignes, taille):
+    """Découpe un itérable en listes d'au plus `taille` éléments."""
+    lignes = iter(lignes)
+    while lot := list(islice(lignes, taille)):
+        yield lot
+
+
+# ═══════════════════════════════════════════════════════════════
+# Chargement
+# ═══════════════════════════════════════════════════════════════
+
+class ChargeurVentes:
+    """
+    Insère des lignes de fichier (dictionnaires) dans la base, lot par lot.
+
+    `journal` reçoit les messages de progression (par défaut : le logger
+    dashboard.importation, niveau INFO).
+    """
+
+    def __init__(self, taille_lot=TAILLE_LOT, journal=None):
+        self.taille_lot = taille_lot
+        self.journal = journal or journal_import.info
+        self.lignes_lues = 0
+        self.lignes_creees = 0
+        self.erreurs = 0
+        # Seule Localite a une clé auto-incrémentée : les autres clés étrangères
+        # sont directement les identifiants du fichier. Le nombre de codes
+        # postaux est borné, ce cache ne grossit pas avec le fichier.
+        self.id_localites = {}
+        # Commandes dont des lignes ont été créées ou modifiées (agrégats à mettre
+        # à jour), ou None si elles sont trop nombreuses pour être suivies.
+        self.commandes_modifiees = set()
+
+    def _suivre(self, lignes):
+        if self.commandes_modifiees is None:
+            return
+        self.commandes_modifiees.update(ligne.commande_id for ligne in lignes)
+        if len(self.commandes_modifiees) > COMMANDES_SUIVIES_MAX:
+            self.commandes_modifiees = None
+
+    # -----------------------------------------------------------------
+    # Entités uniques
+    # -----------------------------------------------------------------
+    def _dimensions(self, lot):
+        """Construit les entités uniques du lot (la première occurrence gagne)."""
+        localites, clients, produits, commandes = {}, {}, {}, {}
+        for row in lot:
+            try:
+                code = int(row['Code_postal'])
+                if code not in localites and code not in self.id_localites:
+                    localites[code] = Localite(
+                        locCodePostal=code,
+                        locVille=row['Ville'],
+                        locEtat=row['Etat'],
+                        locRegion=row['Region'],
+                    )
+                if row['ID_Client'] not in clients:
+                    clients[row['ID_Client']] = Client(
+                        cltId=row['ID_Client'],
+                        cltNom=row['Nom_Client'],
+                        cltSegment=row['Segment'],
+                    )
+                if row['ID_Produit'] not in produits:
+                    produits[row['ID_Produit']] = Produit(
+                        prodId=row['ID_Produit'],
+                        prodNom=row['Nom_Produit'],
+                        prodCategorie=row['Categorie'],
+                        prodSousCategorie=row['Sous_Categorie'],
+                    )
+                if row['ID_Commande'] not in commandes:
+                    commandes[row['ID_Commande']] = Commande(
+                        comID=row['ID_Commande'],
+                        comDate=jour(row['Date_Commande']),
+                        comDateLivraison=jour(row['Date_Livraison']),
+                        comModeLivraison=row['Mode_Livraison'],
+                    )
+            except (KeyError, TypeError, ValueError):
+                # La ligne sera comptée en erreur lors de la construction de la Ligne.
+                continue
+        return localites, clients, produits, commandes
+
+    def _inserer_dimensions(self, lot):
+        self._enregistrer_dimensions(*self._dimensions(lot))
+
+    def _enregistrer_dimensions(self, localites, clients, produits, commandes):
+        # ignore_conflicts : les entités déjà en base sont conservées telles quelles,
+        # comme le faisait get_or_create.
+        for modele, objets in ((Localite, localites), (Client, clients),
+                               (Produit, produits), (Commande, commandes)):
+            if objets:
+                modele.objects.bulk_create(objets.values(), batch_size=self.taille_lot,
+                                           ignore_conflicts=True)
+        if localites:
+            self.id_localites.update(
+                Localite.objects.filter(locCodePostal__in=list(localites))
+                .values_list('locCodePostal', 'locId')
+            )
+
+    # -----------------------------------------------------------------
+    # Lignes de commande
+    # -----------------------------------------------------------------
+    def _construire_ligne(self, row):
+        return Ligne(
+            commande_id=row['ID_Commande'],
+            produit_id=row['ID_Produit'],
+            client_id=row['ID_Client'],
+            localite_id=self.id_localites[int(row['Code_postal'])],
+            ligQuantite=int(row['Quantite']),
+            ligPrix=nombre(row['Ventes']),
+            ligRemise=nombre(row['Remise']),
+            ligBenefice=nombre(row['Benefice']),
+        )
+
+    def _inserer_lignes(self, lot):
+        objets = []
+        for numero, row in enumerate(lot, start=self.lignes_lues + 2):   # ligne 1 = en-tête
+            try:
+                objets.append(self._construire_ligne(row))
+            except (KeyError, TypeError, ValueError) as e:
+                self.journal(f"Erreur ligne {numero} : {e!r}")
+                self.erreurs += 1
+        Ligne.objects.bulk_create(objets, batch_size=self.taille_lot)
+        self._suivre(objets)
+        self.lignes_creees += len(objets)
+
+    def charger(self, lignes):
+        """
+        Charge un itérable de lignes, un lot (et une transaction) à la fois.
+        Un échec n'annule que le lot en cours.
+        """
+        debut = time.perf_counter()
+        for lot in par_lots(lignes, self.taille_lot):
+            with transaction.atomic():
+                self._inserer_dimensions(lot)
+                self._inserer_lignes(lot)
+            self.lignes_lues += len(lot)
+            duree = time.perf_counter() - debut
+            debit = self.lignes_lues / duree if duree else 0
+            self.journal(f"{self.lignes_lues} lignes traitées, "
+                         f"{self.lignes_creees} insérées ({debit:.0f} lignes/s)")
+        return self.lignes_creees
+
+
+class ChargeurIncremental(ChargeurVentes):
+    """
+    Variante idempotente : chaque ligne du fichier est rapprochée de la base par
+    la clé (commande, produit). Si une commande contient plusieurs fois le même
+    produit, les occurrences sont appariées dans l'ordre du fichier et des id.
+    """
+
+    CHAMPS = ('client_id', 'localite_id', 'ligQuantite', 'ligPrix', 'ligRemise', 'ligBenefice')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lignes_modifiees = 0
+        self.lignes_inchangees = 0
+        self.derniere_date = None
+        # Lignes appariées au lot précédent : une commande peut chevaucher deux lots.
+        self._apparies = set()
+
+    def _existantes(self, lot):
+        commandes = {row['ID_Commande'] for row in lot}
+        existantes = {}
+        for ligne in (Ligne.objects.filter(commande_id__in=commandes)
+                      .exclude(id__in=self._apparies).order_by('id')
+                      .only('id', 'commande_id', 'produit_id', *self.CHAMPS)):
+            existantes.setdefault((ligne.commande_id, ligne.produit_id), []).append(ligne)
+        return existantes
+
+    def _inserer_lignes(self, lot):
+        existantes = self._existantes(lot)
+        nouvelles, modifiees, apparies = [], [], set()
+        for numero, row in enumerate(lot, start=self.lignes_lues + 2):   # ligne 1 = en-tête
+            try:
+                ligne = self._construire_ligne(row)
+                date_commande = jour(row['Date_Commande'])
+            except (KeyError, TypeError, ValueError) as e:
+                self.journal(f"Erreur ligne {numero} : {e!r}")
+                self.erreurs += 1
+                continue
+            if self.derniere_date is None or date_commande > self.derniere_date:
+                self.derniere_date = date_commande
+
+            candidates = existantes.get((ligne.commande_id, ligne.produit_id))
+            if not candidates:
+                nouvelles.append(ligne)
+                continue
+            existante = candidates.pop(0)
+            apparies.add(existante.id)
+            if any(_differe(getattr(existante, c), getattr(ligne, c)) for c in self.CHAMPS):
+                for champ in self.CHAMPS:
+                    setattr(existante, champ, getattr(ligne, champ))
+                modifiees.append(existante)
+            else:
+                self.lignes_inchangees += 1
+
+        Ligne.objects.bulk_create(nouvelles, batch_size=self.taille_lot)
+        Ligne.objects.bulk_update(modifiees, self.CHAMPS, batch_size=self.taille_lot)
+        self._suivre(nouvelles)
+        self._suivre(modifiees)
+        self.lignes_creees += len(nouvelles)
+        self.lignes_modifiees += len(modifiees)
+        self._apparies = apparies
+
+
+def _differe(ancienne, nouvelle):
+    # Les cellules Excel donnent 731.9399999999999 là où le CSV donne 731,94.
+    if isinstance(nouvelle, float):
+        return not math.isclose(ancienne, nouvelle, rel_tol=1e-9, abs_tol=1e-9)
+    return ancienne != nouvelle
+
+
+def empreinte_fichier(chemin, taille=None):
+    """SHA-256 des `taille` premiers octets du fichier (tout le fichier par défaut)."""
+    empreinte = hashlib.sha256()
+    with open(chemin, 'rb') as f:
+        reste = taille
+        while reste is None or reste > 0:
+            bloc = f.read(TAILLE_BLOC if reste is None else min(TAILLE_BLOC, reste))
+            if not bloc:
+                break
+            empreinte.update(bloc)
+            if reste is not None:
+                reste -= len(bloc)
+    return empreinte.hexdigest()
+
+
+def importer_incremental(chemin, taille_lot=TAILLE_LOT, journal=None):
+    """
+    Importe `chemin` en mode incrémental et met à jour son point de reprise.
+
+    - CSV : si le début du fichier correspond à l'empreinte enregistrée, seuls
+      les octets ajoutés depuis la position enregistrée sont lus ; sinon tout
+      le fichier est rapproché de la base.
+    - XLSX : le fichier est ignoré si son empreinte n'a pas changé, sinon il
+      est entièrement rapproché.
+    """
+    fichier = str(Path(chemin).resolve())
+    reprise = PointReprise.objects.filter(fichier=fichier).first()
+    chargeur = ChargeurIncremental(taille_lot=taille_lot, journal=journal)
+    journal = chargeur.journal
+    taille = Path(chemin).stat().st_size
+
+    if Path(chemin).suffix.lower() == '.csv':
+        debut = 0
+        if reprise and reprise.position <= taille \
+                and empreinte_fichier(chemin, reprise.position) == reprise.empreinte:
+            debut = reprise.position
+            journal(f"Reprise à l'octet {debut} ({taille - debut} octets nouveaux)")
+        else:
+            journal("Pas de point de reprise valide : rapprochement de tout le fichier")
+        if debut < taille:
+            lecture = LectureCSV(chemin, debut=debut)
+            chargeur.charger(lecture)
+            position, empreinte = lecture.position, lecture.empreinte.hexdigest()
+        else:
+            journal("Aucune nouvelle ligne depuis le dernier import")
+            position, empreinte = debut, empreinte_fichier(chemin, debut)
+    else:
+        position, empreinte = 0, empreinte_fichier(chemin)
+        if reprise and reprise.empreinte == empreinte:
+            journal("Fichier inchangé depuis le dernier import")
+        else:
+            chargeur.charger(lire_fichier(chemin))
+
+    derniere_date = max(filter(None, (chargeur.derniere_date, reprise and reprise.derniere_date)),
+                        default=None)
+    PointReprise.objects.update_or_create(
+        fichier=fichier,
+        defaults={'empreinte': empreinte, 'position': position, 'derniere_date': derniere_date},
+    )
+    return chargeur
+
+
+# ═══════════════════════════════════════════════════════════════
+# Import parallèle
+# ═══════════════════════════════════════════════════════════════
+
+class ChargeurLignes(ChargeurVentes):
+    """Chargeur des processus de travail : les entités uniques sont déjà en base."""
+
+    def _inserer_dimensions(self, lot):
+        pass
+
+
+def _initialiser_processus():
+    # Avec la méthode "spawn" (macOS, Windows), Django n'est pas encore configuré.
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def _extraire_dimensions(tranche, taille_lot):
+    chargeur = ChargeurVentes(taille_lot=taille_lot)
+    dimensions = ({}, {}, {}, {})
+    for lot in par_lots(lire_tranche(tranche), taille_lot):
+        for total, partiel in zip(dimensions, chargeur._dimensions(lot)):
+            for cle, objet in partiel.items():
+                total.setdefault(cle, objet)
+    return dimensions
+
+
+def _charger_tranche(tranche, taille_lot, id_localites):
+    # Les messages sont renvoyés au processus principal, qui les écrit dans son journal
+    prefixe = f"[{Path(tranche.chemin).name}@{tranche.debut}] "
+    messages = []
+    chargeur = ChargeurLignes(taille_lot=taille_lot, journal=lambda m: messages.append(prefixe + m))
+    chargeur.id_localites = id_localites
+    chargeur.charger(lire_tranche(tranche))
+    connections.close_all()
+    return chargeur.lignes_lues, chargeur.lignes_creees, chargeur.erreurs, messages
+
+
+def importer_en_parallele(chemins, processus, taille_lot=TAILLE_LOT,
+                          taille_tranche=TAILLE_TRANCHE, journal=None):
+    """
+    Importe plusieurs fichiers (ou un gros CSV découpé en tranches) avec un pool
+    de `processus` processus.
+
+    1. Les processus extraient les entités uniques de chaque tranche ; elles sont
+       fusionnées puis insérées une seule fois par le processus principal, ce qui
+       évite les conflits de clés primaires entre processus.
+    2. Les processus insèrent ensuite les lignes de commande de leurs tranches,
+       par lots, avec la table des localités résolue.
+    """
+    tranches = list(partitionner(chemins, taille_tranche))
+    bilan = ChargeurVentes(taille_lot=taille_lot, journal=journal)
+    journal = bilan.journal
+    # Les lignes sont insérées par les processus : agrégats à recalculer entièrement
+    bilan.commandes_modifiees = None
+    journal(f"{len(tranches)} tranches réparties sur {processus} processus")
+
+    # Les processus fils ne doivent pas hériter des connexions ouvertes du parent.
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=processus, initializer=_initialiser_processus) as pool:
+        debut = time.perf_counter()
+        dimensions = ({}, {}, {}, {})
+        for partiels in pool.map(_extraire_dimensions, tranches, [taille_lot] * len(tranches)):
+            for total, partiel in zip(dimensions, partiels):
+                for cle, objet in partiel.items():
+                    total.setdefault(cle, objet)
+        with transaction.atomic():
+            bilan._enregistrer_dimensions(*dimensions)
+        journal(f"Entités uniques enregistrées en {time.perf_counter() - debut:.1f} s")
+
+        id_localites = dict(Localite.objects.values_list('locCodePostal', 'locId'))
+        connections.close_all()
+        debut = time.perf_counter()
+        taches = [pool.submit(_charger_tranche, tranche, taille_lot, id_localites)
+                  for tranche in tranches]
+        for tache in taches:
+            lues, creees, erreurs, messages = tache.result()
+            for message in messages:
+                journal(message)
+            bilan.lignes_lues += lues
+            bilan.lignes_creees += creees
+            bilan.erreurs += erreurs
+        duree = time.perf_counter() - debut
+        debit = bilan.lignes_lues / duree if duree else 0
+        journal(f"{bilan.lignes_lues} lignes traitées en {duree:.1f} s ({debit:.0f} lignes/s)")
+    return bilan
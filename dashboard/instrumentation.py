@@ -0,0 +1,170 @@
+"""
+Mesure des performances par requête.
+
+`InstrumentationMiddleware` compte les requêtes SQL et leur durée, mesure la
+durée totale et la taille de la réponse, et recueille les sections chronométrées
+avec `chrono('nom')` dans le code (agrégation, figure, sérialisation, rendu).
+Chaque mesure est :
+  - envoyée dans l'en-tête `Server-Timing` (visible dans l'onglet Réseau du
+    navigateur) si DASHBOARD_SERVER_TIMING est actif ;
+  - écrite dans le journal `dashboard.performances` (une ligne JSON) ;
+  - gardée en mémoire (dernières MESURES_MAX par vue) pour la page
+    d'administration des percentiles. Ces statistiques sont propres à chaque
+    processus du serveur.
+"""
+import json
+import logging
+import statistics
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+MESURES_MAX = 1000
+
+journal = logging.getLogger('dashboard.performances')
+
+_mesure_courante = ContextVar('mesure_courante', default=None)
+_historique = defaultdict(lambda: deque(maxlen=MESURES_MAX))
+
+
+class Mesure:
+    """Mesures d'une requête HTTP."""
+
+    def __init__(self):
+        self.debut = time.perf_counter()
+        self.nb_requetes_sql = 0
+        self.duree_sql = 0.0
+        self.sections = defaultdict(float)
+
+    def __call__(self, execute, sql, params, many, context):
+        # Enveloppe d'exécution SQL (connection.execute_wrapper)
+        debut = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.nb_requetes_sql += 1
+            self.duree_sql += time.perf_counter() - debut
+
+
+@contextmanager
+def chrono(nom):
+    """Chronomètre une section de code de la requête en cours (sans effet hors requête)."""
+    mesure = _mesure_courante.get()
+    if mesure is None:
+        yield
+        return
+    debut = time.perf_counter()
+    try:
+        yield
+    finally:
+        mesure.sections[nom] += time.perf_counter() - debut
+
+
+def _server_timing(resultat):
+    elements = [f'sql;dur={resultat["sql_ms"]:.1f};desc="{resultat["sql"]} requetes"']
+    elements += [f'{nom};dur={duree:.1f}' for nom, duree in resultat['sections'].items()]
+    elements.append(f'total;dur={resultat["total_ms"]:.1f}')
+    return ', '.join(elements)
+
+
+@contextmanager
+def _enveloppes_sql(mesure):
+    """Compte les requêtes SQL de toutes les bases pendant le bloc."""
+    with ExitStack() as pile:
+        for connexion in connections.all():
+            pile.enter_context(connexion.execute_wrapper(mesure))
+        yield
+
+
+class InstrumentationMiddleware:
+    """
+    Mesure chaque requête ; à placer en tête de MIDDLEWARE pour tout inclure.
+    Synchrone ou asynchrone selon la chaîne : sous ASGI, pas de passage par un
+    thread pour ce middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        mesure = Mesure()
+        jeton = _mesure_courante.set(mesure)
+        try:
+            with _enveloppes_sql(mesure):
+                response = self.get_response(request)
+        finally:
+            _mesure_courante.reset(jeton)
+        return self._enregistrer(request, response, mesure)
+
+    async def __acall__(self, request):
+        mesure = Mesure()
+        jeton = _mesure_courante.set(mesure)
+        try:
+            with _enveloppes_sql(mesure):
+                response = await self.get_response(request)
+        finally:
+            _mesure_courante.reset(jeton)
+        return self._enregistrer(request, response, mesure)
+
+    @staticmethod
+    def _enregistrer(request, response, mesure):
+        match = request.resolver_match
+        if match is None:
+            return response
+        resultat = {
+            'vue': match.view_name,
+            'statut': response.status_code,
+            'total_ms': (time.perf_counter() - mesure.debut) * 1000,
+            'sql': mesure.nb_requetes_sql,
+            'sql_ms': mesure.duree_sql * 1000,
+            'sections': {nom: duree * 1000 for nom, duree in mesure.sections.items()},
+            # Réponses en flux : taille inconnue tant que l'envoi n'est pas terminé
+            'taille': None if response.streaming else len(response.content),
+        }
+        _historique[resultat['vue']].append(resultat)
+        journal.info(json.dumps(resultat, ensure_ascii=False))
+        if getattr(settings, 'DASHBOARD_SERVER_TIMING', settings.DEBUG):
+            response['Server-Timing'] = _server_timing(resultat)
+        return response
+
+
+def _centile(valeurs, rang):
+    if len(valeurs) == 1:
+        return valeurs[0]
+    return statistics.quantiles(valeurs, n=100, method='inclusive')[rang - 1]
+
+
+def statistiques():
+    """Percentiles par vue sur les dernières mesures de ce processus."""
+    lignes = []
+    for vue, mesures in sorted(_historique.items()):
+        mesures = list(mesures)
+        totaux = [m['total_ms'] for m in mesures]
+        tailles = [m['taille'] for m in mesures if m['taille'] is not None]
+        sections = defaultdict(list)
+        for m in mesures:
+            for nom, duree in m['sections'].items():
+                sections[nom].append(duree)
+        lignes.append({
+            'vue': vue,
+            'nombre': len(mesures),
+            'p50_ms': _centile(totaux, 50),
+            'p95_ms': _centile(totaux, 95),
+            'p99_ms': _centile(totaux, 99),
+            'sql_moyen': statistics.mean(m['sql'] for m in mesures),
+            'sql_ms_moyen': statistics.mean(m['sql_ms'] for m in mesures),
+            'sections_p50_ms': {nom: _centile(durees, 50) for nom, durees in sorted(sections.items())},
+            'taille_moyenne': statistics.mean(tailles) if tailles else None,
+        })
+    return lignes
@@ -0,0 +1,220 @@
+import io
+import json
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+from tempfile import gettempdir
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client as ClientHTTP
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from dashboard.agregats import rafraichir_agregats
+from dashboard.instrumentation import Mesure
+from dashboard.synthetique import GenerateurVentes, ecrire_csv
+
+# Créée sur la machine de référence avec --enregistrer (voir DEPLOYMENT.md) ;
+# les mesures dépendent de la machine, le fichier n'est donc pas fourni.
+REFERENCE_DEFAUT = "DjangoProject/data/bench_reference.json"
+
+# Vue mesurée : nom de l'URL, arguments, paramètres GET
+VUES = {
+    'dashboard_1': ('dashboard:dashboard_1', [], {}),
+    'dashboard_2': ('dashboard:dashboard_2', [], {}),
+    'graphique_region': ('dashboard:graphique', ['quantite_par_region'], {}),
+    'tendances_mois': ('dashboard:tendances_donnees', [], {'granularite': 'mois'}),
+    'olap_region_segment': ('dashboard:olap', [], {'dimensions': 'region,segment',
+                                                   'mesures': 'ventes:sum,quantite:avg'}),
+    'liste_segment': ('dashboard:segmentliste_donnees', ['Consumer'],
+                      {'draw': 1, 'start': 0, 'length': 25, 'search[value]': 'Chair'}),
+    # Export en flux : seul le premier lot est lu (temps avant le premier octet)
+    'export_csv': ('dashboard:export_lignes', ['csv'], {'segment': 'Consumer'}),
+}
+
+# En dessous de cet écart, une variation de durée est considérée comme du bruit
+BRUIT_MS = 5
+
+
+def lire_references(chemin):
+    """Références enregistrées : {base: {taille: mesures}} ({} si le fichier n'existe pas)."""
+    chemin = Path(chemin)
+    return json.loads(chemin.read_text()) if chemin.exists() else {}
+
+
+def enregistrer_reference(chemin, vendor, resultats):
+    """Remplace la référence de la base `vendor` ; celles des autres bases sont conservées."""
+    chemin = Path(chemin)
+    references = lire_references(chemin)
+    references[vendor] = resultats
+    chemin.parent.mkdir(parents=True, exist_ok=True)
+    chemin.write_text(json.dumps(references, indent=2, sort_keys=True) + '\n')
+
+
+class Command(BaseCommand):
+    help = ("Benchmark des dashboards sur des données synthétiques de tailles croissantes : débit "
+            "d'import, puis latence (cache vide et cache chaud), nombre de requêtes SQL et pic "
+            "mémoire de chaque vue. Les mesures sont faites dans une base dédiée (celle des tests), "
+            "et comparées à une référence enregistrée.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tailles', type=int, nargs='+', default=[10_000, 1_000_000, 10_000_000],
+                            help='Nombres de lignes de commande')
+        parser.add_argument('--repetitions', type=int, default=5)
+        parser.add_argument('--graine', type=int, default=0)
+        parser.add_argument('--dossier', default=gettempdir(),
+                            help='Dossier des fichiers générés (réutilisés d\'une exécution à l\'autre)')
+        parser.add_argument('--reference', default=REFERENCE_DEFAUT,
+                            help=f'Mesures de référence (défaut : {REFERENCE_DEFAUT})')
+        parser.add_argument('--enregistrer', action='store_true',
+                            help='Enregistre ces mesures comme nouvelle référence pour cette base')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Dégradation relative tolérée par rapport à la référence (défaut : 0.25)')
+        parser.add_argument('--garder-base', action='store_true',
+                            help='Conserve la base de benchmark (et ses données) après la mesure')
+
+    def handle(self, *args, **options):
+        dossier = Path(options['dossier'])
+        dossier.mkdir(parents=True, exist_ok=True)
+        fichiers = {taille: self._fichier(dossier, taille, options['graine'])
+                    for taille in sorted(options['tailles'])}
+
+        vendor = connection.vendor
+        if vendor == 'sqlite' and not connection.settings_dict['TEST']['NAME']:
+            # La base de test SQLite est en mémoire par défaut : trop petite pour 10M de lignes
+            connection.settings_dict['TEST']['NAME'] = str(dossier / 'bench_dashboard.sqlite3')
+        # DEBUG désactivé comme en production (et connection.queries ne se remplit pas pendant l'import)
+        setup_test_environment(debug=False)
+        nom_original = connection.creation.create_test_db(verbosity=0, autoclobber=True,
+                                                          keepdb=options['garder_base'])
+        try:
+            resultats = {str(taille): self._mesurer(chemin, options['repetitions'])
+                         for taille, chemin in fichiers.items()}
+        finally:
+            connection.creation.destroy_test_db(nom_original, verbosity=0, keepdb=options['garder_base'])
+            teardown_test_environment()
+
+        chemin_reference = Path(options['reference'])
+        if options['enregistrer']:
+            enregistrer_reference(chemin_reference, vendor, resultats)
+            self.stdout.write(self.style.SUCCESS(f"Référence {vendor} enregistrée dans {chemin_reference}"))
+            return
+
+        references = lire_references(chemin_reference)
+        regressions = list(self._regressions(references.get(vendor, {}), resultats, options['tolerance']))
+        if vendor not in references:
+            self.stdout.write(self.style.WARNING(f"Pas de référence {vendor} dans {chemin_reference} "
+                                                 f"(--enregistrer pour la créer)"))
+        for regression in regressions:
+            self.stdout.write(self.style.ERROR(regression))
+        if regressions:
+            raise CommandError(f"{len(regressions)} régression(s) par rapport à la référence")
+        self.stdout.write(self.style.SUCCESS("Aucune régression."))
+
+    def _fichier(self, dossier, taille, graine):
+        chemin = dossier / f"ventes_synthetiques_{taille}_{graine}.csv"
+        if not chemin.exists():
+            self.stdout.write(f"Génération de {chemin}...")
+            ecrire_csv(chemin, GenerateurVentes(graine=graine).lignes(taille))
+        return chemin
+
+    # -----------------------------------------------------------------
+    # Mesures
+    # -----------------------------------------------------------------
+    def _mesurer(self, chemin, repetitions):
+        call_command('flush', interactive=False, verbosity=0)
+        debut = time.perf_counter()
+        call_command('remplirdb', str(chemin), '--sans-agregats', '--taille-lot', '5000', stdout=io.StringIO())
+        duree_import = time.perf_counter() - debut
+        debut = time.perf_counter()
+        rafraichir_agregats()
+        duree_agregats = time.perf_counter() - debut
+
+        with open(chemin, encoding='utf-8') as f:
+            nb_lignes = sum(1 for _ in f) - 1
+        resultat = {
+            'import_lignes_s': round(nb_lignes / duree_import),
+            'agregats_s': round(duree_agregats, 2),
+            'vues': {},
+        }
+        self.stdout.write(f"\n{nb_lignes} lignes : import {resultat['import_lignes_s']} lignes/s, "
+                          f"agrégats {duree_agregats:.1f} s")
+        self.stdout.write(f"{'vue':<22} | {'froid (ms)':>10} | {'chaud (ms)':>10} | {'SQL':>4} | "
+                          f"{'mémoire (Ko)':>12}")
+
+        utilisateur = User.objects.create_superuser('bench', password=None)
+        client = ClientHTTP()
+        client.force_login(utilisateur)
+        for nom, (url, arguments, parametres) in VUES.items():
+            url = reverse(url, args=arguments)
+            mesure = self._mesurer_vue(client, url, parametres, repetitions)
+            resultat['vues'][nom] = mesure
+            self.stdout.write(f"{nom:<22} | {mesure['froid_ms']:>10.1f} | {mesure['chaud_ms']:>10.1f} | "
+                              f"{mesure['requetes']:>4} | {mesure['memoire_ko']:>12}")
+        return resultat
+
+    def _mesurer_vue(self, client, url, parametres, repetitions):
+        def requete():
+            reponse = client.get(url, parametres)
+            if reponse.status_code != 200:
+                raise CommandError(f"{url} : statut {reponse.status_code}")
+            if reponse.streaming:
+                next(iter(reponse.streaming_content), b'')
+            reponse.close()
+
+        def chrono(vider_cache):
+            durees = []
+            for _ in range(repetitions):
+                if vider_cache:
+                    cache.clear()
+                debut = time.perf_counter()
+                requete()
+                durees.append((time.perf_counter() - debut) * 1000)
+            return round(statistics.median(durees), 1)
+
+        froid = chrono(vider_cache=True)
+        chaud = chrono(vider_cache=False)
+
+        cache.clear()
+        requetes = Mesure()
+        with connection.execute_wrapper(requetes):
+            requete()
+        cache.clear()
+        tracemalloc.start()
+        try:
+            requete()
+            pic = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return {'froid_ms': froid, 'chaud_ms': chaud, 'requetes': requetes.nb_requetes_sql,
+                'memoire_ko': pic // 1024}
+
+    # -----------------------------------------------------------------
+    # Comparaison à la référence
+    # -----------------------------------------------------------------
+    @staticmethod
+    def _regressions(reference, resultats, tolerance):
+        for taille, resultat in resultats.items():
+            if taille not in reference:
+                continue
+            attendu = reference[taille]
+            if resultat['import_lignes_s'] * (1 + tolerance) < attendu['import_lignes_s']:
+                yield (f"{taille} lignes : import {resultat['import_lignes_s']} lignes/s "
+                       f"(référence {attendu['import_lignes_s']})")
+            for vue, mesure in resultat['vues'].items():
+                if vue not in attendu['vues']:
+                    continue
+                ref = attendu['vues'][vue]
+                if mesure['requetes'] > ref['requetes']:
+                    yield f"{taille} lignes, {vue} : {mesure['requetes']} requêtes SQL (référence {ref['requetes']})"
+                for cle in ('froid_ms', 'chaud_ms'):
+                    if mesure[cle] > ref[cle] * (1 + tolerance) + BRUIT_MS:
+                        yield f"{taille} lignes, {vue} : {cle} = {mesure[cle]} (référence {ref[cle]})"
+                if mesure['memoire_ko'] > ref['memoire_ko'] * (1 + tolerance):
+                    yield (f"{taille} lignes, {vue} : {mesure['memoire_ko']} Ko de mémoire "
+                           f"(référence {ref['memoire_ko']})")
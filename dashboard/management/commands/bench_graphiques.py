@@ -0,0 +1,68 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Sum
+
+from dashboard.agregats import rafraichir_agregats
+from dashboard.graphiques import agreger, donnees_graphique, serie_temporelle
+from dashboard.models import Ligne
+
+
+def chronometrer(fonction, repetitions):
+    """Durée médiane d'un appel, en millisecondes."""
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        durees.append((time.perf_counter() - debut) * 1000)
+    return statistics.median(durees)
+
+
+class Command(BaseCommand):
+    help = ('Mesure le temps de calcul des données du graphique par région et de la série '
+            'mensuelle quand la table Ligne grossit (les lignes ajoutées sont annulées à la fin)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tailles', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+            help='Nombres de lignes de commande à mesurer',
+        )
+        parser.add_argument('--repetitions', type=int, default=20)
+
+    def handle(self, *args, **options):
+        modeles = list(Ligne.objects.order_by('id')[:1000])
+        if not modeles:
+            raise CommandError("La table Ligne est vide : lancez d'abord remplirdb.")
+
+        self.stdout.write(f"{'lignes':>10} | {'agrégats (ms)':>14} | {'série mensuelle (ms)':>20} | "
+                          f"{'GROUP BY Ligne (ms)':>20}")
+        with transaction.atomic():
+            for taille in sorted(options['tailles']):
+                self._grossir(modeles, taille)
+                rafraichir_agregats()
+                agregats = chronometrer(lambda: donnees_graphique('quantite_par_region'),
+                                        options['repetitions'])
+                serie = chronometrer(lambda: serie_temporelle('mois'), options['repetitions'])
+                direct = chronometrer(
+                    lambda: agreger(Ligne, ['localite__locRegion'], {'valeur': Sum('ligQuantite')}),
+                    max(1, options['repetitions'] // 5),
+                )
+                self.stdout.write(f"{Ligne.objects.count():>10} | {agregats:>14.2f} | {serie:>20.2f} | "
+                                  f"{direct:>20.2f}")
+            # Les lignes ajoutées et les agrégats recalculés sont annulés.
+            transaction.set_rollback(True)
+
+    def _grossir(self, modeles, taille):
+        """Duplique des lignes existantes jusqu'à atteindre `taille` lignes."""
+        manquantes = taille - Ligne.objects.count()
+        while manquantes > 0:
+            lot = [
+                Ligne(commande_id=m.commande_id, produit_id=m.produit_id, client_id=m.client_id,
+                      localite_id=m.localite_id, ligQuantite=m.ligQuantite, ligPrix=m.ligPrix,
+                      ligRemise=m.ligRemise, ligBenefice=m.ligBenefice)
+                for m in modeles[:manquantes]
+            ]
+            Ligne.objects.bulk_create(lot)
+            manquantes -= len(lot)
@@ -0,0 +1,69 @@
+import os
+import re
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Démarrage d'un worker : configuration, application WSGI (middlewares) et URLs (vues)
+DEMARRAGE = (
+    "import django; django.setup(); "
+    "from django.core.wsgi import get_wsgi_application; get_wsgi_application(); "
+    "from importlib import import_module; from django.conf import settings; "
+    "import_module(settings.ROOT_URLCONF)"
+)
+
+# Bibliothèques qui ne doivent être importées qu'à la première utilisation
+INTERDITS = ('plotly', 'pandas', 'numpy', 'pyarrow', 'openpyxl')
+
+LIGNE_IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def mesurer_imports():
+    """
+    Lance le démarrage dans un nouveau processus avec `python -X importtime`.
+    Renvoie (durée totale en ms, [(module, durée cumulée en ms)] des imports de premier
+    niveau, noms de tous les modules importés).
+    """
+    resultat = subprocess.run([sys.executable, '-X', 'importtime', '-c', DEMARRAGE],
+                              capture_output=True, text=True, env=os.environ.copy())
+    if resultat.returncode != 0:
+        raise CommandError(f"Échec du démarrage :\n{resultat.stderr[-2000:]}")
+    total, premiers, modules = 0, [], set()
+    for ligne in resultat.stderr.splitlines():
+        correspondance = LIGNE_IMPORTTIME.match(ligne)
+        if correspondance is None:
+            continue
+        propre, cumule, retrait, module = correspondance.groups()
+        total += int(propre)
+        modules.add(module)
+        if len(retrait) == 1:
+            premiers.append((module, int(cumule) / 1000))
+    return total / 1000, premiers, modules
+
+
+class Command(BaseCommand):
+    help = ("Mesure le temps d'import au démarrage d'un worker (python -X importtime) et échoue "
+            "s'il dépasse le budget ou si une bibliothèque lourde (plotly, pandas...) est importée.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget', type=float, default=500,
+                            help="Temps d'import maximal en millisecondes (défaut : 500)")
+        parser.add_argument('--repetitions', type=int, default=3,
+                            help='Mesures répétées : la plus rapide est retenue (cache disque chaud)')
+        parser.add_argument('--top', type=int, default=10, help='Imports les plus coûteux à afficher')
+
+    def handle(self, *args, **options):
+        total, premiers, modules = min((mesurer_imports() for _ in range(options['repetitions'])),
+                                       key=lambda mesure: mesure[0])
+
+        self.stdout.write(f"Imports au démarrage : {total:.0f} ms (budget {options['budget']:.0f} ms)")
+        for module, duree in sorted(premiers, key=lambda p: -p[1])[:options['top']]:
+            self.stdout.write(f"   {duree:>8.1f} ms  {module}")
+
+        interdits = sorted(module for module in modules if module in INTERDITS)
+        if interdits:
+            raise CommandError(f"Bibliothèques importées au démarrage : {', '.join(interdits)}")
+        if total > options['budget']:
+            raise CommandError(f"Budget d'import dépassé : {total:.0f} ms > {options['budget']:.0f} ms")
+        self.stdout.write(self.style.SUCCESS("Budget d'import respecté."))
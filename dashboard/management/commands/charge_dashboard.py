@@ -0,0 +1,130 @@
+import asyncio
+import io
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+
+from dashboard.pool import statistiques_pools
+
+HOTE = 'localhost'
+
+
+def cookie_session(utilisateur):
+    """Crée une session connectée pour `utilisateur` et renvoie l'en-tête Cookie."""
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = str(utilisateur.pk)
+    session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+    session[HASH_SESSION_KEY] = utilisateur.get_session_auth_hash()
+    session.save()
+    return f'{settings.SESSION_COOKIE_NAME}={session.session_key}'
+
+
+def resume(durees, total):
+    """Débit (requêtes/s) et latences p50/p95 en millisecondes."""
+    centiles = statistics.quantiles(durees, n=100) if len(durees) > 1 else durees * 99
+    return len(durees) / total, centiles[49] * 1000, centiles[94] * 1000
+
+
+class Command(BaseCommand):
+    help = ("Test de charge en processus : même nombre de requêtes concurrentes servies par le "
+            "gestionnaire WSGI (un thread par requête) puis par le gestionnaire ASGI (une seule "
+            "boucle d'événements). Les vues utilisées dépendent de DASHBOARD_ASYNC ; à relancer "
+            "avec DB_POOL=True / DB_CONN_MAX_AGE pour comparer la réutilisation des connexions.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--urls', nargs='+',
+                            default=['/dashboard/', '/dashboard/dashbord_2/',
+                                     '/dashboard/graphique/quantite_par_region/'])
+        parser.add_argument('--requetes', type=int, default=200, help="Requêtes par URL et par mode")
+        parser.add_argument('--concurrence', type=int, default=20)
+        parser.add_argument('--utilisateur', help="Nom d'utilisateur (défaut : premier superuser)")
+
+    def handle(self, *args, **options):
+        utilisateurs = User.objects.filter(is_active=True)
+        utilisateur = (utilisateurs.filter(username=options['utilisateur']) if options['utilisateur']
+                       else utilisateurs.filter(is_superuser=True)).first()
+        if utilisateur is None:
+            self.stdout.write(self.style.ERROR("Aucun utilisateur pour se connecter (--utilisateur)"))
+            return
+        cookie = cookie_session(utilisateur)
+
+        self.stdout.write(f"Vues {'async' if getattr(settings, 'DASHBOARD_ASYNC', False) else 'synchrones'}, "
+                          f"{options['requetes']} requêtes par URL, concurrence {options['concurrence']}")
+        self.stdout.write(f"{'url':<45} | {'mode':<4} | {'req/s':>8} | {'p50 (ms)':>9} | {'p95 (ms)':>9}")
+        for url in options['urls']:
+            for mode, mesurer in (('WSGI', self._wsgi), ('ASGI', self._asgi)):
+                # Échauffement : imports, cache des graphiques et connexions avant la mesure
+                mesurer(url, cookie, 1, 1)
+                debut = time.perf_counter()
+                durees, statuts = mesurer(url, cookie, options['requetes'], options['concurrence'])
+                debit, p50, p95 = resume(durees, time.perf_counter() - debut)
+                ligne = f"{url:<45} | {mode:<4} | {debit:>8.1f} | {p50:>9.1f} | {p95:>9.1f}"
+                if statuts != {200}:
+                    ligne += f"  statuts : {sorted(statuts)}"
+                self.stdout.write(ligne)
+
+        for pool in statistiques_pools():
+            self.stdout.write(f"Pool {pool['pool']} : {pool['creees']} connexions créées, "
+                              f"{pool['reutilisees']} réutilisées, {pool['attentes']} attentes "
+                              f"({pool['attente_ms']} ms), {pool['delais_depasses']} délais dépassés")
+
+    def _wsgi(self, url, cookie, requetes, concurrence):
+        handler = WSGIHandler()
+        chemin, _, query = url.partition('?')
+
+        def requete(_):
+            environ = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': chemin, 'QUERY_STRING': query,
+                'SERVER_NAME': HOTE, 'SERVER_PORT': '80', 'HTTP_HOST': HOTE, 'HTTP_COOKIE': cookie,
+                'wsgi.input': io.BytesIO(), 'wsgi.url_scheme': 'http', 'wsgi.errors': io.StringIO(),
+            }
+            statut = []
+            debut = time.perf_counter()
+            corps = handler(environ, lambda s, entetes: statut.append(int(s.split()[0])))
+            b''.join(corps)
+            corps.close()  # request_finished : fermeture des connexions, comme un vrai serveur
+            return time.perf_counter() - debut, statut[0]
+
+        with ThreadPoolExecutor(concurrence) as executeur:
+            resultats = list(executeur.map(requete, range(requetes)))
+        return [d for d, _ in resultats], {s for _, s in resultats}
+
+    def _asgi(self, url, cookie, requetes, concurrence):
+        handler = ASGIHandler()
+        chemin, _, query = url.partition('?')
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'scheme': 'http',
+            'method': 'GET', 'path': chemin, 'query_string': query.encode(), 'root_path': '',
+            'server': (HOTE, 80), 'client': ('127.0.0.1', 0),
+            'headers': [(b'host', HOTE.encode()), (b'cookie', cookie.encode())],
+        }
+
+        async def requete(limite):
+            async with limite:
+                statut = []
+
+                async def recevoir():
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+                async def envoyer(message):
+                    if message['type'] == 'http.response.start':
+                        statut.append(message['status'])
+
+                debut = time.perf_counter()
+                await handler(dict(scope), recevoir, envoyer)
+                return time.perf_counter() - debut, statut[0]
+
+        async def campagne():
+            limite = asyncio.Semaphore(concurrence)
+            return await asyncio.gather(*(requete(limite) for _ in range(requetes)))
+
+        resultats = asyncio.run(campagne())
+        return [d for d, _ in resultats], {s for _, s in resultats}
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from dashboard.assets import BUNDLES, construire, sources_manquantes
+
+
+class Command(BaseCommand):
+    help = ("Regroupe, minifie et précompresse (gzip, brotli) les CSS/JS du thème dans "
+            "dashboard/static/assets/, avec l'empreinte du contenu dans le nom des fichiers. "
+            "À lancer avant collectstatic.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('bundles', nargs='*', help=f"Bundles à construire (défaut : tous) : {', '.join(BUNDLES)}")
+
+    def handle(self, *args, **options):
+        inconnus = [nom for nom in options['bundles'] if nom not in BUNDLES]
+        if inconnus:
+            self.stdout.write(self.style.ERROR(f"Bundle(s) inconnu(s) : {', '.join(inconnus)}"))
+            return
+
+        manquantes = sources_manquantes(options['bundles'] or None)
+        if manquantes:
+            self.stdout.write(self.style.ERROR("Fichiers sources absents de dashboard/static/ :"))
+            for chemin in manquantes:
+                self.stdout.write(self.style.ERROR(f"   {chemin}"))
+            return
+
+        debut = time.perf_counter()
+        details = construire(options['bundles'] or None)
+
+        self.stdout.write(f"{'bundle':<14} | {'fichier':<28} | {'sources':>7} | {'sources (Ko)':>12} | "
+                          f"{'bundle (Ko)':>11} | {'gzip (Ko)':>9} | {'brotli (Ko)':>11}")
+        for nom, detail in details.items():
+            gz, br = (detail['variantes'].get(v) for v in ('.gz', '.br'))
+            self.stdout.write(
+                f"{nom:<14} | {detail['fichier']:<28} | {detail['sources']:>7} | "
+                f"{detail['taille_sources'] / 1024:>12.0f} | {detail['taille'] / 1024:>11.0f} | "
+                f"{gz / 1024 if gz else 0:>9.0f} | {br / 1024 if br else 0:>11.0f}"
+            )
+            if not detail['minifie']:
+                self.stdout.write(self.style.WARNING(f"   {nom} non minifié : installer rjsmin et rcssmin"))
+            for url in detail['externes']:
+                self.stdout.write(self.style.WARNING(f"   {nom} : @import distant retiré ({url})"))
+        if not any('.br' in detail['variantes'] for detail in details.values()):
+            self.stdout.write(self.style.WARNING("Pas de variantes .br : installer brotli"))
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(details)} bundle(s) construit(s) en {time.perf_counter() - debut:.1f} s"
+        ))
@@ -0,0 +1,147 @@
+import json
+import re
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.http import QueryDict
+
+from dashboard import datatables, olap
+from dashboard.agregats import CHAMPS_FAIT, DIMENSIONS, regrouper_faits
+from dashboard.graphiques import requete_serie
+from dashboard.models import AgregatJour, Ligne
+from dashboard.views import COLONNES_SEGMENT, lignes_segment, requete_ca_segment
+
+
+def _segmentliste(parametres, segment='Consumer'):
+    """Page de segmentliste_donnees pour une requête DataTables (chaîne d'URL)."""
+    parametres = QueryDict(parametres)
+    lignes = datatables.filtrer(parametres, lignes_segment(segment), COLONNES_SEGMENT)
+    return datatables.page(parametres, lignes, COLONNES_SEGMENT)
+
+
+def _segmentliste_compte(parametres, segment='Consumer'):
+    """
+    Lignes comptées par le count() de segmentliste_donnees avec une recherche.
+    EXPLAIN ne s'applique pas à count() : la sélection des seuls id a le même
+    plan d'accès (mêmes conditions, mêmes tables).
+    """
+    lignes = datatables.filtrer(QueryDict(parametres), lignes_segment(segment), COLONNES_SEGMENT)
+    return lignes.order_by().values('pk')
+
+
+def _olap(parametres):
+    """GROUP BY sur FaitVente de l'API OLAP pour une requête (chaîne d'URL)."""
+    queryset, _, _ = olap.compiler(olap.analyser(QueryDict(parametres)))
+    return queryset
+
+
+# nom -> (construction du queryset, parcours complet attendu)
+# Les requêtes sont construites par les mêmes fonctions que les vues. Les
+# recalculs d'agrégats lisent toutes les lignes par nature, et AgregatJour n'a
+# qu'une ligne par jour et combinaison de dimensions : un parcours complet y
+# est signalé comme attendu, pas comme un problème.
+REQUETES = {
+    'dashboard 1 : CA du segment (Consumer)': (lambda: requete_ca_segment('Consumer'), False),
+    'segmentliste : page (Consumer)': (lambda: _segmentliste('start=0&length=25'), False),
+    'segmentliste : tri par date': (
+        lambda: _segmentliste('start=0&length=25&order[0][column]=1&order[0][dir]=desc'), False),
+    'segmentliste : recherche (count)': (lambda: _segmentliste_compte('search[value]=chair'), False),
+    'tendances : par jour': (lambda: requete_serie('jour', debut='2016-01-01', fin='2016-12-31'), False),
+    'tendances : par mois (South)': (lambda: requete_serie('mois', region='South'), True),
+    'olap : ventes par région (South, 2016)': (
+        lambda: _olap('dimensions=region&region=South&annee=2016'), False),
+    'olap : top 5 des catégories sur un trimestre': (
+        lambda: _olap('dimensions=categorie&mesures=quantite&debut=2016-01-01&fin=2016-03-31&limite=5'),
+        False),
+    'import incrémental : lignes des commandes': (
+        lambda: Ligne.objects.filter(commande_id__in=['CA-2016-152156', 'CA-2017-108966'])
+        .values_list('commande_id', 'produit_id'), False),
+    'recalcul ciblé : faits de deux commandes': (
+        lambda: regrouper_faits(DIMENSIONS[AgregatJour], commande__in=['CA-2016-152156', 'CA-2017-108966']),
+        False),
+    'recalcul de la table de faits': (
+        lambda: Ligne.objects.order_by().values('id', *CHAMPS_FAIT.values()), True),
+    **{
+        f'recalcul {modele._meta.verbose_name}': ((lambda d=dimensions: regrouper_faits(d)), True)
+        for modele, dimensions in DIMENSIONS.items()
+    },
+}
+
+
+# ═══════════════════════════════════════════════════════════════
+# Détection des parcours complets, selon la base
+# ═══════════════════════════════════════════════════════════════
+
+def _parcours_postgresql(plan):
+    return sorted(set(re.findall(r'Seq Scan on (\w+)', plan)))
+
+
+def _parcours_mysql(plan):
+    """Tables lues avec access_type ALL dans le plan JSON de MySQL."""
+    tables = set()
+
+    def parcourir(noeud):
+        if isinstance(noeud, dict):
+            if noeud.get('access_type') == 'ALL':
+                tables.add(noeud.get('table_name', '?'))
+            for valeur in noeud.values():
+                parcourir(valeur)
+        elif isinstance(noeud, list):
+            for valeur in noeud:
+                parcourir(valeur)
+
+    parcourir(json.loads(plan))
+    return sorted(tables)
+
+
+def _parcours_sqlite(plan):
+    # « SCAN table » sans index ; « SCAN table USING (COVERING) INDEX » lit un index
+    return sorted({m.group(1) for m in re.finditer(r'SCAN (\w+)\b(?! USING)', plan)})
+
+
+DETECTEURS = {
+    'postgresql': _parcours_postgresql,
+    'mysql': _parcours_mysql,
+    'sqlite': _parcours_sqlite,
+}
+
+
+def _expliquer(queryset, vendor):
+    if vendor == 'mysql':
+        return queryset.explain(format='json')
+    return queryset.explain()
+
+
+class Command(BaseCommand):
+    help = ("Affiche le plan d'exécution (EXPLAIN) des requêtes des dashboards et signale "
+            "les parcours complets de table (MySQL, PostgreSQL, SQLite)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--details', action='store_true', help="Afficher les plans complets")
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in DETECTEURS:
+            self.stdout.write(self.style.ERROR(f"Base {vendor} non prise en charge"))
+            return
+
+        problemes = 0
+        for nom, (construction, attendu) in REQUETES.items():
+            plan = _expliquer(construction(), vendor)
+            parcours = DETECTEURS[vendor](plan)
+
+            if not parcours:
+                self.stdout.write(self.style.SUCCESS(f"✓ {nom}"))
+            elif attendu:
+                self.stdout.write(f"· {nom} : parcours complet attendu ({', '.join(parcours)})")
+            else:
+                problemes += 1
+                self.stdout.write(self.style.WARNING(f"✗ {nom} : parcours complet de {', '.join(parcours)}"))
+            if options['details']:
+                self.stdout.write(plan + "\n")
+
+        if problemes:
+            self.stdout.write(self.style.WARNING(
+                f"{problemes} requête(s) sans index adapté (statistiques à jour ? ANALYZE / ANALYZE TABLE)"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Aucun parcours complet inattendu"))
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from dashboard.synthetique import FICHIER_REFERENCE, GenerateurVentes, ecrire_csv
+
+
+class Command(BaseCommand):
+    help = ("Génère un fichier de ventes synthétique (format data_bd.csv, importable avec remplirdb) "
+            "reproduisant les distributions du fichier de référence. Même graine, même fichier.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('fichier', help='Fichier CSV à écrire')
+        parser.add_argument('--lignes', type=int, default=1_000_000, help='Nombre de lignes de commande')
+        parser.add_argument('--graine', type=int, default=0)
+        parser.add_argument('--reference', default=FICHIER_REFERENCE,
+                            help=f'Fichier dont les distributions sont reprises (défaut : {FICHIER_REFERENCE})')
+        parser.add_argument('--annee-debut', type=int, default=2014)
+        parser.add_argument('--annees', type=int, default=4, help='Nombre d\'années de commandes')
+
+    def handle(self, *args, **options):
+        try:
+            generateur = GenerateurVentes(options['reference'], options['graine'],
+                                          options['annee_debut'], options['annees'])
+        except FileNotFoundError as e:
+            self.stdout.write(self.style.ERROR(f"Fichier non trouvé : {e.filename}"))
+            return
+        except ValueError as e:
+            self.stdout.write(self.style.ERROR(str(e)))
+            return
+
+        debut = time.perf_counter()
+        nombre = ecrire_csv(options['fichier'], generateur.lignes(options['lignes']))
+        duree = time.perf_counter() - debut
+        self.stdout.write(self.style.SUCCESS(
+            f"{nombre} lignes écrites dans {options['fichier']} en {duree:.1f} s"
+        ))
@@ -0,0 +1,75 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max, Min
+
+from dashboard.models import FaitVente
+
+
+class Command(BaseCommand):
+    help = ("Partitionne la table de faits par année de commande (PostgreSQL uniquement). "
+            "Relancée sur une table déjà partitionnée, ajoute les années manquantes.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--jusqua', type=int, default=date.today().year + 1,
+            help="Dernière année pour laquelle créer une partition (défaut : l'an prochain)",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.ERROR("Le partitionnement n'est disponible que sur PostgreSQL."))
+            return
+
+        table = FaitVente._meta.db_table
+        bornes = FaitVente.objects.aggregate(debut=Min('annee'), fin=Max('annee'))
+        debut = bornes['debut'] or date.today().year
+        annees = range(debut, max(bornes['fin'] or debut, options['jusqua']) + 1)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [table])
+            conversion = cursor.fetchone() is None
+            if conversion:
+                self._creer_table_mere(cursor, table)
+
+            # Les partitions annuelles avant la partition par défaut : une année déjà
+            # présente dans la partition par défaut ne peut plus avoir sa partition.
+            for annee in annees:
+                cursor.execute(
+                    f'CREATE TABLE IF NOT EXISTS {self._nom(f"{table}_{annee}")} '
+                    f'PARTITION OF {self._nom(table)} FOR VALUES FROM ({annee}) TO ({annee + 1})'
+                )
+            cursor.execute(f'CREATE TABLE IF NOT EXISTS {self._nom(f"{table}_defaut")} '
+                           f'PARTITION OF {self._nom(table)} DEFAULT')
+
+            if conversion:
+                self._recopier(cursor, table)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{table} partitionnée par année ({annees.start}-{annees.stop - 1}, plus une partition par défaut)"
+        ))
+
+    def _creer_table_mere(self, cursor, table):
+        """Renomme la table existante et crée à sa place la table partitionnée."""
+        self.stdout.write(f"Conversion de {table}...")
+        cursor.execute(f'ALTER TABLE {self._nom(table)} RENAME TO {self._nom(table + "_ancien")}')
+        # La clé de partition doit faire partie de la clé primaire
+        cursor.execute(
+            f'CREATE TABLE {self._nom(table)} (LIKE {self._nom(table + "_ancien")} INCLUDING DEFAULTS '
+            f'INCLUDING CONSTRAINTS, PRIMARY KEY (id, annee)) PARTITION BY RANGE (annee)'
+        )
+
+    def _recopier(self, cursor, table):
+        """Recopie les lignes dans les partitions, supprime l'ancienne table et recrée les index."""
+        cursor.execute(f'INSERT INTO {self._nom(table)} SELECT * FROM {self._nom(table + "_ancien")}')
+        cursor.execute(f'DROP TABLE {self._nom(table + "_ancien")}')
+
+        # Index de FaitVente.Meta, créés sur la table mère (hérités par chaque partition)
+        with connection.schema_editor(atomic=False) as schema_editor:
+            for index in FaitVente._meta.indexes:
+                schema_editor.add_index(FaitVente, index)
+
+    @staticmethod
+    def _nom(nom):
+        return connection.ops.quote_name(nom)
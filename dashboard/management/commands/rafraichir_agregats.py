@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from dashboard.agregats import rafraichir_agregats
+
+
+class Command(BaseCommand):
+    help = 'Recalcule les tables d\'agrégats lues par les dashboards'
+
+    def handle(self, *args, **options):
+        rafraichir_agregats(journal=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS('Agrégats recalculés.'))
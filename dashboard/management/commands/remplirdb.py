@@ -1,139 +1,106 @@
-import csv
+from itertools import chain
+
 from django.core.management.base import BaseCommand
-from dashboard.models import Client, Localite, Produit, Commande, Ligne   # ← change 'dashboard' si ton app s'appelle autrement
+from dashboard.agregats import rafraichir_agregats, rafraichir_commandes
+from dashboard.cache import invalider_graphiques
+from dashboard.importation import (
+    ChargeurVentes, importer_en_parallele, importer_incremental, lire_fichier,
+    TAILLE_LOT, TAILLE_TRANCHE,
+)
+
+FICHIER_DEFAUT = "DjangoProject/data/data_bd.csv"
+
 
 class Command(BaseCommand):
-    help = 'Remplit la table Ligne à partir du fichier CSV (partie 2)'
+    help = 'Remplit les tables du dashboard à partir de fichiers CSV ou XLSX (lecture en flux, par lots)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'fichiers', nargs='*', default=[FICHIER_DEFAUT],
+            help=f'Fichiers .csv (séparateur ;) ou .xlsx à importer (défaut : {FICHIER_DEFAUT})',
+        )
+        parser.add_argument(
+            '--taille-lot', type=int, default=TAILLE_LOT,
+            help=f'Nombre de lignes lues et insérées par lot (défaut : {TAILLE_LOT})',
+        )
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='Import idempotent : insère les nouvelles lignes, met à jour les lignes '
+                 'modifiées (clé commande + produit) et reprend après le dernier import',
+        )
+        parser.add_argument(
+            '--processus', type=int, default=1,
+            help='Nombre de processus d\'import en parallèle (fichiers ou tranches de CSV)',
+        )
+        parser.add_argument(
+            '--taille-tranche', type=int, default=TAILLE_TRANCHE >> 20,
+            help=f'Taille des tranches de CSV en Mo pour l\'import parallèle (défaut : {TAILLE_TRANCHE >> 20})',
+        )
+        parser.add_argument(
+            '--sans-agregats', action='store_true',
+            help='Ne pas recalculer les tables d\'agrégats des dashboards après l\'import '
+                 '(à reconstruire ensuite avec la commande rafraichir_agregats)',
+        )
+        parser.add_argument(
+            '--agregats-complets', action='store_true',
+            help='Reconstruire toutes les tables d\'agrégats au lieu de mettre à jour '
+                 'seulement celles des commandes importées',
+        )
 
     def handle(self, *args, **options):
-        print('Bonjour ! Début de l\'enregistrement des lignes de commande (partie 2)...')
+        self.stdout.write('Bonjour ! Début de l\'enregistrement des lignes de commande...')
 
-        lignes = []
-        csv_path = "DjangoProject/data/data_bd.csv"
+        chemins = options['fichiers']
+        taille_lot = options['taille_lot']
+        if options['incremental'] and options['processus'] > 1:
+            self.stdout.write(self.style.ERROR("--incremental et --processus ne peuvent pas être combinés."))
+            return
 
         try:
-            with open(csv_path, "rt", encoding="utf-8") as data:
-                d = csv.DictReader(data, delimiter=";")
-                for row in d:
-                    lignes.append(row)
-        except UnicodeDecodeError:
-            # Si utf-8 échoue, on essaie cp1252 (Windows français)
-            print("Encodage utf-8 non reconnu → essai avec cp1252...")
-            with open(csv_path, "rt", encoding="cp1252") as data:
-                d = csv.DictReader(data, delimiter=";")
-                for row in d:
-                    lignes.append(row)
-        except FileNotFoundError:
-            self.stdout.write(self.style.ERROR(f"Fichier non trouvé : {csv_path}"))
+            if options['incremental']:
+                chargeurs = [importer_incremental(chemin, taille_lot, journal=self.stdout.write)
+                             for chemin in chemins]
+            elif options['processus'] > 1:
+                chargeurs = [importer_en_parallele(
+                    chemins, options['processus'], taille_lot,
+                    taille_tranche=options['taille_tranche'] << 20, journal=self.stdout.write,
+                )]
+            else:
+                chargeur = ChargeurVentes(taille_lot=taille_lot, journal=self.stdout.write)
+                chargeur.charger(chain.from_iterable(lire_fichier(chemin) for chemin in chemins))
+                chargeurs = [chargeur]
+        except FileNotFoundError as e:
+            self.stdout.write(self.style.ERROR(f"Fichier non trouvé : {e.filename}"))
+            return
+        except ValueError as e:
+            self.stdout.write(self.style.ERROR(str(e)))
             return
 
-        print(f"{len(lignes)} lignes lues dans le CSV.")
-
-        # =====================================================================
-        # PARTIE 1 : création des entités uniques
-        # =====================================================================
-        print("Partie 1 : création des entités uniques")
-        prod_enr = set()
-        clt_enr = set()
-        loc_enr = set()
-        com_enr = set()
-
-        for row in lignes:
-            # Localité
-            if row['Code_postal'] not in loc_enr:
-                Localite.objects.get_or_create(
-                    locCodePostal=row['Code_postal'],
-                    defaults={
-                        'locVille': row['Ville'],
-                        'locEtat': row['Etat'],
-                        'locRegion': row['Region']
-                    }
-                )
-                loc_enr.add(row['Code_postal'])
-
-            # Client
-            if row['ID_Client'] not in clt_enr:
-                Client.objects.get_or_create(
-                    cltId=row['ID_Client'],
-                    defaults={
-                        'cltNom': row['Nom_Client'],
-                        'cltSegment': row['Segment']
-                    }
-                )
-                clt_enr.add(row['ID_Client'])
-
-            # Produit
-            if row['ID_Produit'] not in prod_enr:
-                Produit.objects.get_or_create(
-                    prodId=row['ID_Produit'],
-                    defaults={
-                        'prodNom': row['Nom_Produit'],
-                        'prodCategorie': row['Categorie'],
-                        'prodSousCategorie': row['Sous_Categorie']
-                    }
-                )
-                prod_enr.add(row['ID_Produit'])
-
-            # Commande
-            if row['ID_Commande'] not in com_enr:
-                Commande.objects.get_or_create(
-                    comID=row['ID_Commande'],
-                    defaults={
-                        'comDate': row['Date_Commande'],
-                        'comDateLivraison': row['Date_Livraison'],
-                        'comModeLivraison': row['Mode_Livraison']
-                    }
-                )
-                com_enr.add(row['ID_Commande'])
-
-        # =====================================================================
-        # PARTIE 2 ACTIVE : création des lignes de commande
-        # =====================================================================
-        lignes_creees = 0
-        erreurs = 0
-
-        for row in lignes:
-            try:
-                r_commande = Commande.objects.get(comID=row['ID_Commande'])
-                r_produit  = Produit.objects.get(prodId=row['ID_Produit'])
-                r_client   = Client.objects.get(cltId=row['ID_Client'])
-                r_localite = Localite.objects.get(locCodePostal=row['Code_postal'])
-
-                Ligne.objects.create(
-                    ligQuantite=int(row['Quantite']),
-                    ligPrix=float(row['Ventes'].replace(',', '.')),
-                    ligRemise=float(row['Remise'].replace(',', '.')),
-                    ligBenefice=float(row['Benefice'].replace(',', '.')),
-                    commande=r_commande,
-                    produit=r_produit,
-                    client=r_client,
-                    localite=r_localite
-                )
-
-                lignes_creees += 1
-                print(f"Ligne créée : commande {row['ID_Commande']} - produit {row['ID_Produit']}")
-
-            except Commande.DoesNotExist:
-                print(f"Erreur : Commande {row['ID_Commande']} introuvable")
-                erreurs += 1
-            except Produit.DoesNotExist:
-                print(f"Erreur : Produit {row['ID_Produit']} introuvable")
-                erreurs += 1
-            except Client.DoesNotExist:
-                print(f"Erreur : Client {row['ID_Client']} introuvable")
-                erreurs += 1
-            except Localite.DoesNotExist:
-                print(f"Erreur : Localité {row['Code_postal']} introuvable")
-                erreurs += 1
-            except Exception as e:
-                print(f"Erreur inconnue pour la ligne : {e}")
-                erreurs += 1
-
-        print(f"\nRésultat final :")
-        print(f"   - Lignes créées : {lignes_creees}")
-        print(f"   - Erreurs rencontrées : {erreurs}")
+        def total(compteur):
+            return sum(getattr(chargeur, compteur) for chargeur in chargeurs)
+
+        self.stdout.write(f"\nRésultat final :")
+        self.stdout.write(f"   - Lignes lues : {total('lignes_lues')}")
+        self.stdout.write(f"   - Lignes créées : {total('lignes_creees')}")
+        if options['incremental']:
+            self.stdout.write(f"   - Lignes modifiées : {total('lignes_modifiees')}")
+            self.stdout.write(f"   - Lignes inchangées : {total('lignes_inchangees')}")
+        erreurs = total('erreurs')
+        self.stdout.write(f"   - Erreurs rencontrées : {erreurs}")
+
+        modifications = total('lignes_creees') + sum(getattr(c, 'lignes_modifiees', 0) for c in chargeurs)
+        commandes = [chargeur.commandes_modifiees for chargeur in chargeurs]
+        if modifications and not options['sans_agregats']:
+            if options['agregats_complets'] or None in commandes:
+                self.stdout.write("\nRecalcul des agrégats des dashboards...")
+                rafraichir_agregats(journal=self.stdout.write)
+            else:
+                self.stdout.write("\nMise à jour des agrégats des commandes importées...")
+                rafraichir_commandes(set().union(*commandes), journal=self.stdout.write)
+        elif modifications:
+            invalider_graphiques()
 
         if erreurs == 0:
             self.stdout.write(self.style.SUCCESS('Base de données remplie avec succès !'))
         else:
-            self.stdout.write(self.style.WARNING(f'{erreurs} erreurs détectées - vérifiez les messages ci-dessus.'))
\ No newline at end of file
+            self.stdout.write(self.style.WARNING(f'{erreurs} erreurs détectées - vérifiez les messages ci-dessus.'))
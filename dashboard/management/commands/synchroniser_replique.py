@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from dashboard.routeurs import ALIAS_REPLIQUE, replique_configuree
+
+
+class Command(BaseCommand):
+    help = ("Copie la base principale SQLite dans la réplique (DB_REPLICA_NAME), pour essayer "
+            "le routage des lectures en local. Avec MySQL ou PostgreSQL, la réplique est tenue "
+            "à jour par la réplication du serveur.")
+
+    def handle(self, *args, **options):
+        if not replique_configuree():
+            self.stdout.write(self.style.ERROR("Aucune réplique configurée (DB_REPLICA_NAME ou DB_REPLICA_HOST)."))
+            return
+        principale, replique = connections[DEFAULT_DB_ALIAS], connections[ALIAS_REPLIQUE]
+        if principale.vendor != 'sqlite' or replique.vendor != 'sqlite':
+            self.stdout.write(self.style.ERROR("La copie n'est disponible qu'entre deux bases SQLite."))
+            return
+
+        debut = time.perf_counter()
+        principale.ensure_connection()
+        replique.ensure_connection()
+        # API de sauvegarde de SQLite : copie cohérente, même pendant des écritures
+        principale.connection.backup(replique.connection)
+        self.stdout.write(self.style.SUCCESS(
+            f"Réplique {replique.settings_dict['NAME']} synchronisée en {time.perf_counter() - debut:.1f} s"
+        ))
@@ -1,31 +1,48 @@
+from django.conf import settings
 from django.utils.deprecation import MiddlewareMixin
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from .permissions import droits
 
 
 class UserSessionMiddleware(MiddlewareMixin):
     """
     Middleware gérant les variables de session personnalisées.
+
+    `last_activity` n'est réécrit qu'une fois par SESSION_ACTIVITE_INTERVALLE :
+    une session non modifiée n'est pas sauvegardée par Django, donc les pages
+    consultées entre-temps ne font aucune écriture de session.
     """
-    
+
     def process_request(self, request):
         if request.user.is_authenticated:
             if 'user_session_data' not in request.session:
+                droits_utilisateur = droits(request)
                 request.session['user_session_data'] = {
                     'user_id': request.user.id,
                     'username': request.user.username,
                     'email': request.user.email,
-                    'groups': list(request.user.groups.values_list('name', flat=True)),
+                    'groups': sorted(droits_utilisateur.groupes),
                     'login_time': datetime.now().isoformat(),
-                    'is_admin': (
-                        request.user.groups.filter(name='Administrateurs').exists() or 
-                        request.user.is_superuser
-                    ),
+                    'is_admin': droits_utilisateur.is_admin,
                 }
                 request.session.modified = True
-            
-            request.session['last_activity'] = datetime.now().isoformat()
-        
+
+            maintenant = datetime.now()
+            if self._activite_a_enregistrer(request.session.get('last_activity'), maintenant):
+                request.session['last_activity'] = maintenant.isoformat()
+
         return None
-    
+
     def process_response(self, request, response):
         return response
+
+    @staticmethod
+    def _activite_a_enregistrer(derniere_activite, maintenant):
+        """Vrai si `last_activity` est absent, illisible ou plus vieux que l'intervalle."""
+        try:
+            derniere = datetime.fromisoformat(derniere_activite)
+        except (TypeError, ValueError):
+            return True
+        intervalle = timedelta(seconds=getattr(settings, 'SESSION_ACTIVITE_INTERVALLE', 300))
+        return not timedelta(0) <= maintenant - derniere < intervalle
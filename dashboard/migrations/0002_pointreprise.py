@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PointReprise',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fichier', models.CharField(max_length=500, unique=True, verbose_name='Fichier')),
+                ('empreinte', models.CharField(max_length=64, verbose_name='Empreinte SHA-256')),
+                ('position', models.BigIntegerField(default=0, verbose_name='Position (octets)')),
+                ('derniere_date', models.DateField(blank=True, null=True, verbose_name='Dernière date de commande')),
+                ('date_import', models.DateTimeField(auto_now=True, verbose_name='Date import')),
+            ],
+            options={
+                'verbose_name': "Point de reprise d'import",
+            },
+        ),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0002_pointreprise'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgregatLivraison',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nb_lignes', models.PositiveIntegerField(default=0, verbose_name='Nombre de lignes')),
+                ('quantite', models.BigIntegerField(default=0, verbose_name='Quantité')),
+                ('ventes', models.FloatField(default=0, verbose_name='Ventes')),
+                ('benefice', models.FloatField(default=0, verbose_name='Benefice')),
+                ('mode', models.CharField(max_length=30, unique=True, verbose_name='Mode Livraison')),
+            ],
+            options={
+                'verbose_name': 'Agrégat par mode de livraison',
+            },
+        ),
+        migrations.CreateModel(
+            name='AgregatSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nb_lignes', models.PositiveIntegerField(default=0, verbose_name='Nombre de lignes')),
+                ('quantite', models.BigIntegerField(default=0, verbose_name='Quantité')),
+                ('ventes', models.FloatField(default=0, verbose_name='Ventes')),
+                ('benefice', models.FloatField(default=0, verbose_name='Benefice')),
+                ('segment', models.CharField(choices=[('Consumer', 'CONSUMER'), ('Corporate', 'CORPORATE'), ('Home Office', 'HOME OFFICE')], max_length=20, unique=True, verbose_name='Segment')),
+            ],
+            options={
+                'verbose_name': 'Agrégat par segment',
+            },
+        ),
+        migrations.CreateModel(
+            name='Compteur',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(max_length=30, unique=True, verbose_name='Nom')),
+                ('valeur', models.BigIntegerField(default=0, verbose_name='Valeur')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AgregatProduit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nb_lignes', models.PositiveIntegerField(default=0, verbose_name='Nombre de lignes')),
+                ('quantite', models.BigIntegerField(default=0, verbose_name='Quantité')),
+                ('ventes', models.FloatField(default=0, verbose_name='Ventes')),
+                ('benefice', models.FloatField(default=0, verbose_name='Benefice')),
+                ('categorie', models.CharField(choices=[('Furniture', 'FURNITURE'), ('Office Supplies', 'OFFICE SUPPLIES'), ('Technology', 'TECHNOLOGY')], max_length=20, verbose_name='Categorie')),
+                ('sous_categorie', models.CharField(max_length=50, verbose_name='Sous-Categorie')),
+            ],
+            options={
+                'verbose_name': 'Agrégat par sous-catégorie',
+                'unique_together': {('categorie', 'sous_categorie')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AgregatLocalite',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nb_lignes', models.PositiveIntegerField(default=0, verbose_name='Nombre de lignes')),
+                ('quantite', models.BigIntegerField(default=0, verbose_name='Quantité')),
+                ('ventes', models.FloatField(default=0, verbose_name='Ventes')),
+                ('benefice', models.FloatField(default=0, verbose_name='Benefice')),
+                ('region', models.CharField(choices=[('Central', 'CENTRAL'), ('West', 'WEST'), ('East', 'EAST'), ('South', 'SOUTH')], max_length=10, verbose_name='Region')),
+                ('etat', models.CharField(max_length=50, verbose_name='Etat')),
+                ('ville', models.CharField(max_length=50, verbose_name='Ville')),
+            ],
+            options={
+                'verbose_name': 'Agrégat par ville',
+                'unique_together': {('region', 'etat', 'ville')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AgregatJour',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nb_lignes', models.PositiveIntegerField(default=0, verbose_name='Nombre de lignes')),
+                ('quantite', models.BigIntegerField(default=0, verbose_name='Quantité')),
+                ('ventes', models.FloatField(default=0, verbose_name='Ventes')),
+                ('benefice', models.FloatField(default=0, verbose_name='Benefice')),
+                ('jour', models.DateField(verbose_name='Date Commande')),
+                ('region', models.CharField(choices=[('Central', 'CENTRAL'), ('West', 'WEST'), ('East', 'EAST'), ('South', 'SOUTH')], max_length=10, verbose_name='Region')),
+                ('segment', models.CharField(choices=[('Consumer', 'CONSUMER'), ('Corporate', 'CORPORATE'), ('Home Office', 'HOME OFFICE')], max_length=20, verbose_name='Segment')),
+                ('categorie', models.CharField(choices=[('Furniture', 'FURNITURE'), ('Office Supplies', 'OFFICE SUPPLIES'), ('Technology', 'TECHNOLOGY')], max_length=20, verbose_name='Categorie')),
+            ],
+            options={
+                'verbose_name': 'Agrégat par jour',
+                'unique_together': {('jour', 'region', 'segment', 'categorie')},
+            },
+        ),
+    ]
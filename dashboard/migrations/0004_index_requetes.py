@@ -0,0 +1,49 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0003_agregats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['cltSegment', 'cltId'], name='client_segment_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commande',
+            index=models.Index(fields=['comDate'], name='commande_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commande',
+            index=models.Index(fields=['comModeLivraison', 'comDate'], name='commande_livraison_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ligne',
+            index=models.Index(fields=['commande', 'produit'], name='ligne_commande_produit_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ligne',
+            index=models.Index(fields=['client', 'ligQuantite', 'ligPrix', 'ligBenefice'], name='ligne_client_mesures_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ligne',
+            index=models.Index(fields=['localite', 'ligQuantite', 'ligPrix', 'ligBenefice'], name='ligne_localite_mesures_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ligne',
+            index=models.Index(fields=['produit', 'ligQuantite', 'ligPrix', 'ligBenefice'], name='ligne_produit_mesures_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='localite',
+            index=models.Index(fields=['locRegion', 'locEtat', 'locVille'], name='localite_region_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='produit',
+            index=models.Index(fields=['prodCategorie', 'prodSousCategorie'], name='produit_categorie_idx'),
+        ),
+    ]
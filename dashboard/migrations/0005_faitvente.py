@@ -0,0 +1,89 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0004_index_requetes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='agregatjour',
+            name='benefice',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=18, verbose_name='Benefice'),
+        ),
+        migrations.AlterField(
+            model_name='agregatjour',
+            name='ventes',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=18, verbose_name='Ventes'),
+        ),
+        migrations.AlterField(
+            model_name='agregatlivraison',
+            name='benefice',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=18, verbose_name='Benefice'),
+        ),
+        migrations.AlterField(
+            model_name='agregatlivraison',
+            name='ventes',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=18, verbose_name='Ventes'),
+        ),
+        migrations.AlterField(
+            model_name='agregatlocalite',
+            name='benefice',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=18, verbose_name='Benefice'),
+        ),
+        migrations.AlterField(
+            model_name='agregatlocalite',
+            name='ventes',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=18, verbose_name='Ventes'),
+        ),
+        migrations.AlterField(
+            model_name='agregatproduit',
+            name='benefice',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=18, verbose_name='Benefice'),
+        ),
+        migrations.AlterField(
+            model_name='agregatproduit',
+            name='ventes',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=18, verbose_name='Ventes'),
+        ),
+        migrations.AlterField(
+            model_name='agregatsegment',
+            name='benefice',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=18, verbose_name='Benefice'),
+        ),
+        migrations.AlterField(
+            model_name='agregatsegment',
+            name='ventes',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=18, verbose_name='Ventes'),
+        ),
+        migrations.CreateModel(
+            name='FaitVente',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID Ligne')),
+                ('commande', models.CharField(max_length=20, verbose_name='Commande')),
+                ('produit', models.CharField(max_length=20, verbose_name='ID Produit')),
+                ('client', models.CharField(max_length=10, verbose_name='ID Client')),
+                ('jour', models.DateField(verbose_name='Date Commande')),
+                ('annee', models.PositiveSmallIntegerField(verbose_name='Année')),
+                ('mode_livraison', models.CharField(max_length=30, verbose_name='Mode Livraison')),
+                ('segment', models.CharField(choices=[('Consumer', 'CONSUMER'), ('Corporate', 'CORPORATE'), ('Home Office', 'HOME OFFICE')], max_length=20, verbose_name='Segment')),
+                ('region', models.CharField(choices=[('Central', 'CENTRAL'), ('West', 'WEST'), ('East', 'EAST'), ('South', 'SOUTH')], max_length=10, verbose_name='Region')),
+                ('etat', models.CharField(max_length=50, verbose_name='Etat')),
+                ('ville', models.CharField(max_length=50, verbose_name='Ville')),
+                ('categorie', models.CharField(choices=[('Furniture', 'FURNITURE'), ('Office Supplies', 'OFFICE SUPPLIES'), ('Technology', 'TECHNOLOGY')], max_length=20, verbose_name='Categorie')),
+                ('sous_categorie', models.CharField(max_length=50, verbose_name='Sous-Categorie')),
+                ('quantite', models.IntegerField(verbose_name='Quantité')),
+                ('prix_x10000', models.BigIntegerField(verbose_name='Prix (x10000)')),
+                ('remise', models.DecimalField(decimal_places=4, default=0, max_digits=5, verbose_name='Remise')),
+                ('benefice_x10000', models.BigIntegerField(default=0, verbose_name='Benefice (x10000)')),
+            ],
+            options={
+                'verbose_name': 'Fait de vente',
+                'indexes': [models.Index(fields=['jour'], name='fait_jour_idx'), models.Index(fields=['segment', 'jour'], name='fait_segment_jour_idx'), models.Index(fields=['region', 'jour'], name='fait_region_jour_idx'), models.Index(fields=['categorie', 'jour'], name='fait_categorie_jour_idx')],
+            },
+        ),
+    ]
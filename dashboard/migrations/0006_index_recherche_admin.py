@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0005_faitvente'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['cltNom'], name='client_nom_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='localite',
+            index=models.Index(fields=['locVille'], name='localite_ville_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='produit',
+            index=models.Index(fields=['prodNom'], name='produit_nom_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0006_index_recherche_admin'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='faitvente',
+            index=models.Index(fields=['commande'], name='fait_commande_idx'),
+        ),
+    ]
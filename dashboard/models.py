@@ -24,6 +24,14 @@ class Client(models.Model):
         choices=SEGMENT
     )
 
+    class Meta:
+        indexes = [
+            # Listes et agrégats par segment : filtre puis jointure sur la clé
+            models.Index(fields=['cltSegment', 'cltId'], name='client_segment_idx'),
+            # Recherche de l'admin (début du nom)
+            models.Index(fields=['cltNom'], name='client_nom_idx'),
+        ]
+
     def __str__(self):
         return f'{self.cltId} - {self.cltNom}'
 
@@ -38,6 +46,10 @@ class Localite(models.Model):
     class Meta:
         verbose_name = "Localisation du Client"
         ordering = ['locRegion', 'locEtat']
+        indexes = [
+            models.Index(fields=['locRegion', 'locEtat', 'locVille'], name='localite_region_idx'),
+            models.Index(fields=['locVille'], name='localite_ville_idx'),
+        ]
 
     def __str__(self):
         return f'{self.locCodePostal} - {self.locVille}'
@@ -53,6 +65,12 @@ class Produit(models.Model):
     )
     prodSousCategorie = models.CharField(verbose_name='Sous-Categorie', max_length=50)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['prodCategorie', 'prodSousCategorie'], name='produit_categorie_idx'),
+            models.Index(fields=['prodNom'], name='produit_nom_idx'),
+        ]
+
     def __str__(self):
         return self.prodNom
 
@@ -65,6 +83,13 @@ class Commande(models.Model):
     comproduits = models.ManyToManyField(Produit, through='Ligne', related_name='contenir', blank=True,
                                          verbose_name="Produits")
 
+    class Meta:
+        indexes = [
+            # Périodes (comDate BETWEEN ...) et répartition par mode de livraison
+            models.Index(fields=['comDate'], name='commande_date_idx'),
+            models.Index(fields=['comModeLivraison', 'comDate'], name='commande_livraison_idx'),
+        ]
+
     def __str__(self):
         return self.comID
 
@@ -82,8 +107,171 @@ class Ligne(models.Model):
     class Meta:
         ordering = ['produit']
         verbose_name = "Ligne de Commande"
+        indexes = [
+            # Rapprochement de l'import incrémental sur (commande, produit)
+            models.Index(fields=['commande', 'produit'], name='ligne_commande_produit_idx'),
+            # Index couvrants : jointure sur une dimension puis lecture des mesures
+            # sans accès à la table (segment, région, catégorie)
+            models.Index(fields=['client', 'ligQuantite', 'ligPrix', 'ligBenefice'],
+                         name='ligne_client_mesures_idx'),
+            models.Index(fields=['localite', 'ligQuantite', 'ligPrix', 'ligBenefice'],
+                         name='ligne_localite_mesures_idx'),
+            models.Index(fields=['produit', 'ligQuantite', 'ligPrix', 'ligBenefice'],
+                         name='ligne_produit_mesures_idx'),
+        ]
+
+    def __str__(self):
+        # Les clés étrangères sont les identifiants métier : pas de requête vers les tables liées.
+        return f'{self.commande_id} - {self.client_id} - {self.produit_id} - {self.ligQuantite} - {self.ligPrix}'
+
+
+class PointReprise(models.Model):
+    """Point de reprise d'un import incrémental (remplirdb --incremental)."""
+    fichier = models.CharField(verbose_name='Fichier', max_length=500, unique=True)
+    empreinte = models.CharField(verbose_name='Empreinte SHA-256', max_length=64)
+    position = models.BigIntegerField(verbose_name='Position (octets)', default=0)
+    derniere_date = models.DateField(verbose_name='Dernière date de commande', null=True, blank=True)
+    date_import = models.DateTimeField(verbose_name='Date import', auto_now=True)
+
+    class Meta:
+        verbose_name = "Point de reprise d'import"
+
+    def __str__(self):
+        return f'{self.fichier} ({self.position} octets)'
+
+
+# ═══════════════════════════════════════════════════════════════
+# Table de faits (recalculée par dashboard.agregats)
+# ═══════════════════════════════════════════════════════════════
+
+# Les montants entiers de FaitVente sont multipliés par cette valeur
+ECHELLE_MONTANTS = 10_000
+
+
+class FaitVente(models.Model):
+    """
+    Copie dénormalisée de Ligne pour les calculs analytiques.
+
+    Les codes des dimensions (segment, région, catégorie, date...) sont recopiés
+    sur chaque ligne : les regroupements et filtres se font sans jointure. Les
+    montants sont des entiers en dix-millièmes (les données source ont jusqu'à
+    4 décimales), donc les sommes sont exactes sur toutes les bases. Sur
+    PostgreSQL, la table peut être partitionnée par année (partitionner_faits).
+    """
+    # Même identifiant que la Ligne d'origine ; pas de clé étrangère, pour
+    # permettre le partitionnement (la clé primaire devient (id, annee)).
+    id = models.BigIntegerField(verbose_name='ID Ligne', primary_key=True)
+    commande = models.CharField(verbose_name='Commande', max_length=20)
+    produit = models.CharField(verbose_name='ID Produit', max_length=20)
+    client = models.CharField(verbose_name='ID Client', max_length=10)
+    jour = models.DateField(verbose_name='Date Commande')
+    annee = models.PositiveSmallIntegerField(verbose_name='Année')
+    mode_livraison = models.CharField(verbose_name='Mode Livraison', max_length=30)
+    segment = models.CharField(verbose_name='Segment', max_length=20, choices=SEGMENT)
+    region = models.CharField(verbose_name='Region', max_length=10, choices=REGION)
+    etat = models.CharField(verbose_name='Etat', max_length=50)
+    ville = models.CharField(verbose_name='Ville', max_length=50)
+    categorie = models.CharField(verbose_name='Categorie', max_length=20, choices=CATEGORIE)
+    sous_categorie = models.CharField(verbose_name='Sous-Categorie', max_length=50)
+    quantite = models.IntegerField(verbose_name='Quantité')
+    prix_x10000 = models.BigIntegerField(verbose_name='Prix (x10000)')
+    remise = models.DecimalField(verbose_name='Remise', max_digits=5, decimal_places=4, default=0)
+    benefice_x10000 = models.BigIntegerField(verbose_name='Benefice (x10000)', default=0)
+
+    class Meta:
+        verbose_name = "Fait de vente"
+        indexes = [
+            models.Index(fields=['jour'], name='fait_jour_idx'),
+            models.Index(fields=['segment', 'jour'], name='fait_segment_jour_idx'),
+            models.Index(fields=['region', 'jour'], name='fait_region_jour_idx'),
+            models.Index(fields=['categorie', 'jour'], name='fait_categorie_jour_idx'),
+            # Recalcul ciblé des faits d'une commande après un import (rafraichir_commandes)
+            models.Index(fields=['commande'], name='fait_commande_idx'),
+        ]
 
     def __str__(self):
-        return f'{self.commande.comID} - {self.client.cltId} - {self.produit.prodId} - {self.ligQuantite} - {self.ligPrix}'
+        return f'{self.commande} - {self.produit} - {self.quantite} - {self.prix_x10000 / ECHELLE_MONTANTS}'
+
 
+# ═══════════════════════════════════════════════════════════════
+# Tables d'agrégats (recalculées par dashboard.agregats)
+# ═══════════════════════════════════════════════════════════════
+
+class Agregat(models.Model):
+    """Mesures communes à toutes les tables d'agrégats (montants exacts)."""
+    nb_lignes = models.PositiveIntegerField(verbose_name='Nombre de lignes', default=0)
+    quantite = models.BigIntegerField(verbose_name='Quantité', default=0)
+    ventes = models.DecimalField(verbose_name='Ventes', max_digits=18, decimal_places=4, default=0)
+    benefice = models.DecimalField(verbose_name='Benefice', max_digits=18, decimal_places=4, default=0)
+
+    class Meta:
+        abstract = True
+
+
+class AgregatLocalite(Agregat):
+    region = models.CharField(verbose_name='Region', max_length=10, choices=REGION)
+    etat = models.CharField(verbose_name='Etat', max_length=50)
+    ville = models.CharField(verbose_name='Ville', max_length=50)
+
+    class Meta:
+        verbose_name = "Agrégat par ville"
+        unique_together = [('region', 'etat', 'ville')]
 
+    def __str__(self):
+        return f'{self.region} - {self.etat} - {self.ville}'
+
+
+class AgregatSegment(Agregat):
+    segment = models.CharField(verbose_name='Segment', max_length=20, choices=SEGMENT, unique=True)
+
+    class Meta:
+        verbose_name = "Agrégat par segment"
+
+    def __str__(self):
+        return self.segment
+
+
+class AgregatProduit(Agregat):
+    categorie = models.CharField(verbose_name='Categorie', max_length=20, choices=CATEGORIE)
+    sous_categorie = models.CharField(verbose_name='Sous-Categorie', max_length=50)
+
+    class Meta:
+        verbose_name = "Agrégat par sous-catégorie"
+        unique_together = [('categorie', 'sous_categorie')]
+
+    def __str__(self):
+        return f'{self.categorie} - {self.sous_categorie}'
+
+
+class AgregatLivraison(Agregat):
+    mode = models.CharField(verbose_name='Mode Livraison', max_length=30, unique=True)
+
+    class Meta:
+        verbose_name = "Agrégat par mode de livraison"
+
+    def __str__(self):
+        return self.mode
+
+
+class AgregatJour(Agregat):
+    """Grain le plus fin dans le temps : les mois se calculent sur cette table."""
+    jour = models.DateField(verbose_name='Date Commande')
+    region = models.CharField(verbose_name='Region', max_length=10, choices=REGION)
+    segment = models.CharField(verbose_name='Segment', max_length=20, choices=SEGMENT)
+    categorie = models.CharField(verbose_name='Categorie', max_length=20, choices=CATEGORIE)
+
+    class Meta:
+        verbose_name = "Agrégat par jour"
+        unique_together = [('jour', 'region', 'segment', 'categorie')]
+
+    def __str__(self):
+        return f'{self.jour} - {self.region} - {self.segment} - {self.categorie}'
+
+
+class Compteur(models.Model):
+    """Nombre d'enregistrements des tables de référence (clients, produits...)."""
+    nom = models.CharField(verbose_name='Nom', max_length=30, unique=True)
+    valeur = models.BigIntegerField(verbose_name='Valeur', default=0)
+
+    def __str__(self):
+        return f'{self.nom} : {self.valeur}'
@@ -0,0 +1,190 @@
+"""
+API d'interrogation du cube des ventes.
+
+Une requête (paramètres GET) choisit des dimensions de regroupement, des
+mesures, des filtres, un tri et une limite (top-N). Elle est validée contre
+les listes ci-dessous puis compilée en une seule requête GROUP BY sur
+FaitVente, la table de faits dénormalisée : aucune jointure, et aucun nom de
+champ venant du client n'atteint le SQL sans être dans une liste blanche.
+
+Exemple :
+    /dashboard/api/olap/?dimensions=region,categorie&mesures=ventes:sum,remise:avg
+        &segment=Consumer&annee=2016&tri=-ventes_sum&limite=5
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import Avg, Count, Max, Min, Sum
+from django.db.models.functions import TruncMonth, TruncQuarter
+
+from .cache import graphique_en_cache
+from .instrumentation import chrono
+from .models import ECHELLE_MONTANTS, FaitVente
+
+LIMITE_MAX = 1000
+
+# Dimension -> champ de FaitVente, ou expression pour les périodes
+DIMENSIONS = {
+    'segment': 'segment',
+    'region': 'region',
+    'etat': 'etat',
+    'ville': 'ville',
+    'categorie': 'categorie',
+    'sous_categorie': 'sous_categorie',
+    'mode_livraison': 'mode_livraison',
+    'client': 'client',
+    'produit': 'produit',
+    'commande': 'commande',
+    'annee': 'annee',
+    'trimestre': TruncQuarter('jour'),
+    'mois': TruncMonth('jour'),
+    'jour': 'jour',
+}
+
+# Mesure -> (champ de FaitVente, diviseur pour revenir au montant)
+MESURES = {
+    'quantite': ('quantite', 1),
+    'ventes': ('prix_x10000', ECHELLE_MONTANTS),
+    'remise': ('remise', 1),
+    'benefice': ('benefice_x10000', ECHELLE_MONTANTS),
+}
+
+FONCTIONS = {
+    'sum': Sum,
+    'avg': Avg,
+    'count': Count,
+    'min': Min,
+    'max': Max,
+}
+
+
+def _liste(valeur):
+    return [v.strip() for v in (valeur or '').split(',') if v.strip()]
+
+
+def _valeur_filtre(dimension, valeur):
+    """Convertit une valeur de filtre avec le champ du modèle (entier, date...)."""
+    try:
+        return FaitVente._meta.get_field(DIMENSIONS[dimension]).to_python(valeur)
+    except ValidationError as e:
+        raise ValueError(f"Valeur invalide pour {dimension} : {valeur}") from e
+
+
+def analyser(parametres):
+    """
+    Valide une requête (QueryDict) et la renvoie normalisée sous forme de dict,
+    utilisable comme clé de cache. Lève ValueError si un élément est inconnu.
+    """
+    dimensions = _liste(parametres.get('dimensions'))
+    for dimension in dimensions:
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Dimension inconnue : {dimension}")
+
+    mesures = []
+    for mesure in _liste(parametres.get('mesures')) or ['ventes:sum']:
+        nom, _, fonction = mesure.partition(':')
+        fonction = fonction or 'sum'
+        if nom not in MESURES:
+            raise ValueError(f"Mesure inconnue : {nom}")
+        if fonction not in FONCTIONS:
+            raise ValueError(f"Fonction inconnue : {fonction}")
+        mesures.append(f'{nom}_{fonction}')
+
+    # Filtres : une dimension stockée peut être répétée (valeur1 OU valeur2)
+    filtres = {}
+    for dimension, champ in DIMENSIONS.items():
+        valeurs = parametres.getlist(dimension) if isinstance(champ, str) else []
+        if valeurs:
+            filtres[dimension] = sorted(str(_valeur_filtre(dimension, v)) for v in valeurs)
+    for borne in ('debut', 'fin'):
+        if parametres.get(borne):
+            try:
+                filtres[borne] = date.fromisoformat(parametres[borne]).isoformat()
+            except ValueError as e:
+                raise ValueError(f"Date invalide pour {borne} : {parametres[borne]}") from e
+
+    tri = _liste(parametres.get('tri'))
+    for colonne in tri:
+        if colonne.lstrip('-') not in dimensions + mesures:
+            raise ValueError(f"Tri sur une colonne absente du résultat : {colonne}")
+
+    try:
+        limite = int(parametres.get('limite') or LIMITE_MAX)
+    except ValueError as e:
+        raise ValueError("La limite doit être un entier") from e
+    if not 0 < limite <= LIMITE_MAX:
+        raise ValueError(f"La limite doit être comprise entre 1 et {LIMITE_MAX}")
+
+    return {
+        'dimensions': dimensions,
+        'mesures': mesures,
+        'filtres': filtres,
+        # Top-N : par défaut, la première mesure décroissante
+        'tri': tri or ([f'-{mesures[0]}'] if parametres.get('limite') else dimensions),
+        'limite': limite,
+    }
+
+
+def _nombre(valeur, diviseur):
+    if valeur is None:
+        return None
+    if diviseur != 1:
+        valeur = Decimal(str(valeur)) / diviseur
+    return float(valeur) if isinstance(valeur, Decimal) else valeur
+
+
+def compiler(requete):
+    """
+    Queryset (non évalué) de la requête normalisée : GROUP BY trié et limité,
+    ou FaitVente filtré à agréger s'il n'y a pas de dimension. Renvoie aussi
+    {alias: agrégation} et {alias: diviseur}.
+    """
+    queryset = FaitVente.objects.order_by()
+    filtres = dict(requete['filtres'])
+    if 'debut' in filtres:
+        queryset = queryset.filter(jour__gte=filtres.pop('debut'))
+    if 'fin' in filtres:
+        queryset = queryset.filter(jour__lte=filtres.pop('fin'))
+    for dimension, valeurs in filtres.items():
+        queryset = queryset.filter(**{f'{DIMENSIONS[dimension]}__in': valeurs})
+
+    champs = [d for d in requete['dimensions'] if isinstance(DIMENSIONS[d], str)]
+    expressions = {d: DIMENSIONS[d] for d in requete['dimensions'] if d not in champs}
+    # Les dimensions stockées portent déjà leur nom ; les périodes sont des annotations
+    queryset = queryset.values(*champs, **expressions)
+
+    agregations, diviseurs = {}, {}
+    for alias in requete['mesures']:
+        nom, fonction = alias.rsplit('_', 1)
+        champ, diviseur = MESURES[nom]
+        agregations[alias] = FONCTIONS[fonction](champ)
+        diviseurs[alias] = 1 if fonction == 'count' else diviseur
+    if requete['dimensions']:
+        queryset = queryset.annotate(**agregations).order_by(*requete['tri'])[:requete['limite']]
+    return queryset, agregations, diviseurs
+
+
+def executer(requete):
+    """Compile la requête normalisée en un GROUP BY sur FaitVente et renvoie les lignes."""
+    queryset, agregations, diviseurs = compiler(requete)
+    with chrono('agregation'):
+        if requete['dimensions']:
+            lignes = list(queryset)
+        else:
+            # Sans dimension : une seule ligne de totaux
+            lignes = [queryset.aggregate(**agregations)]
+
+    for ligne in lignes:
+        for alias, diviseur in diviseurs.items():
+            ligne[alias] = _nombre(ligne[alias], diviseur)
+        for dimension, valeur in ligne.items():
+            if isinstance(valeur, date):
+                ligne[dimension] = valeur.isoformat()
+    return lignes
+
+
+def interroger(parametres):
+    """Résultat (dict sérialisable en JSON) d'une requête GET, depuis le cache si possible."""
+    requete = analyser(parametres)
+    return graphique_en_cache('olap', lambda: dict(requete, lignes=executer(requete)), requete)
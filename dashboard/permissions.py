@@ -0,0 +1,85 @@
+"""
+Droits de l'utilisateur connecté (groupes, administrateur).
+
+Les groupes sont lus une seule fois : le résultat est gardé sur la requête et
+dans le cache par utilisateur. Les décorateurs, le middleware et les vues
+utilisent tous `droits(request)`, donc une requête authentifiée courante
+n'interroge plus les tables de groupes, seulement la version des droits.
+
+Cette version est un Compteur en base (comme la version des données des
+graphiques, voir cache.py), incrémenté par les signaux (dashboard.signals)
+quand l'appartenance aux groupes change, et incluse dans les clés : un retrait
+du groupe Administrateurs est pris en compte dès la requête suivante dans tous
+les processus, même avec un cache en mémoire locale propre à chacun.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from django.db.models import F
+
+from .models import Compteur
+
+GROUPE_ADMIN = 'Administrateurs'
+VERSION_DROITS = 'version_droits'
+
+# Durée de vie (secondes) des droits en cache : libère la mémoire des entrées
+# d'une ancienne version, sans effet sur la prise en compte des changements.
+DUREE_CACHE = getattr(settings, 'DASHBOARD_DROITS_TIMEOUT', 300)
+
+
+class Droits:
+    """Groupes d'un utilisateur et règles d'accès du dashboard."""
+
+    def __init__(self, groupes=(), is_superuser=False):
+        self.groupes = frozenset(groupes)
+        self.is_superuser = is_superuser
+
+    @property
+    def is_admin(self):
+        return self.is_superuser or GROUPE_ADMIN in self.groupes
+
+    def appartient(self, *noms_groupes):
+        """Vrai si l'utilisateur est superuser ou membre d'au moins un des groupes."""
+        return self.is_superuser or not self.groupes.isdisjoint(noms_groupes)
+
+
+def _compteurs():
+    # Base principale, jamais la réplique : une version en retard garderait d'anciens droits
+    return Compteur.objects.using(router.db_for_write(Compteur)).filter(nom=VERSION_DROITS)
+
+
+def version_droits():
+    """Version courante des droits (une requête sur une clé unique)."""
+    return _compteurs().values_list('valeur', flat=True).first() or 0
+
+
+def _cle(user_id, version):
+    return f'dashboard:droits:v{version}:{user_id}'
+
+
+def droits_utilisateur(user):
+    """Droits d'un utilisateur, depuis le cache (pour la version courante) ou la base."""
+    if not user.is_authenticated:
+        return Droits()
+    cle = _cle(user.pk, version_droits())
+    groupes = cache.get(cle)
+    if groupes is None:
+        groupes = list(user.groups.values_list('name', flat=True))
+        cache.set(cle, groupes, DUREE_CACHE)
+    return Droits(groupes, user.is_superuser)
+
+
+def droits(request):
+    """Droits de l'utilisateur de la requête, calculés une fois par requête."""
+    if not hasattr(request, '_droits'):
+        request._droits = droits_utilisateur(request.user)
+    return request._droits
+
+
+def invalider_droits():
+    """
+    Rend obsolètes les droits en cache de tous les utilisateurs, dans tous les
+    processus, en changeant la version (appelé par les signaux).
+    """
+    if not _compteurs().update(valeur=F('valeur') + 1):
+        _compteurs().get_or_create(nom=VERSION_DROITS, defaults={'valeur': 1})
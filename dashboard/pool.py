@@ -0,0 +1,242 @@
+"""
+Pool de connexions à la base de données, partagé par les threads d'un processus.
+
+Sans pool, chaque requête HTTP ouvre puis ferme sa connexion (CONN_MAX_AGE=0) :
+poignée de main TCP et authentification à chaque fois. Avec les moteurs
+`dashboard.backends.mysql` et `dashboard.backends.postgresql` (DB_POOL=True),
+fermer une connexion la rend au pool et en ouvrir une en reprend une libre.
+Le nombre de connexions ouvertes est borné ; au-delà, on attend qu'une
+connexion soit rendue, au plus DB_POOL_DELAI secondes.
+
+Avec Django >= 5.1 et psycopg 3, PostgreSQL utilise plutôt le pool natif
+(psycopg_pool) : voir settings.py. `statistiques_pools` renvoie les métriques
+des deux.
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import closing
+from functools import partial
+
+from django.db import OperationalError, connections
+
+# Réglages par défaut (clé POOL de DATABASES)
+TAILLE_POOL = 10
+DELAI_POOL = 10          # secondes d'attente maximale d'une connexion libre
+DUREE_VIE_POOL = 1800    # secondes : les connexions plus anciennes sont renouvelées
+
+
+class PoolConnexions:
+    """Connexions libres (la dernière rendue est reprise en premier) et compteurs."""
+
+    def __init__(self, nom, taille=TAILLE_POOL, delai=DELAI_POOL, duree_vie=DUREE_VIE_POOL):
+        self.nom = nom
+        self.taille = taille
+        self.delai = delai
+        self.duree_vie = duree_vie
+        self._libres = deque()
+        self._creation = {}     # id(connexion) -> date de création
+        self._condition = threading.Condition()
+        self.en_service = 0
+        self.creees = 0
+        self.reutilisees = 0
+        self.attentes = 0
+        self.delais_depasses = 0
+        self.duree_attente = 0.0
+
+    def prendre(self, creer, verifier=None):
+        """
+        Renvoie une connexion libre, ou une nouvelle (`creer()`) si le pool n'est
+        pas plein. `verifier(connexion)` contrôle une connexion libre avant de la
+        rendre (False : elle est fermée et remplacée).
+        """
+        debut_attente = None
+        with self._condition:
+            while not self._libres and self.en_service >= self.taille:
+                if debut_attente is None:
+                    debut_attente = time.monotonic()
+                    self.attentes += 1
+                reste = self.delai - (time.monotonic() - debut_attente)
+                if reste <= 0:
+                    self.delais_depasses += 1
+                    self.duree_attente += time.monotonic() - debut_attente
+                    raise OperationalError(
+                        f"Pool de connexions {self.nom} épuisé : aucune connexion libre "
+                        f"après {self.delai} s ({self.taille} en service)"
+                    )
+                self._condition.wait(reste)
+            if debut_attente is not None:
+                self.duree_attente += time.monotonic() - debut_attente
+            connexion = self._libres.pop() if self._libres else None
+            self.en_service += 1
+
+        try:
+            if connexion is not None and (self._perimee(connexion) or
+                                          (verifier is not None and not verifier(connexion))):
+                self._fermer(connexion)
+                connexion = None
+            if connexion is None:
+                connexion = creer()
+                with self._condition:
+                    self._creation[id(connexion)] = time.monotonic()
+                    self.creees += 1
+            else:
+                with self._condition:
+                    self.reutilisees += 1
+        except BaseException:
+            with self._condition:
+                self.en_service -= 1
+                self._condition.notify()
+            raise
+        return connexion
+
+    def rendre(self, connexion, reutilisable=True):
+        """Remet la connexion dans le pool, ou la ferme si elle n'est plus utilisable."""
+        if not reutilisable or self._perimee(connexion):
+            self._fermer(connexion)
+            connexion = None
+        with self._condition:
+            self.en_service -= 1
+            if connexion is not None:
+                self._libres.append(connexion)
+            self._condition.notify()
+
+    def vider(self):
+        """Ferme les connexions libres (celles en service seront fermées à leur retour)."""
+        with self._condition:
+            libres, self._libres = list(self._libres), deque()
+        for connexion in libres:
+            self._fermer(connexion)
+
+    def statistiques(self):
+        with self._condition:
+            return {
+                'pool': self.nom,
+                'taille': self.taille,
+                'en_service': self.en_service,
+                'libres': len(self._libres),
+                'creees': self.creees,
+                'reutilisees': self.reutilisees,
+                'attentes': self.attentes,
+                'attente_ms': round(self.duree_attente * 1000, 1),
+                'delais_depasses': self.delais_depasses,
+            }
+
+    def _perimee(self, connexion):
+        creation = self._creation.get(id(connexion))
+        return creation is not None and time.monotonic() - creation > self.duree_vie
+
+    def _fermer(self, connexion):
+        with self._condition:
+            self._creation.pop(id(connexion), None)
+        try:
+            connexion.close()
+        except Exception:
+            pass
+
+
+_pools = {}
+_verrou_pools = threading.Lock()
+
+# Après un fork (workers gunicorn), les connexions du parent ne doivent pas être
+# réutilisées ni fermées par l'enfant (fermer enverrait QUIT sur le socket partagé).
+os.register_at_fork(after_in_child=_pools.clear)
+
+
+def pool_pour(settings_dict):
+    """Pool de la base décrite par `settings_dict` (un par base et par processus)."""
+    cle = tuple(str(settings_dict.get(champ)) for champ in ('HOST', 'PORT', 'USER', 'NAME'))
+    with _verrou_pools:
+        if cle not in _pools:
+            reglages = settings_dict.get('POOL') or {}
+            _pools[cle] = PoolConnexions(
+                f"{settings_dict.get('USER')}@{settings_dict.get('HOST') or 'localhost'}/{settings_dict['NAME']}",
+                taille=reglages.get('TAILLE', TAILLE_POOL),
+                delai=reglages.get('DELAI', DELAI_POOL),
+                duree_vie=reglages.get('DUREE_VIE', DUREE_VIE_POOL),
+            )
+        return _pools[cle]
+
+
+def fermer_pools(nom_base=None):
+    """Ferme les connexions libres des pools (de la base `nom_base` seulement si donné)."""
+    with _verrou_pools:
+        pools = [pool for cle, pool in _pools.items() if nom_base is None or cle[-1] == str(nom_base)]
+    for pool in pools:
+        pool.vider()
+
+
+def statistiques_pools():
+    """Métriques des pools de ce processus (pool du projet et pool natif psycopg)."""
+    with _verrou_pools:
+        lignes = [pool.statistiques() for pool in _pools.values()]
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is not None and hasattr(pool, 'get_stats'):
+            # Pool natif psycopg_pool (Django >= 5.1, OPTIONS['pool'])
+            stats = pool.get_stats()
+            lignes.append({
+                'pool': f"{alias} (psycopg_pool)",
+                'taille': pool.max_size,
+                'en_service': stats.get('pool_size', 0) - stats.get('pool_available', 0),
+                'libres': stats.get('pool_available', 0),
+                'creees': stats.get('connections_num', 0),
+                'reutilisees': stats.get('requests_num', 0) - stats.get('connections_num', 0),
+                'attentes': stats.get('requests_queued', 0),
+                'attente_ms': stats.get('requests_wait_ms', 0),
+                'delais_depasses': stats.get('requests_errors', 0),
+            })
+    return lignes
+
+
+# ═══════════════════════════════════════════════════════════════
+# Moteurs de base de données avec pool
+# ═══════════════════════════════════════════════════════════════
+
+class ConnexionsPooleesMixin:
+    """
+    À placer devant le DatabaseWrapper d'un moteur Django : les connexions sont
+    prises dans le pool et y retournent à la fermeture, au lieu d'être ouvertes
+    et fermées à chaque requête.
+    """
+
+    def get_new_connection(self, conn_params):
+        verifier = self.connexion_utilisable if self.settings_dict['CONN_HEALTH_CHECKS'] else None
+        return pool_pour(self.settings_dict).prendre(partial(super().get_new_connection, conn_params), verifier)
+
+    def _close(self):
+        if self.connection is None:
+            return
+        reutilisable = True
+        if self.in_atomic_block or not self.get_autocommit():
+            # Fermeture en pleine transaction : elle est annulée avant de rendre la connexion
+            try:
+                self.connection.rollback()
+            except Exception:
+                reutilisable = False
+        if reutilisable and self.errors_occurred:
+            reutilisable = self.is_usable()
+        pool_pour(self.settings_dict).rendre(self.connection, reutilisable)
+
+    def connexion_utilisable(self, connexion):
+        """
+        Contrôle rapide d'une connexion libre (DB-API) avant de la reprendre :
+        un SELECT 1. Les moteurs peuvent le remplacer par un test plus léger (ping).
+        """
+        try:
+            with closing(connexion.cursor()) as curseur:
+                curseur.execute('SELECT 1')
+            # Hors autocommit, le SELECT a ouvert une transaction : elle est refermée
+            connexion.rollback()
+        except self.Database.Error:
+            return False
+        return True
+
+
+class CreationPooleeMixin:
+    """Ferme les connexions libres vers la base de test avant de la supprimer."""
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        fermer_pools(test_database_name)
+        return super()._destroy_test_db(test_database_name, verbosity)
@@ -0,0 +1,105 @@
+"""
+Routage des lectures des dashboards vers une réplique de la base.
+
+Les vues de consultation (dashboards, tendances, OLAP, listes, exports) sont
+décorées par `lecture_replique` : pendant leur exécution, les lectures des
+tables de ventes vont sur la base `replica` si elle est configurée (variables
+DB_REPLICA_*). Tout le reste reste sur `default` : écritures, imports
+(remplirdb, agrégats), sessions, utilisateurs et admin. Une vue qui vient
+d'écrire ne risque donc pas de relire une donnée pas encore répliquée, pas
+plus que du code dans une transaction ouverte sur `default` (TestCase compris).
+
+Une réplique en retard est contournée : si sa version des données (le Compteur
+incrémenté par chaque import) est inférieure à celle de la base principale, ou
+si elle ne répond pas, les lectures repassent sur `default`. La vérification
+est refaite au plus toutes les DB_REPLICA_VERIFICATION secondes par processus.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+ALIAS_REPLIQUE = 'replica'
+
+# Applications dont les lectures peuvent aller sur la réplique
+APPLICATIONS_REPLIQUEES = {'dashboard'}
+
+journal = logging.getLogger('dashboard.routeurs')
+
+_lecture_replique = ContextVar('lecture_replique', default=False)
+_etat_replique = {'verifie_a': None, 'a_jour': False}
+_verrou = threading.Lock()
+
+
+def replique_configuree():
+    return ALIAS_REPLIQUE in connections.settings
+
+
+@contextmanager
+def lecture_replique():
+    """Les lectures des tables de ventes du bloc peuvent aller sur la réplique."""
+    jeton = _lecture_replique.set(True)
+    try:
+        yield
+    finally:
+        _lecture_replique.reset(jeton)
+
+
+def replique_a_jour():
+    """
+    La réplique a-t-elle la même version des données que la base principale ?
+    Le résultat est gardé DB_REPLICA_VERIFICATION secondes.
+    """
+    delai = getattr(settings, 'DB_REPLICA_VERIFICATION', 5)
+    with _verrou:
+        verifie_a = _etat_replique['verifie_a']
+        if verifie_a is not None and time.monotonic() - verifie_a < delai:
+            return _etat_replique['a_jour']
+        # Un seul thread vérifie ; les autres gardent le résultat précédent en attendant
+        _etat_replique['verifie_a'] = time.monotonic()
+
+    from .cache import VERSION_DONNEES
+    from .models import Compteur
+
+    def version(alias):
+        return (Compteur.objects.using(alias).filter(nom=VERSION_DONNEES)
+                .values_list('valeur', flat=True).first() or 0)
+
+    try:
+        retard = version(DEFAULT_DB_ALIAS) - version(ALIAS_REPLIQUE)
+    except DatabaseError as e:
+        journal.warning("Réplique indisponible, lectures sur la base principale : %s", e)
+        a_jour = False
+    else:
+        a_jour = retard <= 0
+        if not a_jour:
+            journal.info("Réplique en retard de %d version(s), lectures sur la base principale", retard)
+    with _verrou:
+        _etat_replique['a_jour'] = a_jour
+    return a_jour
+
+
+class RouteurLectureEcriture:
+    """Routeur Django (DATABASE_ROUTERS) : voir la documentation du module."""
+
+    def db_for_read(self, model, **hints):
+        if (_lecture_replique.get() and model._meta.app_label in APPLICATIONS_REPLIQUEES
+                and replique_configuree() and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+                and replique_a_jour()):
+            return ALIAS_REPLIQUE
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Les deux bases contiennent les mêmes données
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplique reçoit le schéma par la réplication, pas par migrate
+        return db != ALIAS_REPLIQUE
@@ -0,0 +1,55 @@
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .agregats import rafraichir_commandes
+from .models import Ligne
+from .permissions import invalider_droits
+
+
+@receiver(post_save, sender=Ligne)
+@receiver(post_delete, sender=Ligne)
+def ligne_modifiee(sender, instance, using, **kwargs):
+    """
+    Une ligne modifiée (admin, shell...) : les faits et agrégats de sa commande
+    (et de son ancienne commande) sont mis à jour, puis les graphiques en cache
+    invalidés. Les imports en masse (bulk_create) ne passent pas par ce signal.
+
+    Les lignes touchées sont regroupées par transaction : la suppression d'une
+    commande ou d'un client (cascade sur ses lignes) ne fait qu'une mise à jour,
+    après le commit.
+    """
+    connexion = transaction.get_connection(using)
+    en_attente = getattr(connexion, '_lignes_a_rafraichir', None)
+    if en_attente is None:
+        en_attente = connexion._lignes_a_rafraichir = {'commandes': set(), 'lignes': set()}
+    en_attente['commandes'].add(instance.commande_id)
+    en_attente['lignes'].add(instance.pk)
+    # Un rappel par ligne (simple ajout à une liste) : si le savepoint d'un rappel
+    # est annulé, un autre reste enregistré. Le premier exécuté traite tout.
+    transaction.on_commit(lambda: _rafraichir_lignes(en_attente), using=using)
+
+
+def _rafraichir_lignes(en_attente):
+    if not en_attente['commandes']:
+        return
+    commandes, lignes = set(en_attente['commandes']), set(en_attente['lignes'])
+    en_attente['commandes'].clear()
+    en_attente['lignes'].clear()
+    # Seul le nombre de lignes peut changer : pas de recomptage des autres tables
+    rafraichir_commandes(commandes, lignes=lignes, recompter=False)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def groupes_modifies(sender, action, **kwargs):
+    """Ajout ou retrait de groupes : les droits en cache sont rendus obsolètes."""
+    if action.startswith('post_'):
+        invalider_droits()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def groupe_modifie(sender, **kwargs):
+    """Renommage ou suppression d'un groupe : ses membres perdent l'ancien nom."""
+    invalider_droits()
@@ -0,0 +1,13 @@
+/*
+ * Graphiques Plotly du dashboard : chaque conteneur .graphique-plotly charge
+ * sa figure (JSON) depuis son attribut data-url. plotly.js est servi une seule
+ * fois comme fichier statique et reste en cache dans le navigateur.
+ */
+document.querySelectorAll('.graphique-plotly').forEach(function (conteneur) {
+    fetch(conteneur.dataset.url, {credentials: 'same-origin'})
+        .then(function (reponse) { return reponse.json(); })
+        .then(function (figure) {
+            Plotly.newPlot(conteneur, figure.data, figure.layout,
+                           {responsive: true, displaylogo: false});
+        });
+});
@@ -0,0 +1,29 @@
+// Boutons « Copier » et « Imprimer » des listes DataTables paginées par le serveur.
+// Ils portent sur la page affichée ; les exports complets sont faits par le serveur.
+function boutonsListe(table) {
+    var tableau = $(table.table().node());
+    var boutons = $('<div class="dt-buttons m-b-10"></div>');
+
+    $('<button type="button" class="btn btn-default btn-sm m-r-5">Copier</button>')
+        .on('click', function () {
+            var lignes = tableau.find('thead tr, tbody tr').map(function () {
+                return $(this).children().map(function () {
+                    return $(this).text().trim();
+                }).get().join('\t');
+            }).get();
+            navigator.clipboard.writeText(lignes.join('\n'));
+        })
+        .appendTo(boutons);
+
+    $('<button type="button" class="btn btn-default btn-sm">Imprimer</button>')
+        .on('click', function () {
+            var fenetre = window.open('', '_blank');
+            fenetre.document.title = document.title;
+            $(fenetre.document.body).append(tableau.clone().removeAttr('id').attr('border', 1));
+            fenetre.print();
+            fenetre.close();
+        })
+        .appendTo(boutons);
+
+    $(table.table().container()).prepend(boutons);
+}
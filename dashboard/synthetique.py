@@ -0,0 +1,162 @@
+"""
+Génération de données de ventes synthétiques pour les tests de montée en charge.
+
+Les distributions sont tirées du fichier de référence (data_bd.csv) : catalogue
+de produits et prix unitaires, localités, segments, remises et marges (tirées
+ensemble, comme dans les lignes réelles), quantités, nombre de lignes par
+commande et délais de livraison par mode. Les clients et les commandes sont
+nouveaux (identifiants préfixés SY) et leur nombre suit le volume demandé ; le
+catalogue et les localités restent ceux de la référence, comme dans une vraie
+base qui grossit.
+
+Pour une même graine, les lignes produites sont identiques d'une exécution à
+l'autre. Le fichier écrit a le format lu par `remplirdb`.
+"""
+import csv
+import random
+from array import array
+from bisect import bisect
+from collections import Counter, defaultdict, namedtuple
+from datetime import date, timedelta
+from itertools import accumulate
+
+from .export import COLONNES_EXPORT
+from .importation import lire_csv, nombre
+
+FICHIER_REFERENCE = "DjangoProject/data/data_bd.csv"
+
+# Nombre moyen de lignes de commande par client dans la référence (~9 994 / 793)
+LIGNES_PAR_CLIENT = 12
+
+Modele = namedtuple('Modele', 'produit prix_unitaire remise marge')
+
+
+class Tirage:
+    """Tirage pondéré rapide parmi les valeurs observées (avec leurs effectifs)."""
+
+    def __init__(self, effectifs):
+        self.valeurs = list(effectifs)
+        self.cumuls = list(accumulate(effectifs.values()))
+
+    def __call__(self, alea):
+        return self.valeurs[bisect(self.cumuls, alea.random() * self.cumuls[-1])]
+
+
+def _decimal(valeur):
+    """Montant au format du fichier ('261,96'), 4 décimales au plus comme la référence."""
+    return f"{valeur:.4f}".rstrip('0').rstrip('.').replace('.', ',')
+
+
+class GenerateurVentes:
+    """
+    Produit des lignes de fichier de ventes (dictionnaires, colonnes de data_bd.csv).
+
+    `reference` : fichier dont les distributions sont reprises.
+    `annee_debut`, `annees` : période couverte par les dates de commande.
+    """
+
+    def __init__(self, reference=FICHIER_REFERENCE, graine=0, annee_debut=2014, annees=4):
+        self.graine = graine
+        self.debut = date(annee_debut, 1, 1)
+        self.nb_jours = (date(annee_debut + annees, 1, 1) - self.debut).days
+
+        produits, localites, modeles = {}, {}, []
+        segments, quantites, modes = Counter(), Counter(), Counter()
+        delais = defaultdict(Counter)
+        lignes_commande, noms = Counter(), set()
+        for row in lire_csv(reference):
+            produits[row['ID_Produit']] = (row['Categorie'], row['Sous_Categorie'], row['Nom_Produit'])
+            localites[row['Code_postal']] = (row['Ville'], row['Etat'], row['Region'])
+            quantite, ventes, remise = int(row['Quantite']), nombre(row['Ventes']), nombre(row['Remise'])
+            # Prix catalogue avant remise, et marge (bénéfice / ventes) observée avec cette remise
+            modeles.append(Modele(row['ID_Produit'], ventes / quantite / (1 - remise), row['Remise'],
+                                  nombre(row['Benefice']) / ventes if ventes else 0.0))
+            segments[row['Segment']] += 1
+            quantites[quantite] += 1
+            lignes_commande[row['ID_Commande']] += 1
+            noms.add(row['Nom_Client'])
+            if row['ID_Commande'] not in delais[row['Mode_Livraison']]:
+                modes[row['Mode_Livraison']] += 1
+            delais[row['Mode_Livraison']][row['ID_Commande']] = (
+                date.fromisoformat(row['Date_Livraison']) - date.fromisoformat(row['Date_Commande'])).days
+        if not modeles:
+            raise ValueError(f"Fichier de référence vide : {reference}")
+
+        self.produits = produits
+        self.modeles = modeles
+        self.codes_postaux = sorted(localites)
+        self.localites = localites
+        self.segments = Tirage(segments)
+        self.quantites = Tirage(quantites)
+        self.modes = Tirage(modes)
+        self.delais = {mode: Tirage(Counter(jours.values())) for mode, jours in delais.items()}
+        self.tailles_commande = Tirage(Counter(lignes_commande.values()))
+        noms = sorted(noms)
+        self.prenoms = sorted({nom.split(' ', 1)[0] for nom in noms})
+        self.noms = sorted({nom.split(' ', 1)[-1] for nom in noms})
+
+    def lignes(self, nb_lignes):
+        """Génère `nb_lignes` lignes de commande (en flux, mémoire bornée par le nombre de clients)."""
+        alea = random.Random(self.graine)
+        nb_clients = max(1, nb_lignes // LIGNES_PAR_CLIENT)
+        # Clients : indices compacts (prénom, nom, segment, localité) plutôt que des dictionnaires
+        segments = self.segments.valeurs
+        clients = [array('I', (alea.randrange(len(valeurs)) for _ in range(nb_clients)))
+                   for valeurs in (self.prenoms, self.noms, self.codes_postaux)]
+        clients.append(array('B', (segments.index(self.segments(alea)) for _ in range(nb_clients))))
+        prenoms, noms, codes, segment_client = clients
+
+        produites = numero_commande = 0
+        while produites < nb_lignes:
+            numero_commande += 1
+            client = alea.randrange(nb_clients)
+            date_commande = self.debut + timedelta(days=alea.randrange(self.nb_jours))
+            mode = self.modes(alea)
+            date_livraison = date_commande + timedelta(days=self.delais[mode](alea))
+            code = self.codes_postaux[codes[client]]
+            ville, etat, region = self.localites[code]
+            commande = {
+                'ID_Commande': f"SY-{date_commande.year}-{numero_commande:08d}",
+                'Date_Commande': date_commande.isoformat(),
+                'Date_Livraison': date_livraison.isoformat(),
+                'Mode_Livraison': mode,
+                'ID_Client': f"SY-{client:06d}",
+                'Nom_Client': f"{self.prenoms[prenoms[client]]} {self.noms[noms[client]]}",
+                'Segment': segments[segment_client[client]],
+                'Ville': ville, 'Etat': etat, 'Code_postal': code, 'Region': region,
+            }
+            # Un produit au plus une fois par commande (clé commande + produit de l'import incrémental)
+            taille = min(self.tailles_commande(alea), nb_lignes - produites)
+            vus = set()
+            for _ in range(taille):
+                modele = self.modeles[alea.randrange(len(self.modeles))]
+                if modele.produit in vus:
+                    continue
+                vus.add(modele.produit)
+                categorie, sous_categorie, nom_produit = self.produits[modele.produit]
+                quantite = self.quantites(alea)
+                ventes = modele.prix_unitaire * quantite * (1 - nombre(modele.remise))
+                yield {
+                    **commande,
+                    'ID_Produit': modele.produit,
+                    'Categorie': categorie,
+                    'Sous_Categorie': sous_categorie,
+                    'Nom_Produit': nom_produit,
+                    'Ventes': _decimal(ventes),
+                    'Quantite': str(quantite),
+                    'Remise': modele.remise,
+                    'Benefice': _decimal(ventes * modele.marge),
+                }
+                produites += 1
+
+
+def ecrire_csv(chemin, lignes):
+    """Écrit les lignes au format de data_bd.csv (séparateur ;, utf-8). Renvoie leur nombre."""
+    nombre_lignes = 0
+    with open(chemin, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=[c.titre for c in COLONNES_EXPORT], delimiter=';')
+        writer.writeheader()
+        for row in lignes:
+            writer.writerow(row)
+            nombre_lignes += 1
+    return nombre_lignes
@@ -0,0 +1,25 @@
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+from dashboard.assets import BUNDLES, manifeste
+
+register = template.Library()
+
+BALISES = {
+    '.css': '<link href="{}" rel="stylesheet">\n',
+    '.js': '<script src="{}"></script>\n',
+}
+
+
+@register.simple_tag
+def bundle(nom):
+    """
+    Inclut le bundle `nom` de dashboard/assets.py : le fichier construit par
+    `construire_assets` si DASHBOARD_BUNDLES est vrai, sinon ses fichiers sources.
+    """
+    balise = BALISES[nom[nom.rindex('.'):]]
+    construit = manifeste().get(nom) if getattr(settings, 'DASHBOARD_BUNDLES', False) else None
+    chemins = [construit] if construit else BUNDLES[nom]
+    return format_html_join('', balise, ((static(chemin),) for chemin in chemins))
@@ -1,3 +1,600 @@
-from django.test import TestCase
+import base64
+import json
+import logging
+import sqlite3
+from contextlib import contextmanager, nullcontext
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
-# Create your tests here.
+import numpy
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User, Group
+from django.core.management import call_command
+from django.db import OperationalError, connection, transaction
+from django.db.backends.sqlite3 import base as sqlite3_base
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from .agregats import DIMENSIONS, compteur, rafraichir_agregats, rafraichir_commandes
+from .assets import BUNDLES, construire
+from .asynchrone import en_parallele
+from .cache import graphique_en_cache
+from .importation import ChargeurVentes, importer_en_parallele, importer_incremental, lire_fichier, nombre
+from .instrumentation import InstrumentationMiddleware
+from .management.commands.bench_dashboard import (
+    Command as BenchDashboard, enregistrer_reference, lire_references,
+)
+from .management.commands.expliquer_requetes import REQUETES
+from .models import (
+    Compteur, Client, Localite, Produit, Commande, Ligne, FaitVente, PointReprise, AgregatJour,
+    AgregatSegment,
+)
+from .permissions import droits_utilisateur
+from .pool import ConnexionsPooleesMixin, PoolConnexions
+from .routeurs import ALIAS_REPLIQUE, RouteurLectureEcriture, lecture_replique, replique_configuree
+from .synthetique import GenerateurVentes, ecrire_csv
+from .views import dashboard_2_async
+
+
+class BudgetRequetesMixin:
+    """
+    Vérifie qu'un bloc de code ne dépasse pas un nombre maximal de requêtes SQL.
+    Un N+1 réintroduit dans une vue fait échouer le test correspondant.
+    """
+
+    @contextmanager
+    def assertMaxRequetes(self, maximum):
+        with CaptureQueriesContext(connection) as contexte:
+            yield contexte
+        nombre = len(contexte.captured_queries)
+        if nombre > maximum:
+            requetes = "\n".join(f"{i}. {q['sql']}" for i, q in enumerate(contexte.captured_queries, 1))
+            self.fail(f"{nombre} requêtes exécutées (maximum {maximum}) :\n{requetes}")
+
+
+class DonneesVentesMixin:
+    """Jeu de données minimal : 3 commandes de 10 lignes chacune."""
+
+    NB_LIGNES = 30
+
+    @classmethod
+    def setUpTestData(cls):
+        localite = Localite.objects.create(locCodePostal=42420, locVille='Henderson',
+                                           locEtat='Kentucky', locRegion='South')
+        for i in range(3):
+            client = Client.objects.create(cltId=f'CL-{i}', cltNom=f'Client {i}', cltSegment='Consumer')
+            commande = Commande.objects.create(comID=f'CA-{i}', comDate=date(2016, 11, i + 1),
+                                               comDateLivraison=date(2016, 11, i + 5),
+                                               comModeLivraison='Second Class')
+            for j in range(10):
+                produit, _ = Produit.objects.get_or_create(
+                    prodId=f'FUR-{j}',
+                    defaults={'prodNom': f'Produit {j}', 'prodCategorie': 'Furniture',
+                              'prodSousCategorie': 'Chairs'},
+                )
+                Ligne.objects.create(commande=commande, produit=produit, client=client,
+                                     localite=localite, ligQuantite=j + 1, ligPrix=10.5 * (j + 1))
+        rafraichir_agregats()
+
+        groupe = Group.objects.create(name='Administrateurs')
+        cls.utilisateur = User.objects.create_user('admin_test', password='Admin@123', is_staff=True,
+                                                   is_superuser=True)
+        cls.utilisateur.groups.add(groupe)
+
+    def setUp(self):
+        self.client.force_login(self.utilisateur)
+
+
+class BudgetRequetesVuesTests(BudgetRequetesMixin, DonneesVentesMixin, TestCase):
+    """Le nombre de requêtes par vue ne doit pas dépendre du nombre de lignes."""
+
+    def test_dashboard_1(self):
+        with self.assertMaxRequetes(12):
+            self.assertEqual(self.client.get(reverse('dashboard:dashboard_1')).status_code, 200)
+
+    def test_dashboard_2(self):
+        with self.assertMaxRequetes(10):
+            self.assertEqual(self.client.get(reverse('dashboard:dashboard_2')).status_code, 200)
+
+    def test_graphique_json(self):
+        url = reverse('dashboard:graphique', args=['quantite_par_region'])
+        with self.assertMaxRequetes(10):
+            reponse = self.client.get(url)
+        self.assertEqual(reponse['Content-Type'], 'application/json')
+        self.assertIn('data', reponse.json())
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=reponse['ETag']).status_code, 304)
+
+    def test_segmentliste(self):
+        with self.assertMaxRequetes(10):
+            self.client.get(reverse('dashboard:segmentliste', args=['Consumer']))
+
+    def test_segmentliste_donnees(self):
+        url = reverse('dashboard:segmentliste_donnees', args=['Consumer'])
+        with self.assertMaxRequetes(10):
+            reponse = self.client.get(url, {'draw': 1, 'start': 0, 'length': 25,
+                                            'search[value]': 'Produit'})
+        donnees = reponse.json()
+        self.assertEqual(donnees['recordsTotal'], self.NB_LIGNES)
+        self.assertEqual(len(donnees['data']), 25)
+
+    def test_tendances_donnees(self):
+        url = reverse('dashboard:tendances_donnees')
+        with self.assertMaxRequetes(10):
+            reponse = self.client.get(url, {'granularite': 'mois', 'segment': 'Consumer'})
+        courbes = reponse.json()['data']
+        self.assertEqual(courbes[0]['x'], ['2016-11-01'])
+        self.assertEqual(courbes[0]['y'], [1732.5])
+        self.assertEqual(self.client.get(url, {'granularite': 'annee'}).status_code, 400)
+
+    def test_olap(self):
+        url = reverse('dashboard:olap')
+        with self.assertMaxRequetes(10):
+            reponse = self.client.get(url, {'dimensions': 'region,segment', 'mesures': 'ventes:sum,quantite:avg',
+                                            'annee': '2016', 'limite': 5})
+        self.assertEqual(reponse.json()['lignes'], [
+            {'region': 'South', 'segment': 'Consumer', 'ventes_sum': 1732.5, 'quantite_avg': 5.5},
+        ])
+        self.assertEqual(self.client.get(url, {'dimensions': 'cltNom'}).status_code, 400)
+
+    def test_export_csv_en_flux(self):
+        url = reverse('dashboard:export_lignes', args=['csv'])
+        with self.assertMaxRequetes(12):
+            reponse = self.client.get(url, {'segment': 'Consumer'})
+            lignes = b''.join(reponse.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(lignes), self.NB_LIGNES + 1)
+        self.assertTrue(lignes[0].startswith('ID_Commande;Date_Commande;'))
+        self.assertEqual(reponse['Content-Disposition'], 'attachment; filename="lignes_consumer.csv"')
+        self.assertEqual(self.client.get(url, {'segment': 'Particulier'}).status_code, 400)
+
+        # Seuls les filtres validés entrent dans le nom du fichier
+        reponse = self.client.get(url, {'region': 'South', 'debut': '2016-11-01', 'x': '"\r\nSet-Cookie: a=b'})
+        self.assertEqual(reponse['Content-Disposition'], 'attachment; filename="lignes_south_2016-11-01.csv"')
+
+    def test_suppression_commande_une_seule_mise_a_jour(self):
+        # Cascade sur 10 lignes : agrégats mis à jour une fois, après le commit
+        with self.assertMaxRequetes(35), self.captureOnCommitCallbacks(execute=True):
+            Commande.objects.get(comID='CA-0').delete()
+        self.assertEqual(compteur('lignes'), self.NB_LIGNES - 10)
+        self.assertEqual(AgregatSegment.objects.get(segment='Consumer').nb_lignes, self.NB_LIGNES - 10)
+
+    def test_admin_ligne_changelist(self):
+        with self.assertMaxRequetes(12):
+            reponse = self.client.get(reverse('admin:dashboard_ligne_changelist'))
+        self.assertEqual(reponse.status_code, 200)
+
+    def test_admin(self):
+        pages = [reverse(f'admin:dashboard_{modele}_changelist')
+                 for modele in ('client', 'localite', 'produit', 'commande')]
+        pages += [
+            reverse('admin:auth_user_changelist'),
+            reverse('admin:dashboard_commande_changelist') + '?comDate__year=2016&comDate__month=11',
+            reverse('admin:dashboard_ligne_changelist') + '?q=CA-1',
+            reverse('admin:dashboard_ligne_change', args=[Ligne.objects.first().pk]),
+            reverse('admin:autocomplete') + '?term=Produit&app_label=dashboard&model_name=ligne&field_name=produit',
+        ]
+        for url in pages:
+            with self.subTest(url=url), self.assertMaxRequetes(12):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_admin_nombre_de_lignes_estime(self):
+        url = reverse('admin:dashboard_ligne_changelist')
+        with mock.patch('dashboard.admin.lignes_estimees', return_value=5_000_000):
+            self.assertEqual(self.client.get(url).context['cl'].result_count, 5_000_000)
+            # Avec une recherche, le compte est exact
+            self.assertEqual(self.client.get(url, {'q': 'CA-1'}).context['cl'].result_count, 10)
+
+    def test_ligne_str_sans_requete(self):
+        ligne = Ligne.objects.first()
+        with self.assertNumQueries(0):
+            str(ligne)
+
+
+class CacheGraphiquesTests(DonneesVentesMixin, TestCase):
+
+    def test_graphique_reconstruit_apres_modification_ligne(self):
+        appels = []
+
+        def construire():
+            appels.append(1)
+            return '<div>graphique</div>'
+
+        graphique_en_cache('test', construire)
+        graphique_en_cache('test', construire)
+        self.assertEqual(len(appels), 1)
+
+        ligne = Ligne.objects.first()
+        ligne.ligQuantite += 1
+        with self.captureOnCommitCallbacks(execute=True):
+            ligne.save()
+        graphique_en_cache('test', construire)
+        self.assertEqual(len(appels), 2)
+
+    def test_donnees_graphique_a_jour_apres_modification_ligne(self):
+        url = reverse('dashboard:graphique', args=['quantite_par_region'])
+
+        def quantite_totale():
+            valeurs = self.client.get(url).json()['data'][0]['values']
+            if isinstance(valeurs, dict):
+                # Tableau typé de plotly >= 6 : {'dtype': 'i2', 'bdata': <base64>}
+                valeurs = numpy.frombuffer(base64.b64decode(valeurs['bdata']), dtype=valeurs['dtype'])
+            return int(sum(valeurs))
+
+        self.assertEqual(quantite_totale(), 165)
+        ligne = Ligne.objects.first()
+        ligne.ligQuantite += 5
+        with self.captureOnCommitCallbacks(execute=True):
+            ligne.save()
+        self.assertEqual(quantite_totale(), 170)
+        with self.captureOnCommitCallbacks(execute=True):
+            ligne.delete()
+        self.assertEqual(quantite_totale(), 170 - ligne.ligQuantite)
+
+
+class DroitsTests(DonneesVentesMixin, TestCase):
+
+    def test_groupes_lus_une_fois_puis_invalides(self):
+        utilisateur = User.objects.create_user('standard_test', password='Admin@123')
+        self.assertFalse(droits_utilisateur(utilisateur).is_admin)
+        with self.assertNumQueries(1):   # version des droits seulement
+            droits_utilisateur(utilisateur)
+
+        utilisateur.groups.add(Group.objects.get(name='Administrateurs'))
+        self.assertTrue(droits_utilisateur(utilisateur).is_admin)
+
+    def test_retrait_visible_des_autres_processus(self):
+        administrateurs = Group.objects.get(name='Administrateurs')
+        utilisateur = User.objects.create_user('admin_2', password='Admin@123')
+        utilisateur.groups.add(administrateurs)
+        self.assertTrue(droits_utilisateur(utilisateur).is_admin)
+        # Comme dans un autre worker : l'entrée en cache de ce processus n'est pas supprimée
+        with mock.patch('dashboard.permissions.cache.delete_many'):
+            administrateurs.user_set.remove(utilisateur)
+        self.assertFalse(droits_utilisateur(utilisateur).is_admin)
+
+
+class SessionActiviteTests(DonneesVentesMixin, TestCase):
+
+    def test_pages_consultees_sans_ecriture_de_session(self):
+        url = reverse('dashboard:dashboard_2')
+        self.client.get(url)  # première requête : last_activity enregistré
+        reponse = self.client.get(url)
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, reponse.cookies)
+
+
+@override_settings(DASHBOARD_SERVER_TIMING=True)
+class InstrumentationTests(DonneesVentesMixin, TestCase):
+
+    def test_server_timing_et_metriques(self):
+        reponse = self.client.get(reverse('dashboard:graphique', args=['quantite_par_region']))
+        self.assertRegex(reponse['Server-Timing'], r'^sql;dur=[\d.]+;desc="\d+ requetes", .*total;dur=')
+        vues = {ligne['vue']: ligne for ligne in self.client.get(reverse('dashboard:metriques')).json()['vues']}
+        self.assertIn('figure', vues['dashboard:graphique']['sections_p50_ms'])
+
+    async def test_middleware_asynchrone(self):
+        self.assertTrue(iscoroutinefunction(InstrumentationMiddleware(self._vue_async)))
+        await sync_to_async(self.async_client.force_login)(self.utilisateur)
+        with self.assertLogs('django.request', 'DEBUG') as journaux:
+            reponse = await self.async_client.get(reverse('dashboard:graphique', args=['quantite_par_region']))
+            logging.getLogger('django.request').debug('fin de la requête')
+        self.assertIn('Server-Timing', reponse)
+        # Pas de conversion async -> sync pour ce middleware sous ASGI
+        self.assertFalse([ligne for ligne in journaux.output if 'InstrumentationMiddleware' in ligne])
+
+    @staticmethod
+    async def _vue_async(request):
+        return None
+
+
+class AgregatsTests(DonneesVentesMixin, TestCase):
+
+    def test_faits_et_montants_exacts(self):
+        self.assertEqual(FaitVente.objects.count(), self.NB_LIGNES)
+        fait = FaitVente.objects.get(id=Ligne.objects.first().id)
+        self.assertEqual((fait.segment, fait.region, fait.annee), ('Consumer', 'South', 2016))
+        self.assertEqual(AgregatSegment.objects.get(segment='Consumer').ventes, Decimal('1732.5'))
+
+    maxDiff = None
+
+    def test_mise_a_jour_ciblee_identique_au_recalcul_complet(self):
+        def etat():
+            tables = {modele.__name__: sorted(modele.objects.values_list(
+                *DIMENSIONS[modele], 'nb_lignes', 'quantite', 'ventes', 'benefice'))
+                for modele in DIMENSIONS}
+            return tables, sorted(Compteur.objects.exclude(nom='version_donnees').values_list('nom', 'valeur'))
+
+        Ligne.objects.filter(commande_id='CA-0', produit_id='FUR-0').update(ligQuantite=7, ligPrix=99.25)
+        supprimee = Ligne.objects.filter(commande_id='CA-1').first().id
+        Ligne.objects.filter(id=supprimee).delete()
+        # Nouvelle commande, nouveau segment et nouvelle région
+        Ligne.objects.filter(commande_id='CA-2').delete()
+        client = Client.objects.create(cltId='CL-9', cltNom='Client 9', cltSegment='Corporate')
+        commande = Commande.objects.create(comID='CA-9', comDate=date(2017, 1, 3),
+                                           comDateLivraison=date(2017, 1, 5), comModeLivraison='First Class')
+        localite = Localite.objects.create(locCodePostal=10001, locVille='New York', locEtat='New York',
+                                           locRegion='East')
+        Ligne.objects.create(commande=commande, produit_id='FUR-3', client=client, localite=localite,
+                             ligQuantite=2, ligPrix=12.3456, ligBenefice=-1.5)
+
+        rafraichir_commandes(['CA-0', 'CA-2', 'CA-9'], lignes=[supprimee])
+        cible = etat()
+        rafraichir_agregats()
+        self.assertEqual(cible, etat())
+        self.assertFalse(AgregatJour.objects.filter(jour=date(2016, 11, 3)).exists())
+
+
+class ExpliquerRequetesTests(DonneesVentesMixin, TestCase):
+
+    def test_plans_des_requetes_des_vues(self):
+        sortie = StringIO()
+        call_command('expliquer_requetes', stdout=sortie)
+        for nom in REQUETES:
+            self.assertIn(nom, sortie.getvalue())
+        self.assertNotIn('✗', sortie.getvalue())
+
+
+class BenchReferenceTests(SimpleTestCase):
+
+    def test_reference_creee_puis_comparee(self):
+        mesures = {'10000': {'import_lignes_s': 20000, 'agregats_s': 0.5, 'vues': {
+            'dashboard_1': {'froid_ms': 40.0, 'chaud_ms': 4.0, 'requetes': 6, 'memoire_ko': 300},
+        }}}
+        with TemporaryDirectory() as dossier:
+            chemin = Path(dossier) / 'data' / 'bench_reference.json'
+            self.assertEqual(lire_references(chemin), {})
+            enregistrer_reference(chemin, 'mysql', {'10000': {}})
+            enregistrer_reference(chemin, 'sqlite', mesures)
+            references = lire_references(chemin)
+        self.assertEqual(set(references), {'mysql', 'sqlite'})
+
+        reference = references['sqlite']
+        self.assertEqual(list(BenchDashboard._regressions(reference, mesures, 0.25)), [])
+        plus_lent = json.loads(json.dumps(mesures))
+        plus_lent['10000']['vues']['dashboard_1'].update(froid_ms=80.0, requetes=7)
+        self.assertEqual(len(list(BenchDashboard._regressions(reference, plus_lent, 0.25))), 2)
+
+
+class DonneesSynthetiquesTests(TestCase):
+
+    def test_generation_deterministe_et_importable(self):
+        lignes = list(GenerateurVentes(graine=7).lignes(500))
+        self.assertEqual(lignes, list(GenerateurVentes(graine=7).lignes(500)))
+        chargeur = ChargeurVentes(journal=lambda message: None)
+        self.assertEqual(chargeur.charger(iter(lignes)), 500)
+        self.assertEqual(chargeur.erreurs, 0)
+
+
+class FichiersVentesMixin:
+    """Petits fichiers de ventes synthétiques (CSV, XLSX) écrits dans un dossier temporaire."""
+
+    NB_LIGNES = 120
+
+    def setUp(self):
+        super().setUp()
+        dossier = TemporaryDirectory()
+        self.addCleanup(dossier.cleanup)
+        self.dossier = Path(dossier.name)
+        self.lignes = list(GenerateurVentes(graine=3).lignes(self.NB_LIGNES))
+
+    def csv(self, lignes, nom='ventes.csv'):
+        ecrire_csv(self.dossier / nom, lignes)
+        return str(self.dossier / nom)
+
+    def xlsx(self, lignes, nom='ventes.xlsx'):
+        from openpyxl import Workbook
+        classeur = Workbook(write_only=True)
+        feuille = classeur.create_sheet()
+        feuille.append(list(lignes[0]))
+        for row in lignes:
+            # Cellules typées comme dans un classeur saisi : dates, nombres
+            feuille.append([
+                date.fromisoformat(v) if c.startswith('Date_')
+                else nombre(v) if c in ('Ventes', 'Remise', 'Benefice')
+                else int(v) if c in ('Quantite', 'Code_postal') else v
+                for c, v in row.items()
+            ])
+        classeur.save(self.dossier / nom)
+        return str(self.dossier / nom)
+
+
+class ImportationTests(FichiersVentesMixin, TestCase):
+
+    def importer(self, chemin):
+        return importer_incremental(chemin, taille_lot=50, journal=self.messages.append)
+
+    def setUp(self):
+        super().setUp()
+        self.messages = []
+
+    def test_reimport_incremental_sans_doublon(self):
+        chemin = self.csv(self.lignes)
+        call_command('remplirdb', chemin, '--incremental', stdout=StringIO())
+        PointReprise.objects.all().delete()
+        chargeur = self.importer(chemin)
+        self.assertEqual((chargeur.lignes_creees, chargeur.lignes_modifiees), (0, 0))
+        self.assertEqual(chargeur.lignes_inchangees, self.NB_LIGNES)
+        self.assertEqual(Ligne.objects.count(), self.NB_LIGNES)
+        self.assertEqual(FaitVente.objects.count(), self.NB_LIGNES)
+
+    def test_ligne_modifiee_mise_a_jour(self):
+        call_command('remplirdb', self.csv(self.lignes), '--incremental', stdout=StringIO())
+        modifiee = self.lignes[5]
+        modifiee.update({'Quantite': '9', 'Ventes': '123,45', 'Remise': '0,2'})
+        sortie = StringIO()
+        call_command('remplirdb', self.csv(self.lignes), '--incremental', stdout=sortie)
+        self.assertIn('Lignes modifiées : 1', sortie.getvalue())
+
+        ligne = Ligne.objects.get(commande_id=modifiee['ID_Commande'], produit_id=modifiee['ID_Produit'])
+        self.assertEqual((ligne.ligQuantite, ligne.ligPrix, ligne.ligRemise), (9, 123.45, 0.2))
+        self.assertEqual(Ligne.objects.count(), self.NB_LIGNES)
+        fait = FaitVente.objects.get(id=ligne.id)
+        self.assertEqual((fait.quantite, fait.prix_x10000), (9, 1234500))
+
+    def test_reprise_apres_point_de_reprise(self):
+        self.importer(self.csv(self.lignes[:80]))
+        reprise = PointReprise.objects.get()
+
+        chemin = self.csv(self.lignes)   # 40 lignes ajoutées à la fin du même fichier
+        chargeur = self.importer(chemin)
+        self.assertIn(f"Reprise à l'octet {reprise.position} ", ' | '.join(self.messages))
+        self.assertEqual((chargeur.lignes_lues, chargeur.lignes_creees), (40, 40))
+        self.assertEqual(Ligne.objects.count(), self.NB_LIGNES)
+        self.assertEqual(PointReprise.objects.get().position, Path(chemin).stat().st_size)
+
+        self.assertEqual(self.importer(chemin).lignes_lues, 0)
+        self.assertIn("Aucune nouvelle ligne depuis le dernier import", self.messages)
+
+    def test_xlsx_en_flux(self):
+        chemin = self.xlsx(self.lignes)
+        lignes = lire_fichier(chemin)
+        self.assertIs(iter(lignes), lignes)   # générateur : le classeur est lu à la demande
+        premiere = next(lignes)
+        self.assertEqual(premiere['ID_Commande'], self.lignes[0]['ID_Commande'])
+        self.assertEqual(premiere['Date_Commande'].date(), date.fromisoformat(self.lignes[0]['Date_Commande']))
+        self.assertEqual(1 + sum(1 for _ in lignes), self.NB_LIGNES)
+        lignes.close()
+
+        chargeur = self.importer(chemin)
+        self.assertEqual((chargeur.lignes_creees, chargeur.erreurs), (self.NB_LIGNES, 0))
+        # Les montants Excel (flottants) ne comptent pas comme des modifications
+        PointReprise.objects.all().delete()
+        self.assertEqual(self.importer(chemin).lignes_inchangees, self.NB_LIGNES)
+
+
+class ImportationParalleleTests(FichiersVentesMixin, TransactionTestCase):
+
+    def test_meme_nombre_de_lignes_qu_en_sequentiel(self):
+        chemins = [self.csv(self.lignes[:70], 'a.csv'), self.csv(self.lignes[70:], 'b.csv')]
+        ChargeurVentes(journal=lambda message: None).charger(
+            row for chemin in chemins for row in lire_fichier(chemin))
+        sequentiel = Ligne.objects.count()
+        Ligne.objects.all().delete()
+
+        pool = nullcontext()
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            # Base de test en mémoire, invisible des autres processus : un thread
+            # à la place (SQLite verrouille la base pour des écritures concurrentes)
+            pool = mock.patch('dashboard.importation.ProcessPoolExecutor',
+                              lambda max_workers, initializer: ThreadPoolExecutor(1, initializer=initializer))
+        messages = []
+        with pool:
+            bilan = importer_en_parallele(chemins, 2, taille_lot=25, taille_tranche=2048,
+                                          journal=messages.append)
+        self.assertEqual(sequentiel, self.NB_LIGNES)
+        self.assertEqual((bilan.lignes_creees, bilan.erreurs), (sequentiel, 0))
+        self.assertEqual(Ligne.objects.count(), sequentiel)
+        # Progression des processus transmise au journal de l'appelant
+        self.assertTrue(any(message.startswith('[a.csv@') for message in messages))
+
+
+class RoutageRepliqueTests(TransactionTestCase):
+    # Avec DB_REPLICA_* renseignées, la réplique est un miroir de la base de test
+    databases = '__all__'
+
+    def test_seules_les_lectures_des_vues_vont_sur_la_replique(self):
+        Localite.objects.create(locCodePostal=42420, locVille='Henderson', locEtat='Kentucky',
+                                locRegion='South')
+        routeur = RouteurLectureEcriture()
+        replique = ALIAS_REPLIQUE if replique_configuree() else 'default'
+        self.assertEqual(routeur.db_for_read(Localite), 'default')
+        with lecture_replique():
+            self.assertEqual(routeur.db_for_read(Localite), replique)
+            self.assertEqual(Localite.objects.get().locVille, 'Henderson')
+            self.assertEqual(routeur.db_for_read(User), 'default')
+            self.assertEqual(routeur.db_for_write(Localite), 'default')
+            with transaction.atomic():
+                # Lire ses propres écritures : transaction ouverte, base principale
+                self.assertEqual(routeur.db_for_read(Localite), 'default')
+
+
+class PoolConnexionsTests(SimpleTestCase):
+
+    class FausseConnexion:
+        fermee = False
+
+        def close(self):
+            self.fermee = True
+
+    def test_reutilisation_attente_et_delai(self):
+        pool = PoolConnexions('test', taille=1, delai=0.05)
+        connexion = pool.prendre(self.FausseConnexion)
+        with self.assertRaises(OperationalError):
+            pool.prendre(self.FausseConnexion)
+        pool.rendre(connexion)
+        self.assertIs(pool.prendre(self.FausseConnexion), connexion)
+        pool.rendre(connexion, reutilisable=False)
+        self.assertTrue(connexion.fermee)
+        self.assertLessEqual({'en_service': 0, 'libres': 0, 'creees': 1, 'reutilisees': 1, 'attentes': 1,
+                              'delais_depasses': 1}.items(), pool.statistiques().items())
+
+    def test_controle_par_defaut_select_1(self):
+        class Moteur(ConnexionsPooleesMixin, sqlite3_base.DatabaseWrapper):
+            pass
+
+        moteur = Moteur({**connection.settings_dict, 'NAME': ':memory:'})
+        connexion = sqlite3.connect(':memory:')
+        self.assertTrue(moteur.connexion_utilisable(connexion))
+        connexion.close()
+        self.assertFalse(moteur.connexion_utilisable(connexion))
+
+
+class DemarrageTests(SimpleTestCase):
+
+    def test_pas_de_plotly_ni_pandas_au_demarrage(self):
+        # Budget large : seul l'import paresseux des bibliothèques lourdes est vérifié ici
+        call_command('budget_imports', '--repetitions', '1', '--budget', '10000', stdout=StringIO())
+
+
+class AssetsTests(SimpleTestCase):
+
+    @mock.patch.dict(BUNDLES, {'essai.css': ['css/style.css'], 'essai.js': ['js/waves.js', 'js/graphiques.js']})
+    def test_construction_des_bundles(self):
+        with TemporaryDirectory() as dossier:
+            details = construire(['essai.css', 'essai.js'], dossier)
+            manifeste = json.loads((Path(dossier) / 'manifest.json').read_text())
+            self.assertEqual(manifeste['essai.js'], f"assets/{details['essai.js']['fichier']}")
+            self.assertRegex(details['essai.js']['fichier'], r'^essai\.[0-9a-f]{12}\.js$')
+            self.assertIn('.gz', details['essai.css']['variantes'])
+
+            css = (Path(dossier) / details['essai.css']['fichier']).read_text()
+            # @import locaux inclus, police Google retirée, url() relatives à static/assets/
+            self.assertNotIn('@import', css)
+            self.assertIn('materialdesignicons-webfont.woff2', css)
+            self.assertIn('../css/icons/material-design-iconic-font/fonts/', css)
+            self.assertEqual(len(details['essai.css']['externes']), 1)
+
+            # Contenu identique : même nom de fichier
+            self.assertEqual(construire(['essai.js'], dossier)['essai.js']['fichier'], details['essai.js']['fichier'])
+
+    def test_balise_bundle(self):
+        gabarit = Template("{% load assets %}{% bundle 'listes.js' %}")
+        with override_settings(DASHBOARD_BUNDLES=False):
+            self.assertEqual(gabarit.render(Context()).count('<script'), len(BUNDLES['listes.js']))
+        with override_settings(DASHBOARD_BUNDLES=True), \
+                mock.patch('dashboard.templatetags.assets.manifeste',
+                           return_value={'listes.js': 'assets/listes.0123456789ab.js'}):
+            self.assertHTMLEqual(gabarit.render(Context()),
+                                 '<script src="/static/assets/listes.0123456789ab.js"></script>')
+
+
+class VuesAsyncTests(TransactionTestCase):
+    """Les requêtes lancées en parallèle utilisent d'autres connexions : données validées."""
+    databases = '__all__'
+
+    async def test_dashboard_2_async(self):
+        utilisateur = await User.objects.acreate(username='async_test', is_superuser=True)
+        await Compteur.objects.acreate(nom='clients', valeur=793)
+        await Compteur.objects.acreate(nom='produits', valeur=1862)
+        self.assertEqual(await en_parallele(lambda: compteur('clients'), lambda: compteur('produits')),
+                         [793, 1862])
+
+        request = RequestFactory().get('/dashboard/dashbord_2/')
+        request.user = utilisateur
+        self.assertEqual((await dashboard_2_async(request)).status_code, 200)
@@ -1,18 +1,30 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 from django.views.generic import TemplateView
 
 app_name = 'dashboard'
 
+# Sous ASGI, les dashboards lancent leurs requêtes indépendantes en même temps
+ASYNC = getattr(settings, 'DASHBOARD_ASYNC', False)
+
 urlpatterns = [
     # Dashboards - Accessibles aux deux groupes
-    path("", views.dashboard_1, name="dashboard_1"),
-    path("dashbord_2/", views.dashboard_2, name="dashboard_2"),
+    path("", views.dashboard_1_async if ASYNC else views.dashboard_1, name="dashboard_1"),
+    path("dashbord_2/", views.dashboard_2_async if ASYNC else views.dashboard_2, name="dashboard_2"),
+    path("graphique/<str:nom>/", views.graphique_async if ASYNC else views.graphique, name="graphique"),
+    path("tendances/", views.tendances, name="tendances"),
+    path("tendances/donnees/", views.tendances_donnees, name="tendances_donnees"),
+    path("api/olap/", views.olap, name="olap"),
+    path("export/<str:format>/", views.export_lignes, name="export_lignes"),
     path("<str:segment>/liste/", views.segmentliste, name="segmentliste"),
+    path("<str:segment>/liste/donnees/", views.segmentliste_donnees, name="segmentliste_donnees"),
     
     # Gestion - Administrateurs uniquement
     path('gestion/utilisateurs/', views.gestion_utilisateurs, name='gestion_utilisateurs'),
     path('gestion/groupes/', views.gestion_groupes, name='gestion_groupes'),
+    path('gestion/performances/', views.performances, name='performances'),
+    path('gestion/metriques/', views.metriques, name='metriques'),
     
     # Authentification personnalisée
     path('login/', views.custom_login, name='login'),
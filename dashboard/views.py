@@ -1,16 +1,40 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login, logout
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.models import User, Group
 from django.contrib import messages
 from django.db.models import Sum
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.cache import cache_control
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, quote_etag
+from django.views.decorators.http import etag
 from datetime import datetime
-import plotly.express as px
-import pandas as pd
+import json
 
-from .models import Client, Produit, Ligne, Localite
-from .decorators import group_required, admin_required
+from .models import Ligne, AgregatSegment
+from .agregats import compteur
+from .asynchrone import en_parallele
+from .graphiques import (
+    FIGURES, FILTRES_SERIE, GRANULARITES, figure_json, figure_serie, parametres_serie, requete_agregee,
+)
+from .cache import cle_graphique, graphique_en_cache
+from .datatables import Colonne, reponse_datatables
+from .export import FORMATS, filtres_export, nom_fichier, parquet_disponible
+from .instrumentation import chrono, statistiques
+from .olap import interroger
+from .pool import statistiques_pools
+from .decorators import group_required, admin_required, sur_replique
+from .permissions import droits, droits_utilisateur
+
+
+def _rendu(request, template, context):
+    """render() chronométré (section « rendu » de l'instrumentation)"""
+    with chrono('rendu'):
+        return render(request, template, context)
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -19,53 +43,212 @@ from .decorators import group_required, admin_required
 
 @login_required
 @group_required('Administrateurs', 'Utilisateurs Standard')
+@sur_replique
 def dashboard_1(request):
-    """Dashboard principal avec graphique des ventes par région"""
-    ca_consumer = Ligne.objects.filter(client__cltSegment="Consumer").aggregate(ca_seg=Sum("ligPrix"))
-    data = Ligne.objects.values('localite__locRegion', 'ligQuantite', 'localite__locVille')
-    df_data = pd.DataFrame(data)
-
-    # Graphique camembert avec Plotly
-    fig = px.pie(df_data, values='ligQuantite', names='localite__locRegion',
-                 color_discrete_sequence=['#FCC6BB', '#F87C63', '#C82909', '#701705'],
-                 labels={'ligQuantite': 'Nombre de produits', 'localite__locRegion': 'Région'})
-    fig.update_traces(textposition='inside', textinfo='percent+label', hovertemplate=None,
-                      hoverinfo='skip', showlegend=False)
-    chart = fig.to_html()
-    
+    """Dashboard principal avec graphique des ventes par région (lu dans les agrégats)"""
     context = {
-        'ca_consumer': round(ca_consumer['ca_seg'], 2) if ca_consumer['ca_seg'] else 0,
-        'chart': chart,
-        'is_admin': request.user.groups.filter(name='Administrateurs').exists() or request.user.is_superuser,
+        'ca_consumer': _ca_segment("Consumer"),
+        'is_admin': droits(request).is_admin,
     }
-    return render(request, "dashboard/dashboard_1.html", context)
+    return _rendu(request, "dashboard/dashboard_1.html", context)
+
+
+def requete_ca_segment(segment):
+    return requete_agregee(AgregatSegment, ['segment'], {'ca_seg': Sum("ventes")}, {'segment': segment})
+
+
+def _ca_segment(segment):
+    ca = requete_ca_segment(segment).first()
+    return round(ca['ca_seg'], 2) if ca and ca['ca_seg'] else 0
+
+
+@login_required
+@group_required('Administrateurs', 'Utilisateurs Standard')
+@sur_replique
+@cache_control(private=True, no_cache=True)
+@etag(lambda request, nom: cle_graphique(nom))
+def graphique(request, nom):
+    """Figure Plotly (JSON) d'un graphique, dessinée côté navigateur par plotly.js"""
+    if nom not in FIGURES:
+        raise Http404("Graphique inconnu")
+    contenu = graphique_en_cache(nom, lambda: figure_json(nom))
+    return HttpResponse(contenu, content_type='application/json')
 
 
 @login_required
 @group_required('Administrateurs', 'Utilisateurs Standard')
+@sur_replique
 def dashboard_2(request):
-    """Dashboard secondaire avec statistiques générales"""
-    nb_client = Client.objects.all().count()
-    nb_prod = Produit.objects.all().count()
+    """Dashboard secondaire avec statistiques générales (lues dans les compteurs)"""
+    nb_client = compteur('clients')
+    nb_prod = compteur('produits')
     context = {
         "message": 'La vie est belle !',
         "nb_client": nb_client,
         "nb_prod": nb_prod,
-        'is_admin': request.user.groups.filter(name='Administrateurs').exists() or request.user.is_superuser,
+        'is_admin': droits(request).is_admin,
+    }
+    return _rendu(request, "dashboard/dashboard_2.html", context)
+
+
+# ═══════════════════════════════════════════════════════════════
+# DASHBOARDS ASYNC - Pour un déploiement ASGI (DASHBOARD_ASYNC=True)
+# ═══════════════════════════════════════════════════════════════
+
+@group_required('Administrateurs', 'Utilisateurs Standard')
+@sur_replique
+async def dashboard_1_async(request):
+    """dashboard_1 : CA du segment et figure par région calculés en même temps"""
+    ca_consumer, _ = await en_parallele(
+        lambda: _ca_segment("Consumer"),
+        # Prépare la figure que la page va demander juste après
+        lambda: graphique_en_cache('quantite_par_region', lambda: figure_json('quantite_par_region')),
+    )
+    context = {
+        'ca_consumer': ca_consumer,
+        'is_admin': droits(request).is_admin,
+    }
+    return await sync_to_async(_rendu)(request, "dashboard/dashboard_1.html", context)
+
+
+@group_required('Administrateurs', 'Utilisateurs Standard')
+@sur_replique
+async def graphique_async(request, nom):
+    """graphique : même réponse (ETag, Cache-Control) pour un serveur ASGI"""
+    if nom not in FIGURES:
+        raise Http404("Graphique inconnu")
+    cle = await sync_to_async(cle_graphique)(nom)
+    reponse = get_conditional_response(request, etag=quote_etag(cle))
+    if reponse is None:
+        contenu = await sync_to_async(graphique_en_cache)(nom, lambda: figure_json(nom))
+        reponse = HttpResponse(contenu, content_type='application/json')
+        reponse['ETag'] = quote_etag(cle)
+    patch_cache_control(reponse, private=True, no_cache=True)
+    return reponse
+
+
+@group_required('Administrateurs', 'Utilisateurs Standard')
+@sur_replique
+async def dashboard_2_async(request):
+    """dashboard_2 : les deux compteurs sont lus en même temps"""
+    nb_client, nb_prod = await en_parallele(lambda: compteur('clients'), lambda: compteur('produits'))
+    context = {
+        "message": 'La vie est belle !',
+        "nb_client": nb_client,
+        "nb_prod": nb_prod,
+        'is_admin': droits(request).is_admin,
+    }
+    return await sync_to_async(_rendu)(request, "dashboard/dashboard_2.html", context)
+
+
+def _cle_tendances(request):
+    try:
+        return cle_graphique('tendances', parametres_serie(request.GET))
+    except ValueError:
+        return None
+
+
+@login_required
+@group_required('Administrateurs', 'Utilisateurs Standard')
+@sur_replique
+def tendances(request):
+    """Tendances des ventes par jour, semaine, mois ou trimestre, avec filtres"""
+    context = {
+        'granularites': list(GRANULARITES),
+        'granularite': request.GET.get('granularite', 'mois'),
+        'filtres': [(nom, valeurs, request.GET.get(nom, '')) for nom, valeurs in FILTRES_SERIE.items()],
+        'debut': request.GET.get('debut', ''),
+        'fin': request.GET.get('fin', ''),
+        'url_donnees': f"{reverse('dashboard:tendances_donnees')}?{request.GET.urlencode()}",
+        'is_admin': droits(request).is_admin,
     }
-    return render(request, "dashboard/dashboard_2.html", context)
+    return _rendu(request, "dashboard/tendances.html", context)
+
+
+@login_required
+@group_required('Administrateurs', 'Utilisateurs Standard')
+@sur_replique
+@cache_control(private=True, no_cache=True)
+@etag(_cle_tendances)
+def tendances_donnees(request):
+    """Série temporelle (figure Plotly JSON), mise en cache par fenêtre et filtres"""
+    try:
+        parametres = parametres_serie(request.GET)
+    except ValueError as e:
+        return JsonResponse({'erreur': str(e)}, status=400)
+    contenu = graphique_en_cache('tendances', lambda: json.dumps(figure_serie(parametres)), parametres)
+    return HttpResponse(contenu, content_type='application/json')
+
+
+@login_required
+@group_required('Administrateurs', 'Utilisateurs Standard')
+@sur_replique
+@cache_control(private=True, no_cache=True)
+def olap(request):
+    """API JSON du cube des ventes : dimensions, mesures, filtres et top-N (voir dashboard.olap)"""
+    try:
+        resultat = interroger(request.GET)
+    except ValueError as e:
+        return JsonResponse({'erreur': str(e)}, status=400)
+    return JsonResponse(resultat)
 
 
 @login_required
 @group_required('Administrateurs', 'Utilisateurs Standard')
+@sur_replique
 def segmentliste(request, segment):
-    """Liste des lignes filtrées par segment client"""
-    seg_qs = Ligne.objects.filter(client__cltSegment=segment)
+    """Liste des lignes d'un segment client (données chargées page par page par DataTables)"""
     context = {
-        'seg_data': seg_qs,
-        'is_admin': request.user.groups.filter(name='Administrateurs').exists() or request.user.is_superuser,
+        'segment': segment,
+        'colonnes': COLONNES_SEGMENT,
+        'is_admin': droits(request).is_admin,
     }
-    return render(request, "dashboard/listes_data_segment.html", context)
+    return _rendu(request, "dashboard/listes_data_segment.html", context)
+
+
+def lignes_segment(segment):
+    return Ligne.objects.filter(client__cltSegment=segment)
+
+
+COLONNES_SEGMENT = [
+    Colonne('commande__comID', 'ID Commande', 'texte'),
+    Colonne('commande__comDate', 'Date Commande', 'date'),
+    Colonne('produit__prodNom', 'Produit', 'texte'),
+    Colonne('client__cltNom', 'Client', 'texte'),
+    Colonne('localite__locVille', 'Ville', 'texte'),
+    Colonne('ligQuantite', 'Quantité', 'nombre'),
+    Colonne('ligPrix', 'Prix', 'nombre'),
+]
+
+
+@login_required
+@group_required('Administrateurs', 'Utilisateurs Standard')
+@sur_replique
+def segmentliste_donnees(request, segment):
+    """Page JSON de la liste d'un segment (protocole server-side de DataTables)"""
+    seg_qs = lignes_segment(segment)
+    total = AgregatSegment.objects.filter(segment=segment).values_list('nb_lignes', flat=True).first()
+    return JsonResponse(reponse_datatables(request.GET, seg_qs, COLONNES_SEGMENT, total))
+
+
+@login_required
+@group_required('Administrateurs', 'Utilisateurs Standard')
+@sur_replique
+def export_lignes(request, format):
+    """Export en flux (CSV, XLSX, Parquet) des lignes filtrées par segment, région, catégorie et dates"""
+    if format not in FORMATS:
+        raise Http404("Format d'export inconnu")
+    if format == 'parquet' and not parquet_disponible():
+        return JsonResponse({'erreur': "Export Parquet indisponible : installez pyarrow"}, status=501)
+    try:
+        filtres = filtres_export(request.GET)
+    except ValueError as e:
+        return JsonResponse({'erreur': str(e)}, status=400)
+
+    generateur, type_mime, extension = FORMATS[format]
+    reponse = StreamingHttpResponse(generateur(filtres), content_type=type_mime)
+    reponse['Content-Disposition'] = content_disposition_header(True, nom_fichier(filtres, extension))
+    return reponse
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -97,6 +280,25 @@ def gestion_groupes(request):
     return render(request, 'dashboard/gestion_groupes.html', context)
 
 
+@login_required
+@admin_required
+def performances(request):
+    """Percentiles des temps de réponse par vue (mesures de ce processus)"""
+    context = {
+        'statistiques': statistiques(),
+        'pools': statistiques_pools(),
+        'is_admin': True,
+    }
+    return render(request, 'dashboard/performances.html', context)
+
+
+@login_required
+@admin_required
+def metriques(request):
+    """Mêmes statistiques que la page performances, en JSON"""
+    return JsonResponse({'vues': statistiques(), 'connexions': statistiques_pools()})
+
+
 # ═══════════════════════════════════════════════════════════════
 # AUTHENTIFICATION - Connexion/Déconnexion personnalisées
 # ═══════════════════════════════════════════════════════════════
@@ -108,16 +310,19 @@ def custom_login(request):
         if form.is_valid():
             user = form.get_user()
             login(request, user)
+            droits_connecte = droits_utilisateur(user)
             
             # Création des variables de session personnalisées
             request.session['user_session_data'] = {
                 'user_id': user.id,
                 'username': user.username,
                 'email': user.email,
-                'groups': list(user.groups.values_list('name', flat=True)),
+                'groups': sorted(droits_connecte.groupes),
                 'login_time': datetime.now().isoformat(),
-                'is_admin': user.groups.filter(name='Administrateurs').exists() or user.is_superuser,
+                'is_admin': droits_connecte.is_admin,
             }
+            # Enregistré avec la connexion : le middleware n'aura pas à réécrire la session
+            request.session['last_activity'] = request.session['user_session_data']['login_time']
             
             messages.success(request, f'Bienvenue {user.username}!')
             return redirect('dashboard:dashboard_1')